@@ -18,21 +18,27 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from random import sample, randint
+import numpy
 
 from alien_horde_layer import AlienHordeLayer
-from constants import (DISPLAY, HORDE_WIDTH, HORDE_BUFFER, TYPE_ONE, TYPE_TWO,
-                       TYPE_THREE)
+from constants import TYPE_ONE, TYPE_TWO, TYPE_THREE
+from ecs import Registry
 from ship import Ship
+from ship_bullet import ShipBullet
 from mystery import Mystery
 
 
 class AlienHorde():
     """Class which represets the alien horde which has come to attack the user
-    playing as the tank.
+    playing as the tank. The horde's state is kept in NumPy arrays with a row
+    for each layer and a column for each ship in a layer, so that marching,
+    shooting, animation and collision checks work on the whole horde at
+    once.
 
     Arguments:
-        height (int): what height to place the horde.
+        config (Config): The size and layout of the horde, and how fast it
+            fires.
+        random (RandomStreams): The games random number generators.
         groups (pygame.sprite.Group): The groups the ships will be in.
 
     Attributes:
@@ -41,48 +47,132 @@ class AlienHorde():
         _layers (list): The layers that make up the horde.
         _speed_multiplier (float): The multiplier used to speed up the ships.
         _shooting_delay (float): The amount of time to wait before shooting.
+        _reload_speed (float): The time it takes each ship to reload.
         _last_shots (float): The time when shots were last fired.
         _last_move (float): The time the horde last moved.
         _current_layer (int): The layer index in _layers.
         _ship_count (int): The amount of ships left in the horde.
+        _random (random.Random): Chooses which columns shoot.
+        _mystery_random (random.Random): Chooses when and where the mystery
+            ship appears.
+        _types (numpy.ndarray): The type of each ship.
+        _positions (numpy.ndarray): The top left position of each ship.
+        _sizes (numpy.ndarray): The width and height of each ship.
+        _alive (numpy.ndarray): Whether each ship is still alive.
+        _last_shot (numpy.ndarray): The time each ship last fired a shot.
+        _last_frame (numpy.ndarray): The time each ship's animation last
+            changed frame.
+        _frames (numpy.ndarray): The animation frame each ship is showing.
+        _frame_delays (numpy.ndarray): The time between the frames of each
+            layer's animation.
+        _frame_counts (numpy.ndarray): The number of frames in each layer's
+            animation.
+        _ships (list [list [Ship]]): The ship sprites, used for drawing.
+        _config (Config): The size of the arena and the pace of the game.
     """
-    def __init__(self, height, *groups):
+    def __init__(self, config, random, *groups):
         self._current_time = 0
         self._seconds_elapsed = 0
         self._layers = []
         self._speed_multiplier = 0
-        self._shooting_delay = 0.5
+        self._shooting_delay = config.horde_shooting_delay
+        self._reload_speed = config.ship_reload
+        self._config = config
         self._last_shots = 0
         self._last_move = 0
         self._last_mystery = 0
-        self._mystery_time = randint(10, 30)
+        self._random = random['horde']
+        self._mystery_random = random['mystery']
+        self._mystery_time = self._mystery_random.randint(10, 30)
         self._ship_groups = groups
 
-        for _ in range(5):
-            self._layers.append(AlienHordeLayer())
+        ship_gap = int(((config.width - config.horde_buffer * 2) -
+                        (config.horde_columns * TYPE_THREE.width)) /
+                       (config.horde_columns + 1))
+        step = TYPE_THREE.width + ship_gap
+
+        columns = (ship_gap + config.horde_buffer +
+                   step * numpy.arange(config.horde_columns))
+        sizes = {1: TYPE_ONE.size, 2: TYPE_TWO.size, 3: TYPE_THREE.size}
+
+        self._types = numpy.repeat(
+            numpy.array(config.ship_types())[:, numpy.newaxis], len(columns),
+            axis=1)
+        self._sizes = numpy.array([[sizes[ship_type] for ship_type in row]
+                                   for row in self._types.tolist()])
+        self._positions = numpy.empty(self._types.shape + (2,), dtype=int)
+        self._positions[:, :, 0] = (columns + (TYPE_THREE.width / 2) -
+                                    (self._sizes[:, :, 0] / 2)).astype(int)
+        self._positions[:, :, 1] = \
+            config.horde_height + config.horde_spacing * numpy.arange(
+                len(self._types))[:, numpy.newaxis]
+        self._alive = numpy.ones(self._types.shape, dtype=bool)
+        self._last_shot = numpy.full(self._types.shape,
+                                     -(self._reload_speed / 2))
+        self._last_frame = numpy.zeros(self._types.shape)
+        self._frames = numpy.zeros(self._types.shape, dtype=int)
+        self._ships = [[None] * len(columns) for _ in self._types]
+
+        for column in range(len(columns)):
+            for row, ship_type in enumerate(self._types[:, column].tolist()):
+                self._ships[row][column] = Ship(
+                    ship_type, self._positions[row, column].tolist(),
+                    self._ship_groups)
+
+        animations = [row[0].animation for row in self._ships]
+        self._frame_delays = numpy.array(
+            [animation.delay for animation in animations])[:, numpy.newaxis]
+        self._frame_counts = numpy.array(
+            [animation.count for animation in animations])[:, numpy.newaxis]
+
+        for row, ship_type in enumerate(self._types[:, 0].tolist()):
+            self._layers.append(AlienHordeLayer(
+                ship_type, self._positions[row], self._alive[row],
+                self._ships[row], config.width))
 
         self._current_layer = len(self._layers) - 1
+        self._ship_count = int(self._alive.sum())
 
-        ship_gap = int(((DISPLAY.width - HORDE_BUFFER * 2) -
-                        (HORDE_WIDTH * TYPE_THREE.width)) / (HORDE_WIDTH + 1))
-        start = ship_gap
-        end = DISPLAY.width - TYPE_THREE.width
-        step = TYPE_THREE.width + ship_gap
+    @property
+    def size(self):
+        """Get the number of ships the horde started with."""
+        return self._alive.size
 
-        for pos_x in range(start + HORDE_BUFFER, end - HORDE_BUFFER, step):
-            self._layers[0].append(Ship(1, (int(pos_x + (TYPE_THREE.width / 2) - (TYPE_ONE.width / 2)), height), self._ship_groups))
-            self._layers[1].append(Ship(2, (int(pos_x + (TYPE_THREE.width / 2) - (TYPE_TWO.width / 2)), height + 50), self._ship_groups))
-            self._layers[2].append(Ship(2, (int(pos_x + (TYPE_THREE.width / 2) - (TYPE_TWO.width / 2)), height + 100), self._ship_groups))
-            self._layers[3].append(Ship(3, (pos_x, height + 150), self._ship_groups))
-            self._layers[4].append(Ship(3, (pos_x, height + 200), self._ship_groups))
+    @property
+    def ships(self):
+        """Get the ship sprites, by row and column."""
+        return self._ships
 
-        self._ship_count = Ship.num_ships
+    @property
+    def positions(self):
+        """Get the top left position of each ship, by row and column."""
+        return self._positions
 
-    def update(self, seconds_elapsed):
+    @property
+    def alive(self):
+        """Get whether each ship is still alive, by row and column."""
+        return self._alive
+
+    @property
+    def frames(self):
+        """Get the animation frame each ship is showing, by row and column.
+        """
+        return self._frames
+
+    @property
+    def ship_count(self):
+        """Get the number of ships left in the horde."""
+        return int(self._alive.sum())
+
+    def update(self, seconds_elapsed, registry):
         """Update the horde's time based variables and do any animation work.
+        Every ship whose frame is due is moved onto its next frame at once,
+        and only the sprites of those ships are shown their new frame. Send
+        out the mystery ship when it is time.
 
         Arguments:
             seconds_elapsed (float): The seconds elspased since the last frame.
+            registry (Registry): The entities the mystery ship will be in.
         """
         self._current_time += seconds_elapsed
         self._seconds_elapsed = seconds_elapsed
@@ -90,19 +180,38 @@ class AlienHorde():
         for layer in self._layers:
             layer.update(seconds_elapsed)
 
+        self._animate()
+
         if self._ship_count == 1:
             self._speed_multiplier = 2
 
-        ship_count = Ship.num_ships
+        ship_count = int(self._alive.sum())
 
         if ship_count < self._ship_count:
             self._speed_multiplier += (self._ship_count - ship_count) / 250
             self._ship_count = ship_count
 
         if abs(self._last_mystery - self._current_time) >= self._mystery_time:
-            Mystery(randint(0, 1), self._ship_groups)
+            Mystery.spawn(registry, self._mystery_random.randint(0, 1),
+                          self._config)
             self._last_mystery = self._current_time
 
+    def _animate(self):
+        """Move every living ship whose frame is due onto its next frame,
+        and show it on their sprites.
+        """
+        due = self._alive & (abs(self._last_frame - self._current_time) >=
+                             self._frame_delays)
+
+        if not due.any():
+            return
+
+        self._frames[due] = ((self._frames + 1) % self._frame_counts)[due]
+        self._last_frame[due] = self._current_time
+
+        for row, column in numpy.argwhere(due).tolist():
+            self._ships[row][column].show(int(self._frames[row, column]))
+
     def move(self):
         """Move the ships one layer at a time. The speed that they move will
         change as more ships are shot down. This is according to
@@ -111,26 +220,81 @@ class AlienHorde():
         if self._current_layer < 0:
             self._current_layer = len(self._layers) - 1
 
-        if abs(self._last_move - self._current_time) >= 0.2 - self._speed_multiplier:
-            self._layers[self._current_layer].move()
+        if abs(self._last_move - self._current_time) >= \
+                0.2 - self._speed_multiplier:
+            self._layers[self._current_layer].move(self._ship_count)
             self._current_layer -= 1
             self._last_move = self._current_time
 
-    def shoot(self, tank, *groups):
+    def shoot(self, tank, registry):
         """Randomly fire shots at the tank as long as there isn't any ships
-        below the one that is firing.
+        below the one that is firing. Only ships near the tank which have
+        reloaded will fire.
 
         Arguments:
             tank (Tank): The tank which the ships are shooting at.
-            groups (pygame.sprite.Group): The groups the bullets will be in.
+            registry (Registry): The entities the bullets will be in.
         """
-        def _shoot_colummn(column):
-            for index in range(len(self._layers) - 1, -1, -1):
-                if self._layers[index][column].alive():
-                    self._layers[index][column].shoot(tank, *groups)
-                    return
-
-        if abs(self._last_shots - self._current_time) >= self._shooting_delay:
-            for column in sample(range(0, HORDE_WIDTH), int(HORDE_WIDTH / 2)):
-                _shoot_colummn(column)
-            self._last_shots = self._current_time
+        if abs(self._last_shots - self._current_time) < self._shooting_delay:
+            return
+
+        num_columns = self._alive.shape[1]
+        columns = numpy.array(self._random.sample(range(0, num_columns),
+                                                  int(num_columns / 2)),
+                              dtype=int)
+
+        alive = self._alive[::-1, columns]
+        has_ship = alive.any(axis=0)
+        rows = len(alive) - 1 - alive.argmax(axis=0)
+        rows, columns = rows[has_ship], columns[has_ship]
+
+        in_range = abs(self._positions[rows, columns, 0] - tank.rect.x) <= 50
+        reloaded = abs(self._last_shot[rows, columns] - self._current_time) \
+            >= self._reload_speed
+        rows, columns = rows[in_range & reloaded], columns[in_range & reloaded]
+
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            ShipBullet.fire(registry, self._ships[row][column], self._config)
+
+        self._last_shot[rows, columns] = self._current_time
+        self._last_shots = self._current_time
+
+    def take_damage(self, registry):
+        """Check if any of the ships have been hit. Every tank bullet's rect
+        is tested against every living ship at once, and only the ships each
+        bullet overlaps are mask tested, a bullet at a time.
+
+        Arguments:
+            registry (Registry): The entities holding the bullets.
+        """
+        bullets = registry.indices(Registry.TANK_BULLET)
+
+        if not bullets:
+            return
+
+        position = registry.position[bullets]
+        size = registry.size[bullets]
+        left, top = self._positions[:, :, 0], self._positions[:, :, 1]
+        bullet_left = position[:, 0, numpy.newaxis, numpy.newaxis]
+        bullet_top = position[:, 1, numpy.newaxis, numpy.newaxis]
+
+        hits = (self._alive &
+                (left < bullet_left + size[:, 0, numpy.newaxis,
+                                           numpy.newaxis]) &
+                (left + self._sizes[:, :, 0] > bullet_left) &
+                (top < bullet_top + size[:, 1, numpy.newaxis,
+                                         numpy.newaxis]) &
+                (top + self._sizes[:, :, 1] > bullet_top))
+
+        for bullet, column, row in numpy.argwhere(
+                hits.transpose(0, 2, 1)).tolist():
+            bullet = bullets[bullet]
+
+            if not registry.alive[bullet] or not self._alive[row, column]:
+                continue
+
+            ship = self._ships[row][column]
+            ship.take_damage(registry, bullet)
+
+            if not ship.alive():
+                self._alive[row, column] = False
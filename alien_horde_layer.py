@@ -18,35 +18,70 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import numpy
 import pygame
 
-from ship import Ship
-from constants import DISPLAY, HORDE_WIDTH, TYPE_ONE, TYPE_TWO, TYPE_THREE
+from constants import TYPE_ONE, TYPE_TWO, TYPE_THREE
 
 
 class AlienHordeLayer():
-    """One of the layers in the alien horde.
+    """One of the layers in the alien horde. The layer works on views of the
+    horde's arrays, the ship sprites are only moved to match them so that
+    they can be drawn. The ships aren't updated every tick, so the layer
+    keeps where the ships it moves were before the tick for them to be
+    drawn between, until the tick after.
+
+    Arguments:
+        ship_type (int): The type of the ships in the layer.
+        positions (numpy.ndarray): The layer's row of the horde's positions.
+        alive (numpy.ndarray): The layer's row of the horde's alive flags.
+        ships (list [Ship]): The ship sprites in the layer.
+        display_width (int): The width of the arena the ships march across.
 
     Attributes:
         _current_time (float): The time since the layer was created.
         _seconds_elapsed (float): The time since the last frame was drawn.
-        _ships (list [Ship]): The list of ships in the layer.
-        _current_ship (Ship): The ship currently being moved.
+        _positions (numpy.ndarray): The top left of each ship in the layer.
+        _alive (numpy.ndarray): Whether each ship in the layer is alive.
+        _ships (list [Ship]): The ship sprites in the layer.
+        _width (int): The width of the ships in the layer.
+        _ship_buffer (float): How close the ships can get to the edges.
+        _display_width (int): The width of the arena the ships march across.
         _velocity (pygame.math.Vector2): The speed which the ships move.
-        _last_move (float): The last time a move was made.
+        _drop_order (numpy.ndarray): The order the ships drop to the next row.
+        _dropped (int): How many ships have dropped, None if not dropping.
+        _drop_start (float): The time the ships started dropping.
+        _moved (set {Ship}): The ships moved since the start of the last
+            tick, which are drawn between where they were and are.
     """
-    def __init__(self):
+    def __init__(self, ship_type, positions, alive, ships, display_width):
         self._current_time = 0
         self._seconds_elapsed = 0
-        self._ships = []
-        self._current_ship = None
+        self._positions = positions
+        self._alive = alive
+        self._ships = ships
+        self._display_width = display_width
         self._velocity = pygame.math.Vector2(10, 0)
-        self._last_move = 0
+        self._drop_order = None
+        self._dropped = None
+        self._drop_start = 0
+        self._moved = set()
+
+        if ship_type == 1:
+            self._width = TYPE_ONE.width
+            self._ship_buffer = TYPE_ONE.width
+        elif ship_type == 2:
+            self._width = TYPE_TWO.width
+            self._ship_buffer = (TYPE_TWO.width / 2) + (TYPE_TWO.width / 8)
+        elif ship_type == 3:
+            self._width = TYPE_THREE.width
+            self._ship_buffer = TYPE_THREE.width / 2
 
     def update(self, seconds_elapsed):
         """Update the time base variables. Make sure that the ships don't
         all drop to the next layer at once. They should fall on after
-        another.
+        another, so every ship which is due to have dropped since the last
+        update is dropped at once.
 
         Arguments:
             seconds_elapsed (float): The time since the last frame was drawn.
@@ -54,75 +89,79 @@ class AlienHordeLayer():
         self._current_time += seconds_elapsed
         self._seconds_elapsed = seconds_elapsed
 
-        if self._velocity.y != 0:
-            if self._current_ship is None:
-                if self._velocity.x < 0:
-                    self._current_ship = 0
-                else:
-                    self._current_ship = len(self._ships) - 1
+        for ship in self._moved:
+            ship.settle()
 
-            if self._current_ship < 0 or self._current_ship >= HORDE_WIDTH:
-                self._current_ship = None
-                self._last_move = 0
-                self._velocity.y = 0
-                return
+        self._moved.clear()
 
-            if abs(self._last_move - self._current_time) >= 0.05:
-                self._ships[self._current_ship].rect.y += self._velocity.y
-                self._ships[self._current_ship].dirty = 1
+        if self._velocity.y == 0:
+            return
 
-                if self._velocity.x < 0:
-                    self._current_ship += 1
-                else:
-                    self._current_ship -= 1
+        if self._dropped is None:
+            self._drop_order = numpy.arange(len(self._ships))
 
-                self._last_move = self._current_time
+            if self._velocity.x >= 0:
+                self._drop_order = self._drop_order[::-1]
 
-    def move(self):
+            self._dropped = 0
+            self._drop_start = self._current_time
+
+        if self._dropped >= len(self._drop_order):
+            self._dropped = None
+            self._velocity.y = 0
+            return
+
+        due = min(int((self._current_time - self._drop_start) / 0.05) + 1,
+                  len(self._drop_order))
+
+        if due > self._dropped:
+            columns = self._drop_order[self._dropped:due]
+            self._positions[columns, 1] += int(self._velocity.y)
+            self._sync(columns)
+            self._dropped = due
+
+    def move(self, ship_count):
         """Move the ships and make sure that they do not disappear of the
-        screen.
+        screen. When there is only one ship left only the living ships are
+        kept on the screen.
+
+        Arguments:
+            ship_count (int): The number of ships left in the horde.
         """
-        if self._ships[0].type == 1:
-            ship_buffer = TYPE_ONE.width
-        elif self._ships[0].type == 2:
-            ship_buffer = (TYPE_TWO.width / 2) + (TYPE_TWO.width / 8)
-        elif self._ships[0].type == 3:
-            ship_buffer = TYPE_THREE.width / 2
-
-        if Ship.num_ships != 1:
-            for ship in self._ships:
-                if ship.rect.left <= 0 + ship_buffer:
-                    self._velocity.x = abs(self._velocity.x)
-                    self._velocity.y = 20
-                elif ship.rect.right >= DISPLAY.width - ship_buffer:
-                    self._velocity.x = -self._velocity.x
-                    self._velocity.y = 20
+        if ship_count != 1:
+            edges = self._positions[:, 0]
         else:
-            for ship in [ship for ship in self._ships if ship.alive()]:
-                if ship.rect.left <= 0 + ship_buffer:
-                    self._velocity.x = abs(self._velocity.x)
-                    self._velocity.y = 20
-                elif ship.rect.right >= DISPLAY.width - ship_buffer:
-                    self._velocity.x = -self._velocity.x
-                    self._velocity.y = 20
-
-        for ship in self._ships:
-            ship.rect.x += self._velocity.x
-            ship.dirty = 1
+            edges = self._positions[self._alive, 0]
 
-    def append(self, ship):
-        """Add a new ship to the layer.
+        if edges.size:
+            if edges.min() <= 0 + self._ship_buffer:
+                self._velocity.x = abs(self._velocity.x)
+                self._velocity.y = 20
+            elif edges.max() + self._width >= \
+                    self._display_width - self._ship_buffer:
+                self._velocity.x = -abs(self._velocity.x)
+                self._velocity.y = 20
 
-        Arguments:
-            ship (Ship): The ship being added to the layer.
-        """
-        self._ships.append(ship)
+        self._positions[:, 0] += int(self._velocity.x)
+        self._sync(numpy.arange(len(self._ships)))
 
-    def __getitem__(self, index):
-        """Allow the layer to be indexed. The is used when making the ships
-        shoot at the tank.
+    def _sync(self, columns):
+        """Move the living ship sprites to their positions in the horde's
+        arrays so that they can be drawn, keeping where they were at the
+        start of the tick.
 
         Arguments:
-            index (int): The index that the user wants.
+            columns (numpy.ndarray): The columns of the ships which moved.
         """
-        return self._ships[index]
+        columns = columns[self._alive[columns]]
+
+        for column, position in zip(columns.tolist(),
+                                    self._positions[columns].tolist()):
+            ship = self._ships[column]
+
+            if ship not in self._moved:
+                ship.remember_position()
+                self._moved.add(ship)
+
+            ship.rect.topleft = position
+            ship.dirty = 1
@@ -18,26 +18,36 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from sprite_sheet import SpriteSheet
+
 
 class Animation():
-    """Make using animations loaded from the sprite sheet easier to use.
+    """An animation in the sprite sheet, its frames and how they are played.
+    Animations don't play themselves, the registry's systems and the horde
+    keep which frame each entity and ship is showing. The frames aren't
+    fetched from the sprite sheet until they are first needed, so animations
+    can be created when a module is imported.
 
     Arguments:
-        frames (list [pygame.Surface]): The frames that make up the animation.
+        rect (pygame.Rect): The rect of the first frame in the sprite sheet.
+        count (int): The amount of frames in the animation.
         delay (float): The amount of time between each frame.
         loop (bool): If the animation should loop or not.
 
     Attributes:
-        _frames (list [pygame.Surface]): The frames that make up an animation.
+        _rect (pygame.Rect): The rect of the first frame in the sprite sheet.
+        _count (int): The amount of frames in the animation.
+        _frames (list [pygame.Surface]): The frames that make up an animation,
+            None until they are first needed.
         _delay (float): The time between each frame.
         _loop (bool): If the animation should loop or not.
-        _current_frame (int): The index of the current frame in _frames.
     """
-    def __init__(self, frames, delay, loop=False):
-        self._frames = frames
+    def __init__(self, rect, count, delay, loop=False):
+        self._rect = rect
+        self._count = count
+        self._frames = None
         self._delay = delay
         self._loop = loop
-        self._current_frame = 0
 
     @property
     def delay(self):
@@ -48,17 +58,41 @@ class Animation():
         """
         return self._delay
 
-    def next(self):
-        """Get the next frame from the animation.
+    @property
+    def rect(self):
+        """Get the rect of the first frame in the sprite sheet."""
+        return self._rect
+
+    @property
+    def count(self):
+        """Get the amount of frames in the animation."""
+        return self._count
+
+    @property
+    def loop(self):
+        """Get whether the animation loops."""
+        return self._loop
+
+    @property
+    def key(self):
+        """Get what the animation is made of, which is the same for any two
+        animations which play the same way.
 
         Returns:
-            pygame.Surface: The next sprite frame in the animation.
+            tuple: The rect of its first frame, its number of frames, its
+                frame delay and whether it loops.
         """
-        try:
-            frame = self._frames[self._current_frame]
-            self._current_frame += 1
-            return frame
-        except IndexError:
-            if self._loop:
-                self._current_frame = 0
-                return self.next()
+        return (tuple(self._rect), self._count, self._delay, self._loop)
+
+    @property
+    def frames(self):
+        """Get the frames that make up the animation, fetching them from the
+        sprite sheet the first time they are needed.
+
+        Returns:
+            list [pygame.Surface]: The shared frames.
+        """
+        if self._frames is None:
+            self._frames = SpriteSheet.animation(self._rect, self._count)
+
+        return self._frames
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+import pygame
+
+from atlas import Atlas
+
+
+class Assets():
+    """Loads the game's assets the first time they are needed, rather than
+    when their modules are imported, so tools which never draw don't pay for
+    them. Each image and atlas is loaded once and cached, and the time taken
+    by each part of starting up is recorded so it can be reported in the same
+    form as `python -X importtime`.
+
+    Timed blocks can be nested, the self time of a block doesn't include the
+    blocks nested inside it, while its cumulative time does.
+
+    Attributes:
+        root (str): The directory asset paths are relative to.
+        clock (function): The clock used to time each block.
+        timings (dict {str: dict}): The depth the block was first nested at,
+            its self and cumulative seconds and the times it was entered, by
+            name, in the order they were first entered.
+        _images (dict {str: pygame.Surface}): The cached images.
+        _atlases (dict {str: Atlas}): The cached atlases, None for those
+            which couldn't be used.
+        _stack (list [float]): The seconds spent in blocks nested inside each
+            of the blocks currently being timed.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    clock = time.perf_counter
+    timings = {}
+
+    _images = {}
+    _atlases = {}
+    _stack = []
+
+    @classmethod
+    def atlas(cls, path, sheet_path):
+        """Get a baked atlas, mapping it the first time it is asked for.
+
+        Arguments:
+            path (str): The path of the atlas, relative to the game.
+            sheet_path (str): The path of the sprite sheet it was baked from.
+
+        Returns:
+            Atlas: The atlas, or None if it hasn't been baked or it was baked
+                from a different sprite sheet.
+        """
+        try:
+            return cls._atlases[path]
+        except KeyError:
+            with cls.timed('map {}'.format(path)):
+                try:
+                    atlas = Atlas.load(os.path.join(cls.root, path),
+                                       os.path.join(cls.root, sheet_path))
+                except (IOError, ValueError):
+                    atlas = None
+
+            cls._atlases[path] = atlas
+            return atlas
+
+    @classmethod
+    def image(cls, path):
+        """Get an image, loading it the first time it is asked for. The
+        returned surface is shared and must not be drawn on.
+
+        Arguments:
+            path (str): The path of the image, relative to the game.
+
+        Returns:
+            pygame.Surface: The image.
+
+        Raises:
+            IOError: If the image can't be opened.
+        """
+        try:
+            return cls._images[path]
+        except KeyError:
+            with cls.timed('load {}'.format(path)):
+                try:
+                    image = pygame.image.load(os.path.join(cls.root, path))
+                except (IOError, pygame.error) as error:
+                    raise IOError('Failed to open {}: {}'.format(path, error))
+
+            cls._images[path] = image
+            return image
+
+    @classmethod
+    @contextmanager
+    def timed(cls, name):
+        """Time a block, adding to the time already recorded for the name.
+
+        Arguments:
+            name (str): What is being timed.
+        """
+        timing = cls.timings.setdefault(name, {
+            'depth': len(cls._stack),
+            'self': 0,
+            'cumulative': 0,
+            'count': 0
+        })
+
+        cls._stack.append(0)
+        start = cls.clock()
+
+        try:
+            yield
+        finally:
+            elapsed = cls.clock() - start
+            nested = cls._stack.pop()
+
+            timing['self'] += elapsed - nested
+            timing['cumulative'] += elapsed
+            timing['count'] += 1
+
+            if cls._stack:
+                cls._stack[-1] += elapsed
+
+    @classmethod
+    def report(cls):
+        """Describe where the time starting up went.
+
+        Returns:
+            str: A line for each timed block, with its self and cumulative
+                microseconds, indented by how deeply it was nested.
+        """
+        lines = ['startup: self [us] | cumulative | name']
+
+        for name, timing in cls.timings.items():
+            lines.append('startup: {:>9} | {:>10} | {}{}'.format(
+                int(timing['self'] * 1e6), int(timing['cumulative'] * 1e6),
+                '  ' * timing['depth'], name))
+
+        return '\n'.join(lines)
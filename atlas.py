@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import mmap
+import struct
+import zlib
+
+import numpy
+import pygame
+
+from constants import (SPRITE_ATLAS, SPRITE_SHEET, TANK, TANK_BULLET,
+                       TANK_EXPLOSION, TANK_BULLET_EXPLOSION, SHIELD,
+                       SHIP_BULLET_EXPLOSION, TYPE_ONE, TYPE_ONE_BULLET,
+                       TYPE_ONE_EXPLOSION, TYPE_TWO, TYPE_TWO_BULLET,
+                       TYPE_THREE, TYPE_THREE_BULLET, MYSTERY,
+                       MYSTERY_EXPLOSION, BULLET_COLLISION)
+
+
+class Atlas():
+    """The frames of the sprite sheet baked into a file of raw pixels, which
+    is mapped into memory and wrapped as surfaces rather than decoding the
+    sprite sheet. Pages of the file are shared between every process which
+    maps it, and are only read from disk when a frame is first drawn.
+
+    The file starts with a header of the magic bytes, the format version, the
+    CRC32 of the sprite sheet it was baked from and the number of frames. It
+    is followed by an index entry for each frame, giving its rect in the
+    sprite sheet and the offsets of its pixels and mask. The pixels are RGBA
+    rows and the mask is a bitset, a bit per pixel in the same order.
+
+    Arguments:
+        buffer (mmap.mmap): The mapped file.
+        frames (dict {tuple: tuple {int, int}}): The offsets of the pixels
+            and mask of each frame, by its rect in the sprite sheet.
+
+    Attributes:
+        magic (bytes): The bytes every atlas file starts with.
+        version (int): The version of the file format.
+        header (struct.Struct): The layout of the header.
+        entry (struct.Struct): The layout of each index entry.
+        animations (tuple [tuple {pygame.Rect, int}]): The first frame and
+            number of frames of everything the game draws.
+        _buffer (memoryview): The mapped file.
+        _frames (dict {tuple: tuple {int, int}}): The offsets of each frame.
+    """
+    magic = b'PYIA'
+    version = 1
+    header = struct.Struct('<4sHII')
+    entry = struct.Struct('<4HII')
+
+    animations = (
+        (TANK, 1), (TANK_BULLET, 1), (TANK_EXPLOSION, 1),
+        (TANK_BULLET_EXPLOSION, 1), (SHIELD, 1), (SHIP_BULLET_EXPLOSION, 1),
+        (TYPE_ONE, 2), (TYPE_ONE_BULLET, 2), (TYPE_ONE_EXPLOSION, 1),
+        (TYPE_TWO, 2), (TYPE_TWO_BULLET, 10), (TYPE_THREE, 2),
+        (TYPE_THREE_BULLET, 7), (MYSTERY, 1), (MYSTERY_EXPLOSION, 1),
+        (BULLET_COLLISION, 1)
+    )
+
+    def __init__(self, buffer, frames):
+        self._buffer = memoryview(buffer)
+        self._frames = frames
+
+    def __contains__(self, rect):
+        return tuple(rect) in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    @classmethod
+    def checksum(cls, path):
+        """Work out the checksum of a sprite sheet, without decoding it.
+
+        Arguments:
+            path (str): The sprite sheet.
+
+        Returns:
+            int: The CRC32 of the file.
+        """
+        with open(path, 'rb') as sheet_file:
+            return zlib.crc32(sheet_file.read())
+
+    @classmethod
+    def bake(cls, sheet_path, path, animations=None):
+        """Bake the frames of a sprite sheet into an atlas file.
+
+        Arguments:
+            sheet_path (str): The sprite sheet to bake.
+            path (str): The file to write the atlas to.
+            animations (list [tuple {pygame.Rect, int}]): The first frame and
+                number of frames of each animation to bake, everything the
+                game draws if it isn't given.
+
+        Returns:
+            int: The number of frames baked.
+        """
+        sheet = pygame.image.load(sheet_path)
+        rects = []
+
+        for rect, count in cls.animations if animations is None \
+                else animations:
+            for index in range(count):
+                frame = (rect.x + (rect.width + 4) * index, rect.y,
+                         rect.width, rect.height)
+
+                if frame not in rects:
+                    rects.append(frame)
+
+        index = []
+        data = []
+        offset = cls.header.size + cls.entry.size * len(rects)
+
+        for rect in rects:
+            sprite = sheet.subsurface(rect)
+            mask = pygame.mask.from_surface(sprite)
+            pixels = pygame.image.tobytes(sprite, 'RGBA')
+            bits = numpy.packbits([mask.get_at((x, y))
+                                   for y in range(rect[3])
+                                   for x in range(rect[2])]).tobytes()
+
+            index.append(cls.entry.pack(*rect, offset, offset + len(pixels)))
+            data += [pixels, bits]
+            offset += len(pixels) + len(bits)
+
+        with open(path, 'wb') as atlas_file:
+            atlas_file.write(cls.header.pack(cls.magic, cls.version,
+                                             cls.checksum(sheet_path),
+                                             len(rects)))
+            atlas_file.write(b''.join(index))
+            atlas_file.write(b''.join(data))
+
+        return len(rects)
+
+    @classmethod
+    def load(cls, path, sheet_path):
+        """Map an atlas file into memory.
+
+        Arguments:
+            path (str): The atlas file.
+            sheet_path (str): The sprite sheet the atlas should be baked from.
+
+        Returns:
+            Atlas: The mapped atlas.
+
+        Raises:
+            IOError: If the file can't be opened.
+            ValueError: If the file isn't an atlas, its version is unknown or
+                it was baked from a different sprite sheet.
+        """
+        with open(path, 'rb') as atlas_file:
+            buffer = mmap.mmap(atlas_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(buffer) < cls.header.size or \
+                buffer[:len(cls.magic)] != cls.magic:
+            raise ValueError('{} is not an atlas'.format(path))
+
+        _, version, checksum, count = cls.header.unpack_from(buffer)
+
+        if version != cls.version:
+            raise ValueError('{} is version {} of the atlas format, not {}'
+                             .format(path, version, cls.version))
+
+        if checksum != cls.checksum(sheet_path):
+            raise ValueError('{} was baked from a different sprite sheet'
+                             .format(path))
+
+        frames = {}
+
+        for index in range(count):
+            x, y, width, height, pixels, mask = cls.entry.unpack_from(
+                buffer, cls.header.size + cls.entry.size * index)
+            frames[(x, y, width, height)] = (pixels, mask)
+
+        return cls(buffer, frames)
+
+    def sprite(self, rect):
+        """Wrap the pixels of a frame as a surface, without copying them. The
+        surface is read only, so it should be copied before being drawn on.
+
+        Arguments:
+            rect (pygame.Rect): The rect of the frame in the sprite sheet.
+
+        Returns:
+            pygame.Surface: A surface containing the frame.
+        """
+        pixels, _ = self._frames[tuple(rect)]
+
+        return pygame.image.frombuffer(
+            self._buffer[pixels:pixels + rect[2] * rect[3] * 4],
+            (rect[2], rect[3]), 'RGBA')
+
+    def mask(self, rect):
+        """Build the collision mask of a frame from its bitset.
+
+        Arguments:
+            rect (pygame.Rect): The rect of the frame in the sprite sheet.
+
+        Returns:
+            pygame.mask.Mask: The mask for the frame.
+        """
+        _, mask = self._frames[tuple(rect)]
+        size = rect[2] * rect[3]
+        bits = numpy.unpackbits(numpy.frombuffer(
+            self._buffer, numpy.uint8, (size + 7) // 8, mask))[:size]
+
+        surface = pygame.image.frombuffer(bits.tobytes(), (rect[2], rect[3]),
+                                          'P')
+        surface.set_colorkey(0)
+
+        return pygame.mask.from_surface(surface)
+
+
+def main():
+    """Parse the command line arguments and bake the atlas."""
+    parser = argparse.ArgumentParser(
+        description='Bake the sprite sheet into an atlas which is mapped into '
+                    'memory when the game starts.')
+    parser.add_argument('--sheet', default=SPRITE_SHEET,
+                        help='the sprite sheet to bake')
+    parser.add_argument('--output', default=SPRITE_ATLAS,
+                        help='the file to write the atlas to')
+    args = parser.parse_args()
+
+    print('Baked {} frames into {}'.format(
+        Atlas.bake(args.sheet, args.output), args.output))
+
+
+if __name__ == '__main__':
+    main()
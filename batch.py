@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from random import Random
+
+import numpy
+
+from config import Config
+from constants import FPS
+from main import SpaceInvaiders
+from world import World
+
+
+class RandomPolicy():
+    """A player which holds a random direction for a random amount of time
+    and fires whenever it can.
+
+    Arguments:
+        seed (int): The seed for the players random number generator.
+
+    Attributes:
+        _random (random.Random): The players random number generator.
+        _direction (int): The direction the tank is being moved.
+        _ticks_left (int): How many more ticks to keep moving this way.
+    """
+    def __init__(self, seed):
+        self._random = Random('policy:{}'.format(seed))
+        self._direction = 0
+        self._ticks_left = 0
+
+    def act(self, world):
+        """Choose what the tank should do for the next tick.
+
+        Arguments:
+            world (World): The world being played.
+
+        Returns:
+            tuple {int, bool}: The direction to move and whether to shoot.
+        """
+        if self._ticks_left <= 0:
+            self._direction = self._random.choice((-1, 0, 1))
+            self._ticks_left = self._random.randint(10, 120)
+
+        self._ticks_left -= 1
+
+        return self._direction, True
+
+
+class IdlePolicy():
+    """A player which never moves or shoots.
+
+    Arguments:
+        seed (int): Unused, so all the policies are created the same way.
+    """
+    def __init__(self, seed):
+        pass
+
+    @classmethod
+    def act(cls, world):
+        """Choose what the tank should do for the next tick.
+
+        Arguments:
+            world (World): The world being played.
+
+        Returns:
+            tuple {int, bool}: The direction to move and whether to shoot.
+        """
+        return 0, False
+
+
+class BatchRunner():
+    """Play many headless games spread across a pool of processes. Each game
+    is a task with its own seed and config, and its results are streamed
+    back to the parent as soon as it is over.
+
+    Arguments:
+        processes (int): The number of worker processes, one per core if not
+            given.
+
+    Attributes:
+        policies (dict {str: class}): The players which can play the games.
+        _processes (int): The number of worker processes.
+    """
+    policies = {'idle': IdlePolicy, 'random': RandomPolicy}
+
+    def __init__(self, processes=None):
+        self._processes = processes or multiprocessing.cpu_count()
+
+    def run(self, tasks):
+        """Play the games, yielding the results of each as it finishes. The
+        results are in the order the games finish, not the order of tasks.
+
+        Arguments:
+            tasks (list [dict]): The seed and config for each game.
+
+        Yields:
+            dict: The results of a game.
+        """
+        with multiprocessing.Pool(self._processes,
+                                  initializer=self._init_worker) as pool:
+            for result in pool.imap_unordered(self.play, tasks):
+                yield result
+
+    @classmethod
+    def _init_worker(cls):
+        """Set up the headless display once in each worker process. SDL's
+        signal handlers are turned off, otherwise they swallow the SIGTERM
+        used to stop the workers.
+        """
+        os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+        SpaceInvaiders.create_display(headless=True)
+
+    @classmethod
+    def play(cls, task):
+        """Play a single game until it is over or it runs out of ticks.
+
+        Arguments:
+            task (dict): The game's 'seed', the maximum 'ticks' to play, the
+                time step 'dt', the 'policy' to play with and optionally the
+                'config' settings to play with.
+
+        Returns:
+            dict: The ticks survived, ships killed, shots fired, statistics
+                of the time each tick took in milliseconds, which are None if
+                no ticks were played, and the 'frame_times' themselves, which
+                the summary is worked out from.
+        """
+        world = World(task['seed'], Config(**task.get('config', {})))
+        policy = cls.policies[task['policy']](task['seed'])
+        frame_times = numpy.empty(task['ticks'])
+        clock = time.perf_counter
+
+        for tick in range(task['ticks']):
+            start = clock()
+            world.update(task['dt'], *policy.act(world))
+            frame_times[tick] = clock() - start
+
+            if world.game_over:
+                break
+
+        frame_times = frame_times[:world.ticks] * 1000
+
+        return {
+            'seed': task['seed'],
+            'policy': task['policy'],
+            'ticks_survived': world.ticks,
+            'won': world.alien_horde.ship_count == 0,
+            'ships_killed': world.ships_killed,
+            'shots_fired': world.shots_fired,
+            'frame_time': cls._frame_time(frame_times),
+            'frame_times': frame_times
+        }
+
+    @classmethod
+    def summarize(cls, results, wall_seconds):
+        """Aggregate the results of many games.
+
+        Arguments:
+            results (list [dict]): The results of each game.
+            wall_seconds (float): How long it took to play all of the games.
+
+        Returns:
+            dict: The totals, means and ranges over all of the games, and the
+                statistics of the time every tick of every game took.
+        """
+        def _stats(key):
+            values = numpy.array([result[key] for result in results])
+            return {'mean': float(values.mean()), 'min': int(values.min()),
+                    'max': int(values.max())}
+
+        ticks = sum(result['ticks_survived'] for result in results)
+
+        return {
+            'games': len(results),
+            'wins': sum(result['won'] for result in results),
+            'wall_seconds': wall_seconds,
+            'games_per_second': len(results) / wall_seconds,
+            'ticks_per_second': ticks / wall_seconds,
+            'ticks_survived': _stats('ticks_survived'),
+            'ships_killed': _stats('ships_killed'),
+            'shots_fired': _stats('shots_fired'),
+            'frame_time': cls._frame_time(numpy.concatenate(
+                [result['frame_times'] for result in results]))
+        }
+
+    @classmethod
+    def _frame_time(cls, frame_times):
+        """Work out the statistics of the time ticks took.
+
+        Arguments:
+            frame_times (numpy.ndarray): The time each tick took.
+
+        Returns:
+            dict {str: float}: The mean, p50, p99 and max, which are None if
+                there are no ticks.
+        """
+        if not frame_times.size:
+            return dict.fromkeys(('mean', 'p50', 'p99', 'max'))
+
+        return {
+            'mean': float(frame_times.mean()),
+            'p50': float(numpy.percentile(frame_times, 50)),
+            'p99': float(numpy.percentile(frame_times, 99)),
+            'max': float(frame_times.max())
+        }
+
+
+def main():
+    """Parse the command line arguments and play the batch of games."""
+    parser = argparse.ArgumentParser(
+        description='Play many headless games across a pool of processes.')
+    parser.add_argument('--games', type=int, default=100,
+                        help='the number of games to play')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='the number of worker processes, defaults to '
+                             'one per core')
+    parser.add_argument('--ticks', type=int, default=FPS * 300,
+                        help='the maximum number of ticks in each game')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the first game, each game after it '
+                             'uses the next seed')
+    parser.add_argument('--dt', type=float, default=1 / FPS,
+                        help='the seconds simulated per tick')
+    parser.add_argument('--policy', choices=sorted(BatchRunner.policies),
+                        default='random', help='how the tank is played')
+    parser.add_argument('--config', default=None,
+                        help='load the size and layout of the games from this '
+                             'JSON file')
+    parser.add_argument('--summary', default=None,
+                        help='write the aggregated summary to this file')
+    args = parser.parse_args()
+
+    if args.games < 1:
+        parser.error('--games must be at least 1')
+
+    if args.ticks < 1:
+        parser.error('--ticks must be at least 1')
+
+    settings = {} if args.config is None else \
+        Config.load(args.config).settings
+    tasks = [{'seed': args.seed + game, 'ticks': args.ticks, 'dt': args.dt,
+              'policy': args.policy, 'config': settings}
+             for game in range(args.games)]
+    results = []
+
+    start = time.perf_counter()
+
+    for result in BatchRunner(args.processes).run(tasks):
+        results.append(result)
+        print(json.dumps({key: value for key, value in result.items()
+                          if key != 'frame_times'}), flush=True)
+
+    summary = BatchRunner.summarize(results, time.perf_counter() - start)
+
+    if args.summary is None:
+        json.dump(summary, sys.stderr, indent=4)
+    else:
+        with open(args.summary, 'w') as summary_file:
+            json.dump(summary, summary_file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
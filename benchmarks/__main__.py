@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from benchmarks import Benchmark
+from config import Config
+from main import SpaceInvaiders
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main():
+    """Parse the command line arguments, run the scenarios and compare them
+    with the baseline, exiting with 1 if the memory used by any of them
+    regressed. The speed is printed relative to the baseline's.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python3 -m benchmarks',
+        description='Measure the game in a set of known scenarios.')
+    parser.add_argument('scenarios', nargs='*',
+                        help='the scenarios to run, all of them if none are '
+                             'given: {}'.format(
+                                 ', '.join(sorted(Benchmark.scenarios))))
+    parser.add_argument('--ticks', type=int, default=600,
+                        help='the number of ticks to play each scenario for')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the random number generators')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='the number of times to time each scenario')
+    parser.add_argument('--config', default=None,
+                        help='load the size and layout of the worlds from '
+                             'this JSON file')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='the baseline results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='how much more memory than the baseline a '
+                             'scenario can use before it is a regression')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store the results as the new baseline instead '
+                             'of comparing them')
+    args = parser.parse_args()
+
+    for name in args.scenarios:
+        if name not in Benchmark.scenarios:
+            parser.error('unknown scenario: {}'.format(name))
+
+    config = None if args.config is None else Config.load(args.config)
+
+    SpaceInvaiders.create_display(headless=True)
+
+    baseline = {}
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    benchmark = Benchmark(args.ticks, args.seed, args.repeat, config=config)
+    results = {}
+
+    for name in args.scenarios or sorted(Benchmark.scenarios):
+        result = results[name] = benchmark.measure(Benchmark.scenarios[name])
+        relative = ''
+
+        if 'ticks_per_round' in baseline.get(name, {}):
+            relative = '{:>8.2f}x baseline'.format(
+                result['ticks_per_round'] / baseline[name]['ticks_per_round'])
+
+        print('{:<20}{:>10.0f} ticks/s{:>10.3f} ticks/round{}{:>12} bytes'
+              '{:>10.2f} blocks/tick'
+              .format(name, result['ticks_per_second'],
+                      result['ticks_per_round'], relative,
+                      result['peak_memory'], result['blocks_per_tick']),
+              flush=True)
+
+    if args.update_baseline:
+        baseline.update(results)
+
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+
+        return
+
+    regressions = Benchmark.compare(results, baseline, args.tolerance)
+
+    for regression in regressions:
+        print('regression: {}'.format(regression), file=sys.stderr)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import numpy
+import pygame
+
+from benchmarks.scenarios import (FullHorde, BulletStorm, ShieldErosion,
+                                  ExplosionFlood, LastShipSprint)
+from config import Config
+from constants import TIMESTEP
+from world import World
+
+
+class Benchmark():
+    """Measures how fast the scenarios run and how much memory they use. Each
+    scenario is played on a fresh world with the same seed, updating and
+    drawing it every tick.
+
+    The speed and the blocks left allocated are the median of a few runs,
+    and the memory is measured in a separate run under tracemalloc, which
+    would otherwise slow it down.
+
+    How many ticks a second a machine plays says more about the machine
+    than the game, so before each scenario is timed a fixed workload, which
+    doesn't touch the game's code, is timed as well, and the speed is also
+    given as the ticks played per round of it. Even so the speed is too
+    noisy to fail a run on, so it is only reported, and only the memory is
+    compared with the baseline.
+
+    Arguments:
+        ticks (int): The number of ticks to play each scenario for.
+        seed (int): The seed for the worlds random number generators.
+        repeat (int): The number of times to time each scenario.
+        seconds_elapsed (float): The time step used for every tick.
+        config (Config): The size and layout of the worlds.
+
+    Attributes:
+        scenarios (dict {str: Scenario}): The scenarios which can be run.
+        calibration_rounds (int): The number of rounds of the workload
+            timed by each calibration.
+        _ticks (int): The number of ticks to play each scenario for.
+        _seed (int): The seed for the worlds random number generators.
+        _repeat (int): The number of times to time each scenario.
+        _seconds_elapsed (float): The time step used for every tick.
+        _config (Config): The size and layout of the worlds.
+        _surface (pygame.Surface): The surface the worlds are drawn on.
+        _background (pygame.Surface): The background the worlds are drawn on.
+    """
+    scenarios = {scenario.name: scenario for scenario in (
+        FullHorde, BulletStorm, ShieldErosion, ExplosionFlood, LastShipSprint)}
+    calibration_rounds = 500
+
+    def __init__(self, ticks=600, seed=0, repeat=3, seconds_elapsed=TIMESTEP,
+                 config=None):
+        self._ticks = ticks
+        self._seed = seed
+        self._repeat = repeat
+        self._seconds_elapsed = seconds_elapsed
+        self._config = Config() if config is None else config
+        self._surface = pygame.Surface(self._config.display.size)
+        self._background = pygame.Surface(self._config.display.size)
+
+    def measure(self, scenario):
+        """Measure a scenario.
+
+        Arguments:
+            scenario (Scenario): The scenario to measure.
+
+        Returns:
+            dict: The ticks per second, the ticks played per round of the
+                calibration workload, the peak memory traced in bytes and the
+                number of memory blocks left allocated after each tick.
+        """
+        rounds_per_second = self.calibrate()
+        ticks_per_second = []
+        blocks_per_tick = []
+
+        for _ in range(self._repeat):
+            world = self._setup(scenario)
+
+            gc.collect()
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+
+            self._play(scenario, world)
+
+            elapsed = time.perf_counter() - start
+            gc.collect()
+
+            ticks_per_second.append(self._ticks / elapsed)
+            blocks_per_tick.append(
+                (sys.getallocatedblocks() - blocks) / self._ticks)
+
+        ticks_per_second = float(numpy.median(ticks_per_second))
+
+        world = self._setup(scenario)
+
+        tracemalloc.start()
+        self._play(scenario, world)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'ticks_per_second': ticks_per_second,
+            'ticks_per_round': ticks_per_second / rounds_per_second,
+            'peak_memory': peak_memory,
+            'blocks_per_tick': float(numpy.median(blocks_per_tick))
+        }
+
+    def calibrate(self):
+        """Time the calibration workload, which mixes Python, NumPy and
+        blitting much like a tick does, but never changes.
+
+        Returns:
+            float: The rounds of the workload played per second, the median
+                of as many runs as each scenario is timed for.
+        """
+        surface = pygame.Surface((256, 256))
+        image = pygame.Surface((16, 8))
+        values = numpy.random.RandomState(0).random_sample((512, 2))
+        rounds_per_second = []
+
+        for _ in range(self._repeat):
+            start = time.perf_counter()
+
+            for _ in range(self.calibration_rounds):
+                rects = [pygame.Rect(int(x * 240), int(y * 248), 16, 8)
+                         for x, y in values.tolist()]
+
+                for rect in rects:
+                    surface.blit(image, rect)
+
+                order = numpy.argsort(values[:, 0])
+                numpy.searchsorted(values[order, 0], values[:, 1])
+                sum(rect.collidelist(rects) for rect in rects[:16])
+
+            rounds_per_second.append(
+                self.calibration_rounds / (time.perf_counter() - start))
+
+        return float(numpy.median(rounds_per_second))
+
+    @classmethod
+    def compare(cls, results, baseline, tolerance):
+        """Compare the memory used by the scenarios with a baseline, which
+        doesn't depend on the machine. Scenarios missing from the baseline
+        are skipped.
+
+        Arguments:
+            results (dict {str: dict}): The results of each scenario.
+            baseline (dict {str: dict}): The baseline results.
+            tolerance (float): How much worse than the baseline a result can
+                be before it is a regression, 0.1 is 10% worse.
+
+        Returns:
+            list [str]: A description of each regression.
+        """
+        regressions = []
+
+        for name, result in sorted(results.items()):
+            if name not in baseline:
+                continue
+
+            expected = baseline[name]
+
+            if result['peak_memory'] > \
+                    expected['peak_memory'] * (1 + tolerance):
+                regressions.append('{}: {} bytes peak, baseline {}'.format(
+                    name, result['peak_memory'], expected['peak_memory']))
+
+            if result['blocks_per_tick'] > \
+                    max(expected['blocks_per_tick'], 0) * (1 + tolerance) + 1:
+                regressions.append('{}: {:.2f} blocks/tick, baseline {:.2f}'
+                                   .format(name, result['blocks_per_tick'],
+                                           expected['blocks_per_tick']))
+
+        return regressions
+
+    def _setup(self, scenario):
+        """Create a fresh world in the scenario's starting state.
+
+        Arguments:
+            scenario (Scenario): The scenario being measured.
+
+        Returns:
+            World: The world to play.
+        """
+        world = World(self._seed, self._config)
+        scenario.setup(world)
+
+        self._surface.blit(self._background, (0, 0))
+        world.clear(self._surface, self._background)
+
+        return world
+
+    def _play(self, scenario, world):
+        """Play a scenario for the number of ticks being measured.
+
+        Arguments:
+            scenario (Scenario): The scenario being measured.
+            world (World): The world to play.
+        """
+        for _ in range(self._ticks):
+            scenario.tick(world)
+            world.update(self._seconds_elapsed)
+            world.clear(self._surface, self._background)
+            world.draw(self._surface)
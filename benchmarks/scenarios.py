@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from constants import SHIELD
+from ecs import Registry
+from explosion import Explosion
+from ship_bullet import ShipBullet
+from sprite_sheet import SpriteSheet
+from tank import Tank
+from tank_bullet import TankBullet
+
+
+class Scenario():
+    """A world put into a known state, which is kept there while it is being
+    measured. Scenarios set up a fresh world, and then top it back up before
+    every tick, drawing any randomness from the world's 'benchmark' stream so
+    every run is the same. Bullets are fired from ships picked from the whole
+    horde, shot down or not, so the storms keep going after the horde is gone.
+
+    Attributes:
+        name (str): The name the scenario is run by.
+        description (str): What the scenario measures.
+    """
+    name = None
+    description = None
+
+    @classmethod
+    def setup(cls, world):
+        """Put a fresh world into the state being measured.
+
+        Arguments:
+            world (World): The world to set up.
+        """
+
+    @classmethod
+    def tick(cls, world):
+        """Keep the world in the state being measured, before each tick.
+
+        Arguments:
+            world (World): The world being measured.
+        """
+
+
+class FullHorde(Scenario):
+    """The full horde of 5x9 ships marching and shooting, with nothing
+    shooting back.
+    """
+    name = 'full_horde'
+    description = 'the full 5x9 horde marching and shooting'
+
+
+class BulletStorm(Scenario):
+    """Hundreds of ship and tank bullets in flight at once, crossing each
+    other, the shields and the horde.
+
+    Attributes:
+        count (int): The number of bullets of each kind to keep in flight.
+    """
+    name = 'bullet_storm'
+    description = 'hundreds of ship and tank bullets in flight'
+    count = 300
+
+    @classmethod
+    def tick(cls, world):
+        random = world.random['benchmark']
+        ships = sum(world.alien_horde.ships, [])
+        config = world.config
+
+        registry = world.registry
+
+        for _ in range(cls.count - registry.count(Registry.SHIP_BULLET)):
+            bullet = ShipBullet.fire(registry, random.choice(ships), config)
+            registry.place(bullet, (random.randrange(config.width),
+                                    random.randrange(config.height // 2)))
+
+        for _ in range(cls.count - registry.count(Registry.TANK_BULLET)):
+            bullet = TankBullet.fire(registry, world.tank, config)
+            registry.place(bullet, (random.randrange(config.width),
+                                    random.randrange(config.height // 2,
+                                                     config.height)))
+
+
+class ShieldErosion(Scenario):
+    """A steady rain of ship bullets onto the shields, which are repaired
+    whenever most of them has been worn away so that they never stop eroding.
+
+    Attributes:
+        count (int): The number of bullets to keep falling on the shields.
+    """
+    name = 'shield_erosion'
+    description = 'a steady rain of bullets wearing the shields away'
+    count = 40
+
+    @classmethod
+    def tick(cls, world):
+        random = world.random['benchmark']
+        ships = sum(world.alien_horde.ships, [])
+        full = SpriteSheet.mask(SHIELD).count()
+
+        registry = world.registry
+
+        for _ in range(cls.count - registry.count(Registry.SHIP_BULLET)):
+            shield = random.choice(world.shields)
+            bullet = ShipBullet.fire(registry, random.choice(ships),
+                                     world.config)
+            width, height = registry.size[bullet].tolist()
+            registry.place(bullet, (
+                random.randrange(shield.rect.left, shield.rect.right) -
+                width // 2,
+                world.config.shield_height - random.randrange(100) - height))
+
+        for shield in world.shields:
+            if shield.mask.count() < full / 4:
+                shield.image = SpriteSheet.sprite(SHIELD).copy()
+                shield.mask = SpriteSheet.mask(SHIELD).copy()
+                shield.dirty = 1
+
+
+class ExplosionFlood(Scenario):
+    """Hundreds of explosions playing at once all over the display.
+
+    Attributes:
+        count (int): The number of explosions to keep playing.
+    """
+    name = 'explosion_flood'
+    description = 'hundreds of explosions playing at once'
+    count = 200
+
+    @classmethod
+    def tick(cls, world):
+        random = world.random['benchmark']
+
+        registry = world.registry
+
+        for _ in range(cls.count - registry.count(Registry.EXPLOSION)):
+            Explosion.spawn(registry, Tank.explosion,
+                            (random.randrange(world.config.width),
+                             random.randrange(world.config.height)))
+
+
+class LastShipSprint(Scenario):
+    """A single ship left in the horde, racing across the display at its top
+    speed.
+    """
+    name = 'last_ship_sprint'
+    description = 'the last ship of the horde at its top speed'
+
+    @classmethod
+    def setup(cls, world):
+        horde = world.alien_horde
+
+        for row, ships in enumerate(horde.ships[:-1]):
+            for column, ship in enumerate(ships):
+                ship.kill()
+                horde.alive[row, column] = False
+
+        for ship in horde.ships[-1][1:]:
+            ship.kill()
+
+        horde.alive[-1, 1:] = False
@@ -18,51 +18,67 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
-
-import pygame
-
 from animation import Animation
 from constants import BULLET_COLLISION
-from entity import Entity
+from ecs import Registry
 from explosion import Explosion
-from sprite_sheet import SpriteSheet
-
+from systems import Systems
 
-class Bullet(Entity):
-    """Base bullet class which handles movement and removal of bullets.
 
-    Arguments:
-        groups (pygame.sprite.Group): All the groups this entity will be in.
+class Bullet():
+    """Handles the tank bullets and ship bullets which hit each other. The
+    bullets themselves are entities in the world's registry.
 
     Attributes:
-        dirty (int): Wether or not the sprite should be drawn.
+        explosion (Animation): The explosion when two bullets collide.
     """
-    explosion = Animation(SpriteSheet.animation(BULLET_COLLISION, 1), 0.3)
+    explosion = Animation(BULLET_COLLISION, 1, 0.3)
+
+    @classmethod
+    def collisions(cls, registry):
+        """Find the tank bullets and ship bullets which are in contact with
+        each other. Bullets only move vertically, so they are swept from left
+        to right and only pairs whose rects overlap are mask tested. Each
+        bullet is only ever paired once.
+
+        Arguments:
+            registry (Registry): The entities.
+
+        Returns:
+            list [tuple {int, int}]: The slots of the tank bullet and ship
+                bullet of each pair which collided.
+        """
+        collided = set()
+        pairs = []
 
-    def __init__(self, *groups):
-        super().__init__(*groups)
-        self.dirty = 2
-        self._collision = copy(self.explosion)
+        for tank_bullet, ship_bullet in Systems.overlapping(
+                registry, registry.indices(Registry.TANK_BULLET),
+                registry.indices(Registry.SHIP_BULLET)):
+            if tank_bullet in collided or ship_bullet in collided or \
+                    registry.overlap(registry.rect(tank_bullet),
+                                     registry.mask(tank_bullet),
+                                     ship_bullet) is None:
+                continue
 
-    def update(self, seconds_elapsed):
-        """Update the bullets position on the display."""
-        super().update(seconds_elapsed)
-        self.rect.y += int(self._seconds_elapsed * self._velocity.y)
+            collided.update((tank_bullet, ship_bullet))
+            pairs.append((tank_bullet, ship_bullet))
 
-    def take_damage(self, bullets, *groups):
-        """Check to see if there are any bullets in contact with each other.
-        If any are destroy them both and create a collision explosion.
+        return pairs
+
+    @classmethod
+    def explode(cls, registry, pairs):
+        """Destroy the pairs of bullets which collided and create a collision
+        explosion for each of them.
 
         Arguments:
-            bullets (pygame.sprite.Group): The group of bullets.
-            groups (pygame.sprite.Group): The groups the explosion will be in.
+            registry (Registry): The entities.
+            pairs (list [tuple {int, int}]): The bullets which collided.
         """
-        for bullet in bullets:
-            if bullet is not self and pygame.sprite.collide_mask(self, bullet):
-                bullet.kill()
-                self.kill()
-                Explosion(self._collision,
-                          (self.rect.x - BULLET_COLLISION.width / 2,
-                           self.rect.y - BULLET_COLLISION.height / 2),
-                          *groups)
+        for tank_bullet, ship_bullet in pairs:
+            x, y = registry.position[tank_bullet].tolist()
+
+            registry.despawn(tank_bullet)
+            registry.despawn(ship_bullet)
+            Explosion.spawn(registry, cls.explosion,
+                            (x - BULLET_COLLISION.width / 2,
+                             y - BULLET_COLLISION.height / 2))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+
+import pygame
+
+from constants import (DISPLAY, HORDE_BUFFER, HORDE_WIDTH, NUM_SHIELDS,
+                       SHIELD, SHIP_BULLET_VECOLCITY, TANK_BULLET_VECOLCITY)
+
+
+class Config():
+    """The size of the arena and the layout and pace of a game. Any setting
+    which isn't given keeps its value from the original game, so a config
+    file only needs the settings it changes, e.g.
+
+        {"width": 2400, "height": 1800, "horde_rows": 30,
+         "horde_columns": 100, "horde_spacing": 40}
+
+    Arguments:
+        settings: The value of each setting to change, by name.
+
+    Attributes:
+        defaults (dict {str: object}): The original value of each setting.
+        width (int): The width of the arena.
+        height (int): The height of the arena.
+        horde_rows (int): The number of layers in the horde.
+        horde_columns (int): The number of ships in each layer.
+        horde_types (list [int]): The type of ship in each layer, from the
+            top down. It is stretched over the layers when there are more.
+        horde_height (int): How far from the top the horde starts.
+        horde_spacing (int): The distance between the tops of the layers.
+        horde_buffer (int): The space left either side of the horde.
+        num_shields (int): The number of shields.
+        tank_speed (int): How many pixels a second the tank moves.
+        tank_reload (float): The seconds the tank takes to reload.
+        tank_bullet_speed (int): How many pixels a second tank bullets move.
+        ship_reload (float): The seconds each ship takes to reload.
+        ship_bullet_speed (int): How many pixels a second ship bullets move.
+        horde_shooting_delay (float): The seconds between volleys of shots.
+        mystery_speed (int): How many pixels a second the mystery ship moves.
+        display (pygame.Rect): The arena.
+    """
+    defaults = {
+        'width': DISPLAY.width,
+        'height': DISPLAY.height,
+        'horde_rows': 5,
+        'horde_columns': HORDE_WIDTH,
+        'horde_types': [1, 2, 2, 3, 3],
+        'horde_height': 75,
+        'horde_spacing': 50,
+        'horde_buffer': HORDE_BUFFER,
+        'num_shields': NUM_SHIELDS,
+        'tank_speed': 250,
+        'tank_reload': 0.5,
+        'tank_bullet_speed': int(-TANK_BULLET_VECOLCITY.y),
+        'ship_reload': 5,
+        'ship_bullet_speed': int(SHIP_BULLET_VECOLCITY.y),
+        'horde_shooting_delay': 0.5,
+        'mystery_speed': 250
+    }
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(self.defaults)
+
+        if unknown:
+            raise ValueError('Unknown settings: {}'.format(
+                ', '.join(sorted(unknown))))
+
+        for name, value in self.defaults.items():
+            setattr(self, name, settings.get(name, value))
+
+        self.display = pygame.Rect(0, 0, self.width, self.height)
+
+    @classmethod
+    def load(cls, path):
+        """Load a config from a JSON file.
+
+        Arguments:
+            path (str): The file to load.
+
+        Returns:
+            Config: The loaded config.
+        """
+        with open(path) as config_file:
+            return cls(**json.load(config_file))
+
+    @property
+    def settings(self):
+        """Get the value of every setting, by name."""
+        return {name: getattr(self, name) for name in self.defaults}
+
+    @property
+    def shield_height(self):
+        """Get how far from the top the shields are placed."""
+        return self.height - SHIELD.height * 2
+
+    def ship_types(self):
+        """Work out the type of ship in each layer of the horde.
+
+        Returns:
+            list [int]: The type of ship in each layer, from the top down.
+        """
+        return [self.horde_types[row * len(self.horde_types) //
+                                 self.horde_rows]
+                for row in range(self.horde_rows)]
@@ -22,11 +22,13 @@ import pygame
 
 
 SPRITE_SHEET = 'assets/images/sprite-sheet.png'
+SPRITE_ATLAS = 'assets/images/sprite-sheet.atlas'
 
 FPS = 120
+TIMESTEP = 1 / FPS
+MAX_FRAME_TIME = 0.25
 
 DISPLAY = pygame.Rect(0, 0, 700, 700)
-BACKGROUND = pygame.Rect(0, 0, 700, 700)
 
 TANK = pygame.Rect(4, 144, 52, 32)
 TANK_BULLET = pygame.Rect(4, 356, 4, 28)
@@ -36,7 +38,8 @@ TANK_BULLET_EXPLOSION = pygame.Rect(4, 484, 32, 32)
 
 NUM_SHIELDS = 4
 SHIELD = pygame.Rect(4, 180, 88, 64)
-SHIELD_HEIGHT = DISPLAY.height - (SHIELD.height * 2)
+CRATER_SIZE = 32
+NUM_CRATERS = 16
 
 SHIP_BULLET_VECOLCITY = pygame.math.Vector2(0, 500)
 SHIP_BULLET_EXPLOSION = pygame.Rect(4, 520, 32, 32)
@@ -60,3 +63,5 @@ BULLET_COLLISION = pygame.Rect(4, 520, 32, 32)
 
 HORDE_WIDTH = 9
 HORDE_BUFFER = 50
+
+PROFILER_SAMPLES = 600
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import time
+
+import pygame
+
+
+class DisplayUpdater():
+    """Pushes the areas of the display which changed to the screen. The rects
+    from drawing the sprites are coalesced first, merging those which overlap
+    or are close enough that covering the space between them is cheaper than
+    updating them separately, which folds each layer of the horde into a
+    single rect as it marches.
+
+    Updating every pixel of the display with a flip can be cheaper than
+    updating many rects, so the cost of each is measured as the game is
+    played, and whichever is expected to be cheaper is used for each frame.
+    A flip is made every so often to keep its cost up to date.
+
+    Arguments:
+        size (tuple {int, int}): The size of the display.
+
+    Attributes:
+        clock (function): The clock used to time the updates.
+        rect_cost (int): The cost of updating each rect, in pixels.
+        probe_interval (int): The most frames between measuring a flip.
+        smoothing (float): How much each measurement moves the estimates.
+        frames (int): The number of frames with something to update.
+        flips (int): The number of those frames which were flipped.
+        seconds (float): The time spent updating the display.
+        last (dict {str: int}): The number of rects and their area in pixels
+            before and after coalescing, for the last frame.
+        _display (pygame.Rect): The area of the display.
+        _pixel_cost (float): The seconds taken to update each pixel of a
+            rect, None until a rect has been updated.
+        _flip_cost (float): The seconds taken by a flip, None until the
+            display has been flipped.
+        _since_flip (int): The frames since the display was last flipped.
+        _totals (dict {str: int}): The sum of last over every frame.
+    """
+    clock = time.perf_counter
+    rect_cost = 1024
+    probe_interval = 240
+    smoothing = 0.1
+
+    def __init__(self, size):
+        self.frames = 0
+        self.flips = 0
+        self.seconds = 0.0
+        self.last = dict.fromkeys(('rects', 'area', 'merged_rects',
+                                   'merged_area'), 0)
+        self._display = pygame.Rect((0, 0), size)
+        self._pixel_cost = None
+        self._flip_cost = None
+        self._since_flip = 0
+        self._totals = dict(self.last)
+
+    @classmethod
+    def coalesce(cls, rects):
+        """Merge rects which overlap or are close together. Two rects are
+        merged when the area their union adds is less than the cost of a
+        rect, merging again until none of them can be.
+
+        The rects are swept from left to right. The union of two rects adds
+        at least the gap between them times the taller one's height, so once
+        the gap between a merged rect and the next one times its own height
+        is more than the cost of a rect, it can never be merged again and is
+        put aside. Each rect is only tested against the merged rects which
+        are still within reach.
+
+        Arguments:
+            rects (list [pygame.Rect]): The rects to merge.
+
+        Returns:
+            list [pygame.Rect]: The merged rects.
+        """
+        merged = []
+        active = []
+
+        for rect in sorted(rects, key=lambda rect: (rect.x, rect.y)):
+            rect = pygame.Rect(rect)
+
+            if active:
+                within = []
+
+                for other in active:
+                    if (rect.x - other.right) * other.h > cls.rect_cost:
+                        merged.append(other)
+                    else:
+                        within.append(other)
+
+                active = within
+
+            index = 0
+
+            while index < len(active):
+                other = active[index]
+                union = rect.union(other)
+                overlap = rect.clip(other)
+
+                if union.w * union.h - cls.rect_cost <= \
+                        rect.w * rect.h + other.w * other.h - \
+                        overlap.w * overlap.h:
+                    rect = union
+                    del active[index]
+                    index = 0
+                else:
+                    index += 1
+
+            active.append(rect)
+
+        return merged + active
+
+    @property
+    def stats(self):
+        """Get the number of frames and flips, the mean milliseconds taken
+        to update the display, and the mean number of rects and their area in
+        pixels for each frame, before and after coalescing.
+
+        Returns:
+            dict {str: float}: The update statistics.
+        """
+        stats = {'frames': self.frames, 'flips': self.flips,
+                 'present': self.seconds * 1000 / self.frames
+                 if self.frames else 0}
+
+        for name, total in self._totals.items():
+            stats[name] = total / self.frames if self.frames else 0
+
+        return stats
+
+    def update(self, rects):
+        """Push the changed areas of the display to the screen.
+
+        Arguments:
+            rects (list [pygame.Rect]): The areas of the display which
+                changed.
+        """
+        if not rects:
+            return
+
+        merged = [rect.clip(self._display) for rect in self.coalesce(rects)]
+        area = sum(rect.w * rect.h for rect in merged)
+
+        self.last['rects'] = len(rects)
+        self.last['area'] = sum(rect.w * rect.h for rect in rects)
+        self.last['merged_rects'] = len(merged)
+        self.last['merged_area'] = area
+
+        for name, value in self.last.items():
+            self._totals[name] += value
+
+        self.frames += 1
+        self._since_flip += 1
+
+        cost = area + self.rect_cost * len(merged)
+        flip = (self._flip_cost is None or
+                self._since_flip >= self.probe_interval or
+                (self._pixel_cost is not None and
+                 cost * self._pixel_cost > self._flip_cost))
+
+        start = self.clock()
+
+        if flip:
+            pygame.display.flip()
+        else:
+            pygame.display.update(merged)
+
+        elapsed = self.clock() - start
+        self.seconds += elapsed
+
+        if flip:
+            self.flips += 1
+            self._since_flip = 0
+            self._flip_cost = self._estimate(self._flip_cost, elapsed)
+        else:
+            self._pixel_cost = self._estimate(self._pixel_cost,
+                                              elapsed / cost)
+
+    def _estimate(self, estimate, measurement):
+        """Move an estimate towards a new measurement.
+
+        Arguments:
+            estimate (float): The current estimate, None if there isn't one.
+            measurement (float): The new measurement.
+
+        Returns:
+            float: The new estimate.
+        """
+        if estimate is None:
+            return measurement
+
+        return estimate + (measurement - estimate) * self.smoothing
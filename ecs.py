@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy
+import pygame
+
+from entity import Entity
+from sprite_sheet import SpriteSheet
+
+
+class EntitySprite(Entity):
+    """Draws an entity from a registry. Its image and position are copied
+    from the entity's components by Registry.sync before each draw, and it is
+    reused by whichever entity takes the slot next.
+    """
+    def __init__(self):
+        super().__init__()
+        self.image = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+    def sync(self, image, position, previous):
+        """Copy an entity's components into the sprite.
+
+        Arguments:
+            image (pygame.Surface): The entity's current animation frame.
+            position (tuple {int, int}): The entity's position.
+            previous (tuple {int, int}): The entity's position before its
+                last move, which it is drawn interpolated from.
+        """
+        if image is not self.image:
+            self.image = image
+            self.rect.size = image.get_size()
+
+            if not self.dirty:
+                self.dirty = 1
+
+        self.rect.topleft = position
+        self._previous_position = previous
+
+
+class Registry():
+    """The entities which come and go by the hundred, the bullets, the
+    explosions and the mystery ship, kept as components in typed NumPy arrays
+    with a slot for each entity. The systems update each component for every
+    entity at once, rather than calling a method on each of them.
+
+    An entity is a kind, a position and a velocity, an animation which gives
+    it its size, its collision mask and its lifetime, and the explosion it
+    leaves if it reaches the edge of the arena. Sprites are only used to draw
+    the entities, and are brought up to date by sync() before each draw, so
+    worlds which are never drawn never touch them.
+
+    Arguments:
+        config (Config): The size of the arena.
+        groups (dict {str: pygame.sprite.Group}): The world's sprite groups,
+            which the entities' sprites are added to.
+        capacity (int): The number of slots to start with, which is doubled
+            whenever they are all used.
+
+    Attributes:
+        TANK_BULLET (int): The kind of the tank's bullets.
+        SHIP_BULLET (int): The kind of the ships' bullets.
+        BULLETS (int): The kinds of every bullet.
+        EXPLOSION (int): The kind of explosions.
+        MYSTERY (int): The kind of the mystery ship.
+        kinds (tuple [int]): Every kind of entity.
+        groups (dict {str: int}): The kinds of entity in each sprite group.
+        display (pygame.Rect): The arena.
+        alive (numpy.ndarray): Whether each slot holds an entity.
+        kind (numpy.ndarray): The kind of each entity.
+        position (numpy.ndarray): The top left of each entity.
+        previous (numpy.ndarray): The top left of each entity before the
+            last move.
+        velocity (numpy.ndarray): The pixels a second each entity moves.
+        size (numpy.ndarray): The width and height of each entity.
+        animation (numpy.ndarray): The index of each entity's animation.
+        frame (numpy.ndarray): The frame of its animation each entity shows.
+        time (numpy.ndarray): The seconds since each entity was spawned.
+        last_frame (numpy.ndarray): The time each entity's frame changed.
+        explosion (numpy.ndarray): The index of the animation each entity
+            leaves when it reaches the edge of the arena, -1 for none.
+        animations (list [Animation]): The animations used by the entities.
+        delays (numpy.ndarray): The frame delay of each animation.
+        counts (numpy.ndarray): The number of frames in each animation.
+        loops (numpy.ndarray): Whether each animation loops.
+        tests (int): The number of mask tests made by the collision system.
+        skipped (int): The number of mask tests the collision system avoided.
+        hits (int): The number of entities spawned into a slot which held one
+            before, reusing its components and its sprite.
+        misses (int): The number of entities spawned into a slot which never
+            held one.
+        _animation_ids (dict {Animation: int}): The index of each animation.
+        _animation_keys (dict {tuple: int}): The index of each animation by
+            its key, so animations which play the same way share an index.
+        _groups (dict {str: pygame.sprite.Group}): The world's sprite groups.
+        _sprites (list [EntitySprite]): The sprite for each slot, None until
+            the slot is first drawn.
+        _free (list [int]): The slots which don't hold an entity.
+        _used (numpy.ndarray): Whether each slot has ever held an entity.
+        _slots (dict {int: set [int]}): The slots holding each kind of
+            entity, so that finding a few entities doesn't scan every slot.
+    """
+    TANK_BULLET = 1
+    SHIP_BULLET = 2
+    BULLETS = TANK_BULLET | SHIP_BULLET
+    EXPLOSION = 4
+    MYSTERY = 8
+    kinds = (TANK_BULLET, SHIP_BULLET, EXPLOSION, MYSTERY)
+
+    groups = {
+        'bullets': BULLETS,
+        'explosions': EXPLOSION,
+        'mystery': MYSTERY,
+        'ship_bullets': SHIP_BULLET,
+        'tank_bullets': TANK_BULLET
+    }
+
+    def __init__(self, config, groups, capacity=64):
+        self.display = config.display
+        self.alive = numpy.zeros(capacity, dtype=bool)
+        self.kind = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.position = numpy.zeros((capacity, 2), dtype=numpy.int64)
+        self.previous = numpy.zeros((capacity, 2), dtype=numpy.int64)
+        self.velocity = numpy.zeros((capacity, 2), dtype=numpy.float64)
+        self.size = numpy.zeros((capacity, 2), dtype=numpy.int64)
+        self.animation = numpy.zeros(capacity, dtype=numpy.int32)
+        self.frame = numpy.zeros(capacity, dtype=numpy.int32)
+        self.time = numpy.zeros(capacity, dtype=numpy.float64)
+        self.last_frame = numpy.zeros(capacity, dtype=numpy.float64)
+        self.explosion = numpy.full(capacity, -1, dtype=numpy.int32)
+        self.animations = []
+        self.delays = numpy.zeros(0, dtype=numpy.float64)
+        self.counts = numpy.zeros(0, dtype=numpy.int32)
+        self.loops = numpy.zeros(0, dtype=bool)
+        self.tests = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self._animation_ids = {}
+        self._animation_keys = {}
+        self._groups = groups
+        self._sprites = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._used = numpy.zeros(capacity, dtype=bool)
+        self._slots = {kind: set() for kind in self.kinds}
+
+    def __len__(self):
+        return len(self.alive)
+
+    @property
+    def stats(self):
+        """Get the number of slots, how many of them hold an entity and how
+        many are free, and how many entities reused a slot rather than
+        taking a new one. The hits and misses are kept for the life of the
+        registry, so the slots are still reused once it has been cleared.
+
+        Returns:
+            dict {str: int}: The capacity, the live entities, the free slots,
+                and the spawns which reused a slot and which didn't.
+        """
+        return {'capacity': len(self.alive), 'live': self.count(),
+                'free': len(self._free), 'hits': self.hits,
+                'misses': self.misses}
+
+    def clear(self):
+        """Despawn every entity and reset the collision counters."""
+        for index in numpy.flatnonzero(self.alive).tolist():
+            self.despawn(index)
+
+        self._free = list(range(len(self.alive) - 1, -1, -1))
+        self._slots = {kind: set() for kind in self.kinds}
+        self.tests = 0
+        self.skipped = 0
+
+    def spawn(self, kind, animation, position, velocity=(0, 0),
+              explosion=None):
+        """Create an entity in a free slot.
+
+        Arguments:
+            kind (int): The kind of entity.
+            animation (Animation): The entity's animation, which is played
+                from its first frame.
+            position (tuple {float, float}): The top left of the entity, which
+                is rounded the same way as a pygame.Rect.
+            velocity (tuple {float, float}): The pixels a second it moves.
+            explosion (Animation): The explosion the entity leaves if it
+                reaches the edge of the arena, if any.
+
+        Returns:
+            int: The entity's slot.
+        """
+        if not self._free:
+            self._grow()
+
+        index = self._free.pop()
+        self._slots[kind].add(index)
+
+        if self._used[index]:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._used[index] = True
+
+        self.alive[index] = True
+        self.kind[index] = kind
+        self.position[index] = [self._round(value) for value in position]
+        self.previous[index] = self.position[index]
+        self.velocity[index] = velocity
+        self.size[index] = animation.rect.size
+        self.animation[index] = self._animation_id(animation)
+        self.frame[index] = 0
+        self.time[index] = 0
+        self.last_frame[index] = 0
+        self.explosion[index] = -1 if explosion is None else \
+            self._animation_id(explosion)
+
+        return index
+
+    def despawn(self, index):
+        """Remove an entity, freeing its slot. Despawning an empty slot does
+        nothing.
+
+        Arguments:
+            index (int): The entity's slot.
+        """
+        if not self.alive[index]:
+            return
+
+        self.alive[index] = False
+        self._free.append(index)
+        self._slots[int(self.kind[index])].discard(index)
+
+        sprite = self._sprites[index]
+
+        if sprite is not None:
+            sprite.kill()
+
+    def place(self, index, position):
+        """Move an entity without it moving between updates.
+
+        Arguments:
+            index (int): The entity's slot.
+            position (tuple {int, int}): The new top left of the entity.
+        """
+        self.position[index] = position
+        self.previous[index] = position
+
+    def indices(self, kinds=None):
+        """Get the slots holding entities of some kinds, in slot order.
+
+        Arguments:
+            kinds (int): The kinds of entity, every kind if it isn't given.
+
+        Returns:
+            list [int]: The slots.
+        """
+        slots = [slots for kind, slots in self._slots.items()
+                 if slots and (kinds is None or kind & kinds)]
+
+        if not slots:
+            return []
+
+        if len(slots) == 1:
+            return sorted(slots[0])
+
+        return sorted(set().union(*slots))
+
+    def count(self, kinds=None):
+        """Count the entities of some kinds.
+
+        Arguments:
+            kinds (int): The kinds of entity, every kind if it isn't given.
+
+        Returns:
+            int: The number of entities.
+        """
+        return sum(len(slots) for kind, slots in self._slots.items()
+                   if kinds is None or kind & kinds)
+
+    def rect(self, index):
+        """Get the rect of an entity.
+
+        Arguments:
+            index (int): The entity's slot.
+
+        Returns:
+            pygame.Rect: A new rect covering the entity.
+        """
+        return pygame.Rect(self.position[index].tolist(),
+                           self.size[index].tolist())
+
+    def mask(self, index):
+        """Get the collision mask of an entity's current frame.
+
+        Arguments:
+            index (int): The entity's slot.
+
+        Returns:
+            pygame.mask.Mask: The shared mask for the frame.
+        """
+        return SpriteSheet.mask(self.animations[self.animation[index]].rect,
+                                int(self.frame[index]))
+
+    def overlap(self, rect, mask, index):
+        """Test whether a mask overlaps an entity, as with
+        pygame.sprite.collide_mask.
+
+        Arguments:
+            rect (pygame.Rect): Where the mask is.
+            mask (pygame.mask.Mask): The mask to test.
+            index (int): The entity's slot.
+
+        Returns:
+            tuple {int, int}: The first point where they overlap, relative to
+                the rect, or None if they don't.
+        """
+        x, y = self.position[index].tolist()
+
+        return mask.overlap(self.mask(index), (x - rect.x, y - rect.y))
+
+    def sync(self):
+        """Bring the sprites which draw the entities up to date, adding the
+        sprites of new entities to the world's groups.
+        """
+        if not self.count():
+            return
+
+        live = numpy.flatnonzero(self.alive)
+
+        for index, kind, animation, frame, position, previous in zip(
+                live.tolist(), self.kind[live].tolist(),
+                self.animation[live].tolist(), self.frame[live].tolist(),
+                self.position[live].tolist(), self.previous[live].tolist()):
+            sprite = self._sprites[index]
+
+            if sprite is None:
+                sprite = self._sprites[index] = EntitySprite()
+
+            if not sprite.alive():
+                sprite.revive(self._groups['all'], *[
+                    self._groups[name]
+                    for name, kinds in self.groups.items() if kind & kinds])
+                sprite.dirty = 1 if kind == self.EXPLOSION else 2
+
+            sprite.sync(self.animations[animation].frames[frame],
+                        tuple(position), tuple(previous))
+
+    def _animation_id(self, animation):
+        """Get the index of an animation, adding it to the animations the
+        first time one which plays the same way is used.
+
+        Arguments:
+            animation (Animation): The animation.
+
+        Returns:
+            int: The index of the animation.
+        """
+        try:
+            return self._animation_ids[animation]
+        except KeyError:
+            pass
+
+        key = animation.key
+
+        if key not in self._animation_keys:
+            self._animation_keys[key] = len(self.animations)
+            self.animations.append(animation)
+            self.delays = numpy.append(self.delays, animation.delay)
+            self.counts = numpy.append(self.counts, animation.count)
+            self.loops = numpy.append(self.loops, animation.loop)
+
+        self._animation_ids[animation] = self._animation_keys[key]
+
+        return self._animation_ids[animation]
+
+    def _grow(self):
+        """Double the number of slots."""
+        capacity = len(self.alive)
+
+        for name in ('alive', 'kind', 'position', 'previous', 'velocity',
+                     'size', 'animation', 'frame', 'time', 'last_frame'):
+            array = getattr(self, name)
+            setattr(self, name, numpy.concatenate(
+                (array, numpy.zeros_like(array))))
+
+        self.explosion = numpy.concatenate(
+            (self.explosion, numpy.full(capacity, -1, dtype=numpy.int32)))
+        self._used = numpy.concatenate(
+            (self._used, numpy.zeros(capacity, dtype=bool)))
+        self._sprites += [None] * capacity
+        self._free += range(capacity * 2 - 1, capacity - 1, -1)
+
+    @classmethod
+    def _round(cls, value):
+        """Round a coordinate half away from zero, the same as a pygame.Rect.
+
+        Arguments:
+            value (float): The coordinate.
+
+        Returns:
+            int: The rounded coordinate.
+        """
+        return int(value + (0.5 if value >= 0 else -0.5))
@@ -29,15 +29,34 @@ class Entity(pygame.sprite.DirtySprite):
         groups (pygame.sprite.Group): All the groups this entity will be in.
 
     Attributes:
+        owns_image (bool): Whether the entity draws on an image of its own,
+            rather than showing the frames shared through the sprite sheet.
         dirty (int): Wether or not the sprite should be drawn.
         _current_time (float): Time in seconds. (Used for time based actions)
         _seconds_elapsed (float): The time since the last frame was drawn.
+        _previous_position (tuple {int, int}): The position before the last
+            update, used to interpolate between updates when drawing.
+        _drawn_position (tuple {int, int}): Where the sprite was last drawn.
     """
+    owns_image = False
+
     def __init__(self, *groups):
-        super().__init__(*groups)
+        super().__init__()
         self.dirty = 1
+        self.revive(*groups)
+
+    def revive(self, *groups):
+        """Reset the entities time based variables and add it to its groups.
+        This lets a killed entity be reused without creating a new sprite.
+
+        Arguments:
+            groups (pygame.sprite.Group): The groups this entity will be in.
+        """
         self._current_time = 0
         self._seconds_elapsed = 0
+        self._previous_position = None
+        self._drawn_position = None
+        self.add(*groups)
 
     def update(self, seconds_elapsed):
         """Update the entities time based variables.
@@ -47,3 +66,45 @@ class Entity(pygame.sprite.DirtySprite):
         """
         self._current_time += seconds_elapsed
         self._seconds_elapsed = seconds_elapsed
+        self._previous_position = self.rect.topleft
+
+    def remember_position(self):
+        """Keep where the sprite is as its position before the update, so
+        that it is drawn moving from here to wherever it is moved to. This
+        is for sprites which are moved without being updated.
+        """
+        self._previous_position = self.rect.topleft
+
+    def settle(self):
+        """Forget the sprite's position before the update, so that it is
+        drawn where it is.
+        """
+        self._previous_position = None
+
+    def interpolate(self, alpha):
+        """Move the sprite to where it should be drawn between the previous
+        and the current update. The sprite is marked as dirty whenever this
+        differs from where it was last drawn.
+
+        Arguments:
+            alpha (float): How far between the two updates to draw, 0 - 1.
+
+        Returns:
+            tuple {int, int}: The sprites real position, which should be
+                restored once it has been drawn.
+        """
+        position = self.rect.topleft
+
+        if self._previous_position is not None:
+            previous_x, previous_y = self._previous_position
+            self.rect.topleft = (
+                round(previous_x + (position[0] - previous_x) * alpha),
+                round(previous_y + (position[1] - previous_y) * alpha))
+
+        if self.rect.topleft != self._drawn_position:
+            self._drawn_position = self.rect.topleft
+
+            if not self.dirty:
+                self.dirty = 1
+
+        return position
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy
+import pygame
+
+from config import Config
+from constants import SHIELD, TIMESTEP
+from ecs import Registry
+from sprite_sheet import SpriteSheet
+from world import World
+
+
+class Environment():
+    """A reinforcement learning environment which plays a World. Each step
+    takes one of the actions the user can make from the keyboard, moving the
+    tank and firing, and observes the world afterwards.
+
+    The observation is a dict holding the 'state', a vector of floats which
+    describes the tank, the horde, the bullets, the mystery ship and the
+    shields, and when asked for, the 'pixels' of the world drawn as an RGB
+    array with the shape (height, width, 3). The world is drawn straight into
+    the array's memory, so the pixels are never copied, however both of them
+    are overwritten by the next step.
+
+    Positions in the state are scaled to 0 - 1 by the size of the display,
+    and any missing bullets or mystery ship are left as -1.
+
+    Arguments:
+        seed (int): The seed for the worlds random number generators.
+        pixels (bool): Whether to draw the world for the observations.
+        max_ticks (int): End the episode after this many ticks, if given.
+        seconds_elapsed (float): The time step used for every step.
+        frame (numpy.ndarray): The array to draw the world into, one is
+            created if it isn't given.
+        config (Config): The size and layout of the world.
+
+    Attributes:
+        actions (tuple [tuple {int, bool}]): The direction to move the tank
+            and whether to shoot, for each action.
+        max_tank_bullets (int): The number of tank bullets in the state.
+        max_ship_bullets (int): The number of ship bullets in the state.
+        _world (World): The world being played.
+        _max_ticks (int): The length of an episode in ticks.
+        _seconds_elapsed (float): The time step used for every step.
+        _ships_killed (int): The ships killed when the last step was taken.
+        _tank_alive (bool): Whether the tank was alive when the last step
+            was taken.
+        _shield_pixels (int): The number of pixels in an undamaged shield.
+        _state (numpy.ndarray): The state vector observed by step.
+        _frame (numpy.ndarray): The pixels the world is drawn into.
+        _surface (pygame.Surface): A surface which shares the frames memory.
+        _background (pygame.Surface): The background the world is drawn on.
+    """
+    actions = ((0, False), (-1, False), (1, False),
+               (0, True), (-1, True), (1, True))
+
+    max_tank_bullets = 4
+    max_ship_bullets = 16
+
+    def __init__(self, seed=None, pixels=False, max_ticks=None,
+                 seconds_elapsed=TIMESTEP, frame=None, config=None):
+        self._world = World(seed, config)
+        self._max_ticks = max_ticks
+        self._seconds_elapsed = seconds_elapsed
+        self._ships_killed = 0
+        self._tank_alive = True
+        self._shield_pixels = SpriteSheet.mask(SHIELD).count()
+        self._state = numpy.empty(self.state_size, dtype=numpy.float32)
+        self._frame = None
+        self._surface = None
+        self._background = None
+
+        if pixels:
+            display = self._world.config.display
+
+            if frame is None:
+                frame = numpy.zeros((display.height, display.width, 3),
+                                    dtype=numpy.uint8)
+
+            self._frame = frame
+            self._surface = pygame.image.frombuffer(frame, display.size,
+                                                    'RGB')
+            self._background = pygame.Surface(display.size)
+
+    @property
+    def world(self):
+        """Get the world being played."""
+        return self._world
+
+    @property
+    def state_size(self):
+        """Get the length of the state vector."""
+        return (2 + self._world.alien_horde.size * 3 +
+                (self.max_tank_bullets + self.max_ship_bullets) * 2 + 2 +
+                len(self._world.shields))
+
+    def reset(self, seed=None):
+        """Start a new episode.
+
+        Arguments:
+            seed (int): Reseed the world first, if given.
+
+        Returns:
+            dict {str: numpy.ndarray}: The first observation of the episode.
+        """
+        self._world.restart(seed)
+        self._ships_killed = 0
+        self._tank_alive = True
+
+        if self._surface is not None:
+            self._surface.blit(self._background, (0, 0))
+            self._world.draw(self._surface)
+
+        return self.observe()
+
+    def save(self):
+        """Save the state of the episode, so that it can be branched from
+        here.
+
+        Returns:
+            bytes: The state of the world.
+        """
+        return self._world.save()
+
+    def restore(self, state):
+        """Carry the episode on from a state returned by save.
+
+        Arguments:
+            state (bytes): The state of the world.
+
+        Returns:
+            dict {str: numpy.ndarray}: The observation of the restored world.
+        """
+        self._world.restore(state)
+        self._ships_killed = self._world.ships_killed
+        self._tank_alive = self._world.tank.alive()
+
+        if self._surface is not None:
+            self._surface.blit(self._background, (0, 0))
+            self._world.draw(self._surface)
+
+        return self.observe()
+
+    def step(self, action):
+        """Take an action and observe what happened.
+
+        Arguments:
+            action (int): The index of the action to take in actions.
+
+        Returns:
+            tuple {dict, float, bool}: The observation after the step, the
+                reward for the step and whether the episode is over.
+        """
+        reward, done = self.advance(action)
+
+        return self.observe(), reward, done
+
+    def advance(self, action):
+        """Take an action without observing the world. The reward is the
+        number of ships shot down, less one on the step the tank was
+        destroyed.
+
+        Arguments:
+            action (int): The index of the action to take in actions.
+
+        Returns:
+            tuple {float, bool}: The reward for the step and whether the
+                episode is over.
+        """
+        self._world.update(self._seconds_elapsed, *self.actions[action])
+
+        ships_killed = self._world.ships_killed
+        reward = float(ships_killed - self._ships_killed)
+        self._ships_killed = ships_killed
+
+        tank_alive = self._world.tank.alive()
+
+        if self._tank_alive and not tank_alive:
+            reward -= 1
+
+        self._tank_alive = tank_alive
+
+        if self._surface is not None:
+            self._world.clear(self._surface, self._background)
+            self._world.draw(self._surface)
+
+        done = self._world.game_over or (self._max_ticks is not None and
+                                         self._world.ticks >= self._max_ticks)
+
+        return reward, done
+
+    def observe(self, state=None):
+        """Observe the world as it is now.
+
+        Arguments:
+            state (numpy.ndarray): The array to write the state vector into,
+                the environments own array if it isn't given.
+
+        Returns:
+            dict {str: numpy.ndarray}: The state vector, and the pixels if the
+                world is being drawn.
+        """
+        if state is None:
+            state = self._state
+
+        world = self._world
+        horde = world.alien_horde
+        display = world.config.display
+        scale = numpy.array(display.size, dtype=numpy.float32)
+
+        state.fill(-1)
+        state[0] = world.tank.rect.x / display.width
+        state[1] = world.tank.alive()
+
+        index = 2
+        state[index:index + horde.size] = horde.alive.ravel()
+        index += horde.size
+        positions = state[index:index + horde.size * 2].reshape(-1, 2)
+        positions[:] = horde.positions.reshape(-1, 2) / scale
+        index += horde.size * 2
+
+        registry = world.registry
+
+        for kind, count in ((Registry.TANK_BULLET, self.max_tank_bullets),
+                            (Registry.SHIP_BULLET, self.max_ship_bullets)):
+            bullets = registry.indices(kind)[:count]
+
+            if bullets:
+                positions = state[index:index + count * 2].reshape(-1, 2)
+                positions[:len(bullets)] = (registry.position[bullets] +
+                                            registry.size[bullets] // 2)
+                positions[:len(bullets)] /= scale
+
+            index += count * 2
+
+        for mystery in registry.indices(Registry.MYSTERY):
+            state[index] = registry.position[mystery, 0] / display.width
+            state[index + 1] = 1
+        index += 2
+
+        for shield in world.shields:
+            state[index] = shield.mask.count() / self._shield_pixels
+            index += 1
+
+        if self._frame is None:
+            return {'state': state}
+
+        return {'state': state, 'pixels': self._frame}
+
+
+class VectorEnvironment():
+    """Many environments stepped in lockstep, which take their actions and
+    return their observations, rewards and dones as batched NumPy arrays. The
+    observations are written straight into the batched arrays, and they are
+    overwritten by the next step.
+
+    An environment whose episode is over is reset as part of the step, so the
+    observation returned for it is the first of its next episode.
+
+    Arguments:
+        seeds (list [int]): The seed for each of the environments.
+        pixels (bool): Whether to draw the worlds for the observations.
+        max_ticks (int): End each episode after this many ticks, if given.
+        seconds_elapsed (float): The time step used for every step.
+        config (Config): The size and layout of the worlds.
+
+    Attributes:
+        _environments (list [Environment]): The environments being stepped.
+        _states (numpy.ndarray): The state vectors, one row per environment.
+        _frames (numpy.ndarray): The pixels, one frame per environment.
+        _rewards (numpy.ndarray): The rewards from the last step.
+        _dones (numpy.ndarray): Which episodes ended in the last step.
+    """
+    def __init__(self, seeds, pixels=False, max_ticks=None,
+                 seconds_elapsed=TIMESTEP, config=None):
+        if config is None:
+            config = Config()
+
+        self._frames = None
+
+        if pixels:
+            self._frames = numpy.zeros(
+                (len(seeds), config.height, config.width, 3),
+                dtype=numpy.uint8)
+
+        self._environments = [
+            Environment(seed, pixels, max_ticks, seconds_elapsed,
+                        None if self._frames is None else self._frames[index],
+                        config)
+            for index, seed in enumerate(seeds)]
+        self._states = numpy.empty(
+            (len(seeds), self._environments[0].state_size),
+            dtype=numpy.float32)
+        self._rewards = numpy.zeros(len(seeds), dtype=numpy.float32)
+        self._dones = numpy.zeros(len(seeds), dtype=bool)
+
+    def __len__(self):
+        return len(self._environments)
+
+    @property
+    def environments(self):
+        """Get the environments being stepped."""
+        return self._environments
+
+    def reset(self, seeds=None):
+        """Start a new episode in every environment.
+
+        Arguments:
+            seeds (list [int]): Reseed each of the worlds first, if given.
+
+        Returns:
+            dict {str: numpy.ndarray}: The first observations of the episodes.
+        """
+        for index, environment in enumerate(self._environments):
+            environment.reset(None if seeds is None else seeds[index])
+            environment.observe(self._states[index])
+
+        return self._observations()
+
+    def step(self, actions):
+        """Take an action in every environment.
+
+        Arguments:
+            actions (numpy.ndarray): The index of the action to take in each
+                of the environments.
+
+        Returns:
+            tuple {dict, numpy.ndarray, numpy.ndarray}: The observations, the
+                rewards and which episodes are over.
+        """
+        for index, (environment, action) in enumerate(
+                zip(self._environments, numpy.asarray(actions).tolist())):
+            reward, done = environment.advance(action)
+
+            if done:
+                environment.reset()
+
+            environment.observe(self._states[index])
+            self._rewards[index] = reward
+            self._dones[index] = done
+
+        return self._observations(), self._rewards, self._dones
+
+    def _observations(self):
+        """Get the batched observations.
+
+        Returns:
+            dict {str: numpy.ndarray}: The state vectors, and the pixels if
+                the worlds are being drawn.
+        """
+        if self._frames is None:
+            return {'state': self._states}
+
+        return {'state': self._states, 'pixels': self._frames}
@@ -19,7 +19,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 from alien_horde import AlienHorde
-from constants import DISPLAY, SHIELD, SHIELD_HEIGHT, NUM_SHIELDS, TANK
+from constants import SHIELD, TANK
 from shield import Shield
 from tank import Tank
 
@@ -28,10 +28,13 @@ class Factory():
     """Class which facilitates the creation of the sprites which are in the
     space invaiders game."""
     @classmethod
-    def create_shields(cls, *groups):
-        """Create the shields which block bullets.
+    def create_shields(cls, config, random, *groups):
+        """Create the shields which block bullets, spread evenly across the
+        arena.
 
         Arguments:
+            config (Config): The size of the arena and number of shields.
+            random (RandomStreams): The games random number generators.
             groups (pygame.sprite.Group): The groups the shields will be in.
 
         Returns:
@@ -39,41 +42,43 @@ class Factory():
         """
         shields = []
 
-        shield_gap = int((DISPLAY.width - NUM_SHIELDS * SHIELD.width) /
-                         (NUM_SHIELDS + 1))
-
-        start = shield_gap
-        end = DISPLAY.width - SHIELD.width
+        shield_gap = int((config.width - config.num_shields * SHIELD.width) /
+                         (config.num_shields + 1))
         step = SHIELD.width + shield_gap
 
-        for pos_x in range(start, end, step):
-            shields.append(Shield((pos_x, SHIELD_HEIGHT), *groups))
+        for shield in range(config.num_shields):
+            shields.append(Shield((shield_gap + step * shield,
+                                   config.shield_height),
+                                  random['shields'], *groups))
 
         return shields
 
     @classmethod
-    def create_tank(cls, *groups):
+    def create_tank(cls, config, *groups):
         """Create the tank that the user controls.
 
         Arguments:
+            config (Config): The size of the arena and the tanks speed.
             groups (pygame.sprite.Group): The groups the shields will be in.
 
         Returns:
             Tank: The created tank that was created.
         """
-        tank_x = DISPLAY.width / 2 - TANK.width / 2
-        tank_y = (DISPLAY.height) - TANK.height
+        tank_x = config.width / 2 - TANK.width / 2
+        tank_y = config.height - TANK.height
 
-        return Tank((tank_x, tank_y), *groups)
+        return Tank((tank_x, tank_y), config, *groups)
 
     @classmethod
-    def create_horde(cls, *groups):
+    def create_horde(cls, config, random, *groups):
         """Create the alien horde which the user fights.
 
         Arguments:
+            config (Config): The size and layout of the horde.
+            random (RandomStreams): The games random number generators.
             groups (pygame.sprite.Group): The groups the shields will be in.
 
         Returns:
             AlienHorde: The alien horde which was created.
         """
-        return AlienHorde(75, *groups)
+        return AlienHorde(config, random, *groups)
@@ -20,142 +20,653 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # pylint: disable-msg=E1121
 
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy
 import pygame
 
-from constants import FPS, DISPLAY, BACKGROUND
-from factory import Factory
+from assets import Assets
+from config import Config
+from constants import FPS, TIMESTEP, MAX_FRAME_TIME, DISPLAY
+from display_updater import DisplayUpdater
+from profiler import Profiler
+from renderer import Renderer
+from replay import Recorder, Replay
+from rewind import Rewind
+from spectator import SpectatorServer
+from sprite_sheet import SpriteSheet
+from world import World
 
 
 class SpaceInvaiders():
-    """A clone of the classic Space Invaiders game.
+    """A clone of the classic Space Invaiders game. This plays a World on the
+    display, taking the input from the keyboard.
+
+    Pressing F3 toggles an overlay showing how long each phase of the frame
+    takes. The phases are only timed while the overlay is shown, or when the
+    timings are being written to a file.
+
+    When the last few seconds of the game are kept, holding comma rewinds
+    through them a tick at a time and holding full stop scrubs forward
+    again. The game carries on from wherever it was left.
+
+    Arguments:
+        headless (bool): Run without a window using the SDL dummy driver.
+        seed (int): The seed for the games random number generators.
+        profile (str): Time every frame and write the timings to this file
+            when the game is over.
+        record (str): Record the input to the game into this replay file.
+        config (Config): The size and layout of the game, the original game's
+            if it isn't given.
+        render_thread (bool): Draw and present each frame on a thread of its
+            own while the next frame is simulated.
+        rewind (float): Keep this many seconds of the game to rewind through,
+            if given.
 
     Attributes:
+        _headless (bool): Whether the game is running without a window.
         _display (pygame.display): The main display surface.
         _background (pygame.Surface): The games background surface.
         _clock (pygame.time.Clock): The games main clock.
-        _tank (Tank): The tank the user controls.
-        _shields (list [Shield]): The shields which defend the user.
-        _alien_horde (AlienHorde): The alien horde which the user fights.
-        _entities (dict {pygame.sprite.Group}): The groups of entities.
+        _updater (DisplayUpdater): Pushes the changed areas to the screen.
+        _world (World): The state of the game being played.
+        _profile (str): The file to write the timings to.
+        _profiler (Profiler): Times each phase of the frame, if it is set.
+        _hud (bool): Whether the timings are drawn over the game.
+        _recorder (Recorder): Records the input to the game, if it is set.
+        _renderer (Renderer): Draws the frames on a thread of its own, if it
+            is set.
+        _closed (bool): Whether the window has been closed.
+        _rewind (Rewind): Keeps the last few seconds of the game, if it is
+            set.
     """
-    def __init__(self):
-        self._display = pygame.display.set_mode(DISPLAY.size)
-        self._background = pygame.Surface(BACKGROUND.size)
+    def __init__(self, headless=False, seed=None, profile=None, record=None,
+                 config=None, render_thread=False, rewind=None):
+        if config is None:
+            config = Config()
+
+        self._headless = headless
+
+        with Assets.timed('display'):
+            self._display = self.create_display(headless,
+                                                config.display.size)
+
+        self._background = pygame.Surface(config.display.size)
         self._clock = pygame.time.Clock()
-        self._tank = None
-        self._shields = None
-        self._alien_horde = None
-        self._entities = {
-            'all': pygame.sprite.LayeredDirty(),
-            'bullets': pygame.sprite.LayeredDirty(),
-            'explosions': pygame.sprite.LayeredDirty(),
-            'mystery': pygame.sprite.LayeredDirty(),
-            'shields': pygame.sprite.LayeredDirty(),
-            'ship_bullets': pygame.sprite.LayeredDirty(),
-            'ships': pygame.sprite.LayeredDirty(),
-            'tank_bullets': pygame.sprite.LayeredDirty(),
-            'tanks': pygame.sprite.LayeredDirty()
-        }
+        self._updater = DisplayUpdater(config.display.size)
+
+        with Assets.timed('world'):
+            self._world = World(seed, config)
+        self._profile = profile
+        self._profiler = None
+        self._hud = False
+        self._recorder = None
+        self._renderer = None
+        self._closed = False
+        self._rewind = None
+
+        if rewind is not None:
+            self._rewind = Rewind(rewind, TIMESTEP)
+
+        if render_thread:
+            self._renderer = Renderer(self._display, self._background,
+                                      self._updater)
+
+        if profile is not None:
+            self.profiler = Profiler()
+
+        if record is not None:
+            self._recorder = Recorder(record, self._world.random.seed,
+                                      TIMESTEP)
+
+    @classmethod
+    def create_display(cls, headless=False, size=DISPLAY.size):
+        """Set up the display and convert the sprite sheet to its pixel
+        format. There is only one display per process, however many worlds
+        are being played, so tools which only step worlds call this once.
+
+        Arguments:
+            headless (bool): Use the SDL dummy driver instead of a window.
+            size (tuple {int, int}): The size of the display.
+
+        Returns:
+            pygame.Surface: The display surface.
+        """
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+
+        display = pygame.display.set_mode(size)
+        SpriteSheet.convert()
+
+        return display
+
+    @property
+    def world(self):
+        """Get the state of the game being played."""
+        return self._world
+
+    @property
+    def rewind(self):
+        """Get the last few seconds of the game, None if they aren't kept."""
+        return self._rewind
+
+    @property
+    def profiler(self):
+        """Get the profiler timing each frame, None when not profiling."""
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        """Set the profiler used to time each frame and the world."""
+        self._profiler = profiler
+        self._world.profiler = profiler
 
     def start(self):
-        """Start playing the game."""
+        """Start playing the game. The game is updated in fixed time steps
+        however long each frame takes, and drawn interpolated between the last
+        two updates. Each frame's input and length are recorded, if the game
+        is being recorded.
+        """
+        self.restart()
+
+        accumulator = 0
+
+        while not self._closed:
+            milliseconds = self._clock.tick(FPS)
+            accumulator += min(milliseconds / 1000, MAX_FRAME_TIME)
+            updates = int(accumulator // TIMESTEP)
+            accumulator -= updates * TIMESTEP
+
+            keys = self._frame(updates, TIMESTEP, accumulator / TIMESTEP)
+
+            if self._recorder is not None:
+                self._recorder.record(keys, milliseconds)
+
+        self.quit()
+
+    async def play(self, keys=None, observers=(), frames=None):
+        """Play the game from an asyncio event loop, the same as start, so
+        that it can run alongside other games and servers. Frames are paced
+        by sleeping until the next one is due rather than by the clock, and
+        the event loop is yielded to after every tick. Closing the window
+        ends the game rather than quitting, and close should be called once
+        the game is finished with.
+
+        Arguments:
+            keys (coroutine function): Called before each frame to get the
+                keys to play it with, in the form returned by Replay.unpack.
+                The keyboard is read if it isn't given.
+            observers (list [coroutine function]): Each called with the world
+                after every tick.
+            frames (int): Stop after this many frames, if given.
+
+        Returns:
+            int: The number of frames played.
+        """
+        self.restart()
+
+        loop = asyncio.get_running_loop()
+        accumulator = 0
+        played = 0
+        last = loop.time()
+
+        while not self._closed and (frames is None or played < frames):
+            await asyncio.sleep(max(last + 1 / FPS - loop.time(), 0))
+
+            now = loop.time()
+            milliseconds = int((now - last) * 1000)
+            last = now
+
+            accumulator += min(milliseconds / 1000, MAX_FRAME_TIME)
+            updates = int(accumulator // TIMESTEP)
+            accumulator -= updates * TIMESTEP
+
+            self._handle_events()
+
+            if keys is None:
+                frame_keys = pygame.key.get_pressed()
+            else:
+                frame_keys = await keys()
+
+            for _ in range(updates):
+                self._update(TIMESTEP, frame_keys)
+
+                for observer in observers:
+                    await observer(self._world)
+
+                await asyncio.sleep(0)
+
+            self._draw(accumulator / TIMESTEP)
+
+            if self._recorder is not None:
+                self._recorder.record(frame_keys, milliseconds)
+
+            played += 1
+
+        return played
+
+    def run(self, ticks, seconds_elapsed):
+        """Play a fresh game for a fixed number of ticks as fast as possible,
+        without limiting the frame rate.
+
+        Arguments:
+            ticks (int): The number of ticks to simulate.
+            seconds_elapsed (float): The time step used for every tick.
+
+        Returns:
+            dict: The ticks simulated, the time they took, the ticks per
+                second, the number of entities left in each group and the
+                rects updated on the display.
+        """
         self.restart()
 
-        while True:
-            self._update()
+        start = time.perf_counter()
+
+        for _ in range(ticks):
+            self._frame(1, seconds_elapsed, 1)
+
+        if self._renderer is not None:
+            self._renderer.finish()
+
+        elapsed = time.perf_counter() - start
+
+        if self._profile is not None:
+            self._profiler.dump(self._profile)
+
+        return self._results({
+            'ticks': ticks,
+            'seconds': elapsed,
+            'ticks_per_second': ticks / elapsed if elapsed else float('inf'),
+            'entities': self._world.entity_counts(),
+            'collisions': {
+                'tests': self._world.registry.tests,
+                'skipped': self._world.registry.skipped
+            },
+            'registry': self._world.registry.stats,
+            'display': self._updater.stats
+        })
+
+    def replay(self, replay):
+        """Play back a recorded game in place of the keyboard. Each frame is
+        the same length as when it was recorded, so the game is updated the
+        same number of times with the same keys. The game should have been
+        created with the replay's seed.
+
+        When there is a window the replay is played at the games frame rate,
+        otherwise it is played as fast as possible.
+
+        Arguments:
+            replay (Replay): The recorded game.
+
+        Returns:
+            dict: The frames and ticks played, the time they took, the time
+                each frame took in milliseconds, which frame took longest and
+                the rects updated on the display.
+        """
+        self.restart()
+
+        accumulator = 0
+        ticks = 0
+        frame_times = numpy.zeros(max(len(replay), 1))
+
+        start = time.perf_counter()
+
+        for frame, (keys, milliseconds) in enumerate(replay):
+            if not self._headless:
+                self._clock.tick(FPS)
+
+            frame_start = time.perf_counter()
+
+            accumulator += min(milliseconds / 1000, MAX_FRAME_TIME)
+            updates = int(accumulator // replay.timestep)
+            accumulator -= updates * replay.timestep
+
+            self._frame(updates, replay.timestep,
+                        accumulator / replay.timestep, keys)
+
+            if self._closed:
+                self.quit()
+
+            ticks += updates
+            frame_times[frame] = (time.perf_counter() - frame_start) * 1000
+
+        if self._renderer is not None:
+            self._renderer.finish()
+
+        elapsed = time.perf_counter() - start
+
+        if self._profile is not None:
+            self._profiler.dump(self._profile)
+
+        return self._results({
+            'frames': len(replay),
+            'ticks': ticks,
+            'seconds': elapsed,
+            'ticks_per_second': ticks / elapsed if elapsed else float('inf'),
+            'frame_time': {
+                'p50': float(numpy.percentile(frame_times, 50)),
+                'p99': float(numpy.percentile(frame_times, 99)),
+                'max': float(frame_times.max()),
+                'worst_frame': int(frame_times.argmax())
+            },
+            'ships_killed': self._world.ships_killed,
+            'shots_fired': self._world.shots_fired,
+            'display': self._updater.stats
+        })
 
     def restart(self):
         """Reset all the games variables causing a restart."""
-        for _, sprite_group in self._entities.items():
-            sprite_group.empty()
-
-        self._tank = Factory.create_tank(self._entities['all'],
-                                         self._entities['tanks'])
-        self._shields = Factory.create_shields(self._entities['all'],
-                                               self._entities['shields'])
-        self._alien_horde = Factory.create_horde(self._entities['all'],
-                                                 self._entities['ships'])
-
-    def _update(self):
-        """Update the game by one frame."""
-        self._clear_entities()
-        self._update_entities(self._clock.tick(FPS) / 1000)
-        self._handle_input(pygame.key.get_pressed())
-        self._draw_entities(self._entities['all'].draw(self._display))
-
-    def _clear_entities(self):
-        """Clear all of the sprites on the display"""
-        self._entities['all'].clear(self._display, self._background)
-
-    def _update_entities(self, seconds_elapsed):
-        """Do any operations which will update the games state.
+        self._world.restart()
+
+        if self._rewind is not None:
+            self._rewind.record(self._world)
+
+    def snapshot(self):
+        """Save the state of the game, so that it can be carried on from
+        where it is now.
+
+        Returns:
+            bytes: The state of the game's world.
+        """
+        return self._world.save()
+
+    def restore(self, state):
+        """Put the game back into a state returned by snapshot.
 
         Arguments:
-            seconds_elapsed (float): The time in seconds since the last frame.
+            state (bytes): The state to restore.
         """
-        self._entities['all'].update(seconds_elapsed)
+        self._world.restore(state)
 
-        self._alien_horde.update(seconds_elapsed)
+    def toggle_hud(self):
+        """Show or hide the overlay of the frame timings. The frames are
+        only timed while the overlay is shown, unless they are being written
+        to a file.
+        """
+        self._hud = not self._hud
 
-        self._tank.take_damage(self._entities['ship_bullets'],
-                               self._entities['all'],
-                               self._entities['explosions'])
+        if self._hud and self._profiler is None:
+            self.profiler = Profiler()
+        elif not self._hud and self._profile is None:
+            self.profiler = None
 
-        self._alien_horde.move()
+    def close(self):
+        """Write the timings to a file if asked to, finish the recording if
+        there is one and stop the renderer if there is one.
+        """
+        if self._renderer is not None:
+            self._renderer.stop()
+            self._renderer = None
 
-        self._alien_horde.shoot(self._tank,
-                                self._entities['all'],
-                                self._entities['bullets'],
-                                self._entities['ship_bullets'])
+        if self._profile is not None:
+            self._profiler.dump(self._profile)
 
-        for sheild in self._entities['shields']:
-            sheild.take_damage(self._entities['bullets'])
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
 
-        for ship in self._entities['ships']:
-            ship.take_damage(self._entities['tank_bullets'],
-                             self._entities['all'],
-                             self._entities['explosions'])
+    def quit(self):
+        """Close the game, then quit."""
+        self.close()
 
-        for mystery in self._entities['mystery']:
-            mystery.take_damage(self._entities['tank_bullets'],
-                                self._entities['all'],
-                                self._entities['explosions'])
+        exit()
 
-        for bullet in self._entities['bullets']:
-            bullet.take_damage(self._entities['bullets'],
-                               self._entities['all'],
-                               self._entities['explosions'])
+    def _frame(self, updates, seconds_elapsed, alpha, keys=None):
+        """Handle the input, update the game and draw it. The phases of the
+        frame are timed when there is a profiler.
 
-    def _handle_input(self, keys):
-        """Handle any of the keys pressed by the user.
+        Arguments:
+            updates (int): The number of time steps to update the game by.
+            seconds_elapsed (float): The length of each time step.
+            alpha (float): How far between the last two updates to draw.
+            keys (dict {int: bool}): The keys to play the frame with, the ones
+                pressed on the keyboard if they aren't given.
+
+        Returns:
+            dict {int: bool}: The keys the frame was played with.
+        """
+        profiler = self._profiler
+
+        if profiler:
+            start = profiler.clock()
+
+        self._handle_events()
+
+        if keys is None:
+            keys = pygame.key.get_pressed()
+
+        if profiler:
+            start = profiler.lap('input', start)
+
+        for _ in range(updates):
+            self._update(seconds_elapsed, keys)
+
+        if profiler:
+            profiler.lap('update', start)
+
+        self._draw(alpha)
+
+        return keys
+
+    def _update(self, seconds_elapsed, keys):
+        """Update the game by one fixed time step, or while the rewind keys
+        are held, move back or forward through the ticks which were kept.
 
         Arguments:
+            seconds_elapsed (float): The time step to update the game by.
             keys (dict {int: bool}): The keys which are currently pressed.
         """
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                exit()
-
         if keys[pygame.K_LCTRL] and keys[pygame.K_r]:
             self.restart()
 
-        self._tank.move(keys[pygame.K_RIGHT] - keys[pygame.K_LEFT])
+        if self._rewind is not None and \
+                (keys[pygame.K_COMMA] or keys[pygame.K_PERIOD]):
+            self._rewind.seek(self._world, self._world.ticks +
+                              keys[pygame.K_PERIOD] - keys[pygame.K_COMMA])
+            return
 
-        if keys[pygame.K_UP]:
-            self._tank.shoot(self._entities['all'],
-                             self._entities['bullets'],
-                             self._entities['tank_bullets'])
+        self._world.update(seconds_elapsed,
+                           keys[pygame.K_RIGHT] - keys[pygame.K_LEFT],
+                           keys[pygame.K_UP])
 
-    @classmethod
-    def _draw_entities(cls, dirty_rects):
+        if self._rewind is not None:
+            self._rewind.record(self._world)
+
+    def _results(self, results):
+        """Add the renderer's timings and the size of the rewind buffer to
+        the results of a game, if there are either.
+
+        Arguments:
+            results (dict): The results of the game.
+
+        Returns:
+            dict: The results.
+        """
+        if self._renderer is not None:
+            results['renderer'] = self._renderer.stats
+
+        if self._rewind is not None:
+            results['rewind'] = self._rewind.stats
+
+        return results
+
+    def _draw(self, alpha):
+        """Draw the entities interpolated between the last two updates, and
+        the overlay if it is shown. The world repaints the area under the
+        overlay on the next frame, so it can be redrawn or hidden.
+
+        When there is a renderer a snapshot of the world is handed to it to
+        be drawn instead, which is timed as the 'snapshot' and the time spent
+        waiting for the renderer as 'submit'.
+
+        Arguments:
+            alpha (float): How far between the two updates to draw, 0 - 1.
+        """
+        profiler = self._profiler
+
+        if self._renderer is not None:
+            if profiler:
+                start = profiler.clock()
+
+            hud = None
+
+            if self._hud:
+                hud = pygame.Surface(self._display.get_size())
+                hud = hud.subsurface(profiler.draw(hud)).copy()
+
+            snapshot = self._world.snapshot(alpha, hud)
+
+            if profiler:
+                start = profiler.lap('snapshot', start)
+
+            self._renderer.submit(snapshot)
+
+            if profiler:
+                profiler.lap('submit', start)
+
+            return
+
+        if profiler:
+            start = profiler.clock()
+
+        self._world.clear(self._display, self._background)
+
+        if profiler:
+            start = profiler.lap('clear', start)
+
+        dirty_rects = self._world.draw(self._display, alpha)
+
+        if self._hud:
+            hud = profiler.draw(self._display)
+            self._world.repaint(hud)
+            dirty_rects.append(hud)
+
+        self._draw_entities(dirty_rects)
+
+        if profiler:
+            profiler.lap('draw', start)
+
+    def _handle_events(self):
+        """Handle the events in the event queue, toggling the overlay or
+        noting that the window was closed.
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self._closed = True
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.toggle_hud()
+
+    def _draw_entities(self, dirty_rects):
         """Redraw any of the entities which were cleared.
 
         Arguments:
             dirty_rects (list [pygame.Rect]): The rects to redraw.
         """
-        pygame.display.update(dirty_rects)
+        self._updater.update(dirty_rects)
+
+
+async def play(game, spectate=None):
+    """Play a game from an asyncio event loop, streaming it to spectators if
+    asked to.
+
+    Arguments:
+        game (SpaceInvaiders): The game to play.
+        spectate (str): The address to stream the game on, if given.
+    """
+    server = None
+    observers = []
+
+    if spectate is not None:
+        server = SpectatorServer()
+        await server.start(spectate)
+        observers.append(server.observe)
+
+    try:
+        await game.play(observers=observers)
+    finally:
+        if server is not None:
+            server.close()
+
+
+def main():
+    """Parse the command line arguments and start the game."""
+    parser = argparse.ArgumentParser(
+        description='A clone of the classic Space Invaiders game.')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without a window, as fast as possible, and '
+                             'print the results as JSON')
+    parser.add_argument('--ticks', type=int, default=10000,
+                        help='the number of ticks to run when headless')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for the random number generators')
+    parser.add_argument('--dt', type=float, default=1 / FPS,
+                        help='the seconds simulated per tick when headless')
+    parser.add_argument('--profile', default=None,
+                        help='time each phase of every frame and write the '
+                             'timings to this file as JSON')
+    parser.add_argument('--config', default=None,
+                        help='load the size and layout of the game from this '
+                             'JSON file')
+    parser.add_argument('--record', default=None,
+                        help='record the input to the game into this file')
+    parser.add_argument('--replay', default=None,
+                        help='play back a recorded game from this file, and '
+                             'print the results as JSON')
+    parser.add_argument('--render-thread', action='store_true',
+                        help='draw and present each frame on a separate '
+                             'thread while the next one is simulated')
+    parser.add_argument('--asyncio', action='store_true',
+                        help='play the game from an asyncio event loop')
+    parser.add_argument('--spectate', default=None,
+                        help='stream the game to spectators on host:port, or '
+                             'a Unix socket at this path, playing it from an '
+                             'asyncio event loop')
+    parser.add_argument('--rewind', type=float, default=None,
+                        metavar='SECONDS',
+                        help='keep this many seconds of the game to rewind '
+                             'through by holding comma and full stop')
+    parser.add_argument('--startup', action='store_true',
+                        help='print how long each part of starting up took, '
+                             'like python -X importtime')
+    args = parser.parse_args()
+
+    if args.record is not None and (args.headless or args.replay):
+        parser.error('only games played from the keyboard can be recorded')
+
+    if args.spectate is not None and (args.headless or args.replay):
+        parser.error('only games played from the keyboard can be spectated')
+
+    config = None if args.config is None else Config.load(args.config)
+    replay = None if args.replay is None else Replay.load(args.replay)
+    seed = args.seed if replay is None else replay.seed
+
+    try:
+        game = SpaceInvaiders(headless=args.headless, seed=seed,
+                              profile=args.profile, record=args.record,
+                              config=config,
+                              render_thread=args.render_thread,
+                              rewind=args.rewind)
+    except IOError as error:
+        parser.exit(1, 'Error: {}\n'.format(error))
+
+    if args.startup:
+        print(Assets.report(), file=sys.stderr)
+
+    if replay is not None:
+        print(json.dumps(game.replay(replay)))
+    elif args.headless:
+        print(json.dumps(game.run(args.ticks, args.dt)))
+    elif args.asyncio or args.spectate is not None:
+        asyncio.run(play(game, args.spectate))
+        game.close()
+    else:
+        game.start()
 
 
 if __name__ == '__main__':
-    GAME = SpaceInvaiders()
-    GAME.start()
+    main()
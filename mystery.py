@@ -18,76 +18,61 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
-
-import pygame
-
 from animation import Animation
-from constants import DISPLAY, MYSTERY, MYSTERY_EXPLOSION
-from entity import Entity
+from constants import MYSTERY, MYSTERY_EXPLOSION
+from ecs import Registry
 from explosion import Explosion
-from sprite_sheet import SpriteSheet
-
+from systems import Systems
 
-class Mystery(Entity):
-    """The mystery ship which flys accross the screen.
 
-    Arguments:
-        direction (int): The direction the ship will move across the screen.
-        groups (pygame.sprite.Group): All the groups this entity will be in.
+class Mystery():
+    """The mystery ship which flys accross the screen. It is an entity in the
+    world's registry, which is despawned once it has left the arena.
 
     Attributes:
-        ship (Ship): The default image for the ship.
+        animation (Animation): The ship's image, which never changes.
         explosion (Animation): The explosion animation.
-        dirty (int): Wether or not to draw the entity.
-        image (pygame.Surface): The sprites image.
-        rect (pygame.Rect): The rect used to place the sprite.
-        _explosion (Animation): The explosion animation.
     """
-    ship = SpriteSheet.sprite(MYSTERY)
-    explosion = Animation(SpriteSheet.animation(MYSTERY_EXPLOSION, 1), 0.3)
+    animation = Animation(MYSTERY, 1, float('inf'), loop=True)
+    explosion = Animation(MYSTERY_EXPLOSION, 1, 0.3)
 
-    def __init__(self, direction, *groups):
-        super().__init__(*groups)
-        self.dirty = 2
-        self.image = copy(self.ship).convert_alpha()
-        self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
-        self._explosion = copy(self.explosion)
+    @classmethod
+    def spawn(cls, registry, direction, config):
+        """Send the mystery ship across the arena.
 
-        self.rect.y = 0 + self.rect.height
+        Arguments:
+            registry (Registry): The entities.
+            direction (int): The direction the ship will move across the
+                screen, 1 from the left and 0 from the right.
+            config (Config): The size of the arena and the ships speed.
 
+        Returns:
+            int: The ship's slot.
+        """
         if direction:
-            self._velocity = pygame.math.Vector2(250, 0)
-            self.rect.x = 0
+            position, speed = (0, MYSTERY.height), config.mystery_speed
         else:
-            self._velocity = pygame.math.Vector2(-250, 0)
-            self.rect.x = DISPLAY.width
+            position, speed = (config.width, MYSTERY.height), \
+                -config.mystery_speed
 
-    def update(self, seconds_elapsed):
-        """Update the entities time based variables and update the sprites
-        position.
+        return registry.spawn(Registry.MYSTERY, cls.animation, position,
+                              (speed, 0))
 
-        Arguments:
-            seconds_elapsed (float): The time since the last frame was drawn.
-        """
-        super().update(seconds_elapsed)
-        self.rect.x += int(self._seconds_elapsed * self._velocity.x)
-
-        if not self.rect.colliderect(DISPLAY):
-            self.kill()
+    @classmethod
+    def take_damage(cls, registry):
+        """Destroy the mystery ships which have been hit by the tank's
+        bullets, leaving an explosion in their place.
 
-    def take_damage(self, bullets, *groups):
-        """Take any damage from the bullets on the screen. Create an explosion
-        animation when the entities died.
-
-        bullets (pygame.sprite.Group): The group containing the bullet sprites.
-        groups (pygame.sprite.Group): The groups the explosion will be in.
+        Arguments:
+            registry (Registry): The entities.
         """
-        for bullet in bullets:
-            if pygame.sprite.collide_mask(self, bullet):
-                Explosion(self._explosion,
-                          (self.rect.x + 6, self.rect.y),
-                          *groups)
-                bullet.kill()
-                self.kill()
+        for mystery in registry.indices(Registry.MYSTERY):
+            rect = registry.rect(mystery)
+
+            for bullet, _ in Systems.collide(registry, rect,
+                                             registry.mask(mystery),
+                                             Registry.TANK_BULLET):
+                Explosion.spawn(registry, cls.explosion,
+                                (rect.x + 6, rect.y))
+                registry.despawn(bullet)
+                registry.despawn(mystery)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+import time
+
+import numpy
+import pygame
+
+from constants import PROFILER_SAMPLES
+
+
+class Profiler():
+    """Times the phases of each frame, keeping the last few hundred samples
+    of each in a ring buffer. Timing is done in laps, each lap takes the time
+    the last one ended and returns the time it ends, so the code being timed
+    only has to check whether there is a profiler between each phase.
+
+    Arguments:
+        size (int): The number of samples to keep for each phase.
+
+    Attributes:
+        clock (function): The clock used to time the phases.
+        _size (int): The number of samples to keep for each phase.
+        _samples (dict {str: list [float]}): The samples for each phase.
+        _counts (dict {str: int}): The number of samples taken of each phase.
+        _font (pygame.font.Font): The font used to draw the overlay.
+    """
+    clock = time.perf_counter
+
+    def __init__(self, size=PROFILER_SAMPLES):
+        self._size = size
+        self._samples = {}
+        self._counts = {}
+        self._font = None
+
+    def lap(self, name, start):
+        """Record the time taken by a phase.
+
+        Arguments:
+            name (str): The name of the phase.
+            start (float): The time the phase started.
+
+        Returns:
+            float: The time the phase ended, which starts the next one.
+        """
+        end = self.clock()
+        self.record(name, end - start)
+
+        return end
+
+    def record(self, name, seconds):
+        """Record a sample, overwriting the oldest one if the buffer is full.
+
+        Arguments:
+            name (str): The name of the phase.
+            seconds (float): The time taken by the phase.
+        """
+        try:
+            count = self._counts[name]
+        except KeyError:
+            self._samples[name] = [0.0] * self._size
+            count = 0
+
+        self._samples[name][count % self._size] = seconds
+        self._counts[name] = count + 1
+
+    def update_sprites(self, group, *args):
+        """Update each of the sprites in a group in the same order as
+        group.update, recording the time taken by each type of sprite.
+
+        Arguments:
+            group (pygame.sprite.Group): The sprites to update.
+            args: The arguments passed to each sprite's update.
+        """
+        clock = self.clock
+        totals = {}
+
+        for sprite in group.sprites():
+            start = clock()
+            sprite.update(*args)
+            name = type(sprite).__name__
+            totals[name] = totals.get(name, 0) + clock() - start
+
+        for name, seconds in totals.items():
+            self.record('{}.update'.format(name), seconds)
+
+    def stats(self):
+        """Summarize the samples of each phase.
+
+        Returns:
+            dict {str: dict}: The number of samples taken, and the mean, p50,
+                p99 and max of the buffered samples in milliseconds.
+        """
+        stats = {}
+
+        for name, count in sorted(self._counts.items()):
+            samples = numpy.array(self._samples[name][:count]) * 1000
+
+            stats[name] = {
+                'count': count,
+                'mean': float(samples.mean()),
+                'p50': float(numpy.percentile(samples, 50)),
+                'p99': float(numpy.percentile(samples, 99)),
+                'max': float(samples.max())
+            }
+
+        return stats
+
+    def dump(self, path):
+        """Write the summary of each phase to a JSON file.
+
+        Arguments:
+            path (str): The file to write to.
+        """
+        with open(path, 'w') as stats_file:
+            json.dump(self.stats(), stats_file, indent=4)
+
+    def draw(self, surface):
+        """Draw the summary of each phase in the top left of a surface.
+
+        Arguments:
+            surface (pygame.Surface): The surface to draw on.
+
+        Returns:
+            pygame.Rect: The area of the surface which was drawn on.
+        """
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.Font(None, 18)
+
+        rows = [('ms', 'p50', 'p99', 'max')]
+        rows += [(name, '{:.2f}'.format(stats['p50']),
+                  '{:.2f}'.format(stats['p99']), '{:.2f}'.format(stats['max']))
+                 for name, stats in self.stats().items()]
+
+        line_height = self._font.get_linesize()
+        rect = pygame.Rect(0, 0, 300, line_height * len(rows))
+
+        surface.fill((0, 0, 0), rect)
+
+        for row, columns in enumerate(rows):
+            pos_y = row * line_height
+            surface.blit(self._font.render(columns[0], False,
+                                           (255, 255, 255)), (4, pos_y))
+
+            for column, text in enumerate(columns[1:]):
+                image = self._font.render(text, False, (255, 255, 255))
+                surface.blit(image, image.get_rect(
+                    topright=(180 + column * 55, pos_y)))
+
+        return rect
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from random import Random, SystemRandom
+
+
+class RandomStreams():
+    """Independent random number generators for each of the games subsystems.
+    Every stream is derived from a single seed, so the same seed and inputs
+    will always produce the same game.
+
+    Arguments:
+        seed (int): The seed the streams are derived from, a random seed is
+            chosen if one isn't given.
+
+    Attributes:
+        seed (int): The seed the streams are derived from.
+        _streams (dict {str: random.Random}): The streams created so far.
+    """
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = SystemRandom().randrange(2 ** 32)
+
+        self.seed = seed
+        self._streams = {}
+
+    def __getitem__(self, name):
+        """Get the random number generator for a subsystem, creating it the
+        first time it is asked for.
+
+        Arguments:
+            name (str): The name of the subsystem e.g. 'horde'.
+
+        Returns:
+            random.Random: The subsystems random number generator.
+        """
+        try:
+            return self._streams[name]
+        except KeyError:
+            stream = Random('{}:{}'.format(self.seed, name))
+            self._streams[name] = stream
+            return stream
+
+    def getstate(self):
+        """Get the state of every stream created so far, as with
+        random.Random.getstate.
+
+        Returns:
+            dict {str: tuple}: The state of each stream, by name.
+        """
+        return {name: stream.getstate()
+                for name, stream in self._streams.items()}
+
+    def setstate(self, seed, state):
+        """Put the streams back into a state returned by getstate. The streams
+        are changed in place, so anything holding one of them carries on with
+        the restored state. Streams missing from the state are seeded again,
+        as if they had never been used.
+
+        Arguments:
+            seed (int): The seed the streams were derived from.
+            state (dict {str: tuple}): The state of each stream, by name.
+        """
+        self.seed = seed
+
+        for name, stream in self._streams.items():
+            if name not in state:
+                stream.seed('{}:{}'.format(seed, name))
+
+        for name, stream_state in state.items():
+            self[name].setstate(stream_state)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+
+
+class Snapshot():
+    """What a world looked like after an update, which is never changed once
+    it has been taken, so it can be drawn on another thread while the world
+    carries on being updated.
+
+    Arguments:
+        tick (int): The world's tick when the snapshot was taken.
+        sprites (list [tuple {int, pygame.Surface, pygame.Rect}]): The key,
+            image and rect of each visible sprite in the order they are drawn.
+            The key identifies the sprite between snapshots.
+        previous (Snapshot): The last snapshot taken of the world, which the
+            dirty areas are worked out from, if there is one.
+        hud (pygame.Surface): The overlay drawn in the top left, if any.
+
+    Attributes:
+        tick (int): The world's tick when the snapshot was taken.
+        sprites (tuple [tuple {int, pygame.Surface, pygame.Rect}]): The key,
+            image and rect of each visible sprite in the order they are drawn.
+        dirty (list [pygame.Rect]): The areas which changed since the previous
+            snapshot, None when the whole display has to be drawn.
+        hud (pygame.Surface): The overlay drawn in the top left, if any.
+    """
+    __slots__ = ('tick', 'sprites', 'dirty', 'hud')
+
+    def __init__(self, tick, sprites, previous=None, hud=None):
+        self.tick = tick
+        self.sprites = tuple(sprites)
+        self.dirty = None
+        self.hud = hud
+
+        if previous is not None:
+            self.dirty = self._changes(previous.sprites, self.sprites)
+
+    @classmethod
+    def _changes(cls, before, after):
+        """Work out which areas changed between two snapshots. A sprite which
+        appeared, disappeared, moved or changed its image dirties the area
+        it covered before and the area it covers now.
+
+        Arguments:
+            before (tuple [tuple]): The sprites in the earlier snapshot.
+            after (tuple [tuple]): The sprites in the later snapshot.
+
+        Returns:
+            list [pygame.Rect]: The areas which changed.
+        """
+        drawn = {key: (image, rect) for key, image, rect in before}
+        dirty = []
+
+        for key, image, rect in after:
+            was = drawn.pop(key, None)
+
+            if was is None:
+                dirty.append(rect)
+            elif was[0] is not image or was[1] != rect:
+                dirty.append(was[1])
+                dirty.append(rect)
+
+        dirty.extend(rect for _, rect in drawn.values())
+
+        return dirty
+
+
+class Renderer():
+    """Draws snapshots of a world and presents them on a thread of its own,
+    so that the time spent waiting on the display overlaps the simulation of
+    the next frame instead of adding to it.
+
+    The snapshots are double buffered, one is drawn while the next is taken.
+    Submitting a snapshot only waits when the one before it hasn't been
+    started yet, which is when drawing and presenting take longer than the
+    simulation. The renderer owns the display while it is running, so
+    nothing else should draw on it, and the SDL video driver has to allow
+    the display to be updated from another thread, as the X11, Wayland,
+    Windows and dummy drivers do.
+
+    Arguments:
+        display (pygame.Surface): The surface to draw on.
+        background (pygame.Surface): The background to clear the sprites with.
+        updater (DisplayUpdater): Pushes the drawn areas to the screen.
+
+    Attributes:
+        clock (function): The clock used to time each phase.
+        frames (int): The number of snapshots drawn.
+        _display (pygame.Surface): The surface to draw on.
+        _background (pygame.Surface): The background to clear sprites with.
+        _updater (DisplayUpdater): Pushes the drawn areas to the screen.
+        _hud (pygame.Rect): Where the overlay was last drawn, if it was.
+        _pending (Snapshot): The snapshot waiting to be drawn, if any.
+        _busy (bool): Whether a snapshot is being drawn.
+        _running (bool): Whether the thread should wait for more snapshots.
+        _error (Exception): What stopped the thread, if anything did.
+        _condition (threading.Condition): Guards the snapshots and the state
+            of the thread.
+        _thread (threading.Thread): The thread drawing the snapshots.
+        _totals (dict {str: float}): The seconds spent waiting for the
+            renderer, drawing and presenting.
+    """
+    clock = time.perf_counter
+
+    def __init__(self, display, background, updater):
+        self.frames = 0
+        self._display = display
+        self._background = background
+        self._updater = updater
+        self._hud = None
+        self._pending = None
+        self._busy = False
+        self._running = True
+        self._error = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='renderer',
+                                        daemon=True)
+        self._totals = dict.fromkeys(('wait', 'draw', 'present'), 0.0)
+
+        self._thread.start()
+
+    @property
+    def stats(self):
+        """Get the number of snapshots drawn, and the mean milliseconds the
+        simulation waited for the renderer, and that drawing and presenting
+        took, for each of them.
+
+        Returns:
+            dict {str: float}: The renderer statistics.
+        """
+        stats = {'frames': self.frames}
+
+        for name, total in self._totals.items():
+            stats[name] = total * 1000 / self.frames if self.frames else 0
+
+        return stats
+
+    def submit(self, snapshot):
+        """Hand a snapshot over to be drawn, waiting for the renderer to start
+        on the one before it if it hasn't yet.
+
+        Arguments:
+            snapshot (Snapshot): The snapshot to draw.
+        """
+        start = self.clock()
+
+        with self._condition:
+            self._wait(lambda: self._pending is None)
+            self._pending = snapshot
+            self._condition.notify_all()
+
+        self._totals['wait'] += self.clock() - start
+
+    def finish(self):
+        """Wait for every snapshot which was submitted to be presented."""
+        with self._condition:
+            self._wait(lambda: self._pending is None and not self._busy)
+
+    def stop(self):
+        """Present the snapshots which were submitted and stop the thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        self._thread.join()
+
+    def _wait(self, predicate):
+        """Wait until something is true of the renderer, holding the
+        condition, raising whatever stopped the thread if it has stopped.
+
+        Arguments:
+            predicate (function): Whether to stop waiting.
+
+        Raises:
+            RuntimeError: If the thread has stopped.
+        """
+        while not predicate():
+            if not self._thread.is_alive():
+                raise RuntimeError('The renderer stopped') from self._error
+
+            self._condition.wait(0.1)
+
+    def _run(self):
+        """Draw and present each snapshot as it is submitted, until the
+        renderer is stopped.
+        """
+        try:
+            while True:
+                with self._condition:
+                    while self._pending is None and self._running:
+                        self._condition.wait()
+
+                    if self._pending is None:
+                        return
+
+                    snapshot, self._pending = self._pending, None
+                    self._busy = True
+                    self._condition.notify_all()
+
+                start = self.clock()
+                rects = self._draw(snapshot)
+                draw = self.clock()
+                self._updater.update(rects)
+
+                self._totals['draw'] += draw - start
+                self._totals['present'] += self.clock() - draw
+                self.frames += 1
+
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+        except Exception as error:
+            self._error = error
+            raise
+
+    def _draw(self, snapshot):
+        """Clear the areas of the display which changed and redraw the
+        sprites which overlap them, clipped to each area so the sprites
+        around them are left alone.
+
+        Arguments:
+            snapshot (Snapshot): The snapshot to draw.
+
+        Returns:
+            list [pygame.Rect]: The areas of the display which were drawn.
+        """
+        display = self._display
+
+        if snapshot.dirty is None:
+            rects = [display.get_rect()]
+        else:
+            rects = list(snapshot.dirty)
+
+        if self._hud is not None:
+            rects.append(self._hud)
+
+        sprite_rects = [rect for _, _, rect in snapshot.sprites]
+
+        for rect in rects:
+            display.set_clip(rect)
+            display.blit(self._background, rect, rect)
+
+            for index in rect.collidelistall(sprite_rects):
+                _, image, sprite_rect = snapshot.sprites[index]
+                display.blit(image, sprite_rect)
+
+        display.set_clip(None)
+
+        self._hud = None
+
+        if snapshot.hud is not None:
+            self._hud = display.blit(snapshot.hud, (0, 0))
+            rects.append(self._hud)
+
+        return rects
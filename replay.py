@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import struct
+from collections import defaultdict
+
+import pygame
+
+
+class Replay():
+    """A recording of the input to a game. The file starts with a header of
+    the magic bytes, the format version, the seed of the game and the fixed
+    time step it was updated by. It is followed by three bytes per frame, the
+    keys which were held packed into bits and the length of the frame in
+    milliseconds, as returned by the game's clock.
+
+    The game's updates only depend on the seed, the keys and the number of
+    updates in each frame, which is worked out from the frame lengths, so
+    playing the frames back reproduces the game exactly.
+
+    Arguments:
+        seed (int): The seed of the recorded game.
+        timestep (float): The fixed time step the game was updated by.
+        frames (list [tuple {int, int}]): The key bits and milliseconds of
+            each frame.
+
+    Attributes:
+        magic (bytes): The bytes every replay file starts with.
+        version (int): The version of the file format.
+        header (struct.Struct): The layout of the header.
+        frame (struct.Struct): The layout of each frame.
+        LEFT (int): The bit set when the left key is held.
+        RIGHT (int): The bit set when the right key is held.
+        UP (int): The bit set when the up key is held.
+        RESTART (int): The bit set when the restart keys are held.
+        REWIND (int): The bit set when the rewind key is held.
+        FORWARD (int): The bit set when the scrub forward key is held.
+        seed (int): The seed of the recorded game.
+        timestep (float): The fixed time step the game was updated by.
+        frames (list [tuple {int, int}]): The key bits and milliseconds of
+            each frame.
+    """
+    magic = b'PYIR'
+    version = 1
+    header = struct.Struct('<4sHqd')
+    frame = struct.Struct('<BH')
+
+    LEFT = 1
+    RIGHT = 2
+    UP = 4
+    RESTART = 8
+    REWIND = 16
+    FORWARD = 32
+
+    def __init__(self, seed, timestep, frames=None):
+        self.seed = seed
+        self.timestep = timestep
+        self.frames = [] if frames is None else frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        """Iterate over the frames.
+
+        Yields:
+            tuple {dict {int: bool}, int}: The keys which were held in the
+                form the game reads them, and the length of the frame.
+        """
+        for bits, milliseconds in self.frames:
+            yield self.unpack(bits), milliseconds
+
+    @classmethod
+    def load(cls, path):
+        """Load a replay from a file.
+
+        Arguments:
+            path (str): The file to load.
+
+        Returns:
+            Replay: The loaded replay.
+
+        Raises:
+            ValueError: If the file isn't a replay, or its version is unknown.
+        """
+        with open(path, 'rb') as replay_file:
+            data = replay_file.read()
+
+        if len(data) < cls.header.size or not data.startswith(cls.magic):
+            raise ValueError('{} is not a replay'.format(path))
+
+        _, version, seed, timestep = cls.header.unpack_from(data)
+
+        if version != cls.version:
+            raise ValueError('{} is version {} of the replay format, not {}'
+                             .format(path, version, cls.version))
+
+        frames = data[cls.header.size:]
+        frames = frames[:len(frames) - len(frames) % cls.frame.size]
+
+        return cls(seed, timestep, list(cls.frame.iter_unpack(frames)))
+
+    @classmethod
+    def pack(cls, keys):
+        """Pack the keys the game reads into bits.
+
+        Arguments:
+            keys (dict {int: bool}): The keys which are currently pressed.
+
+        Returns:
+            int: The key bits.
+        """
+        return ((cls.LEFT if keys[pygame.K_LEFT] else 0) |
+                (cls.RIGHT if keys[pygame.K_RIGHT] else 0) |
+                (cls.UP if keys[pygame.K_UP] else 0) |
+                (cls.RESTART if keys[pygame.K_LCTRL] and keys[pygame.K_r]
+                 else 0) |
+                (cls.REWIND if keys[pygame.K_COMMA] else 0) |
+                (cls.FORWARD if keys[pygame.K_PERIOD] else 0))
+
+    @classmethod
+    def unpack(cls, bits):
+        """Unpack key bits into the form the game reads them.
+
+        Arguments:
+            bits (int): The key bits.
+
+        Returns:
+            dict {int: bool}: Whether each key is pressed, any key which
+                wasn't recorded isn't pressed.
+        """
+        keys = defaultdict(bool)
+        keys[pygame.K_LEFT] = bool(bits & cls.LEFT)
+        keys[pygame.K_RIGHT] = bool(bits & cls.RIGHT)
+        keys[pygame.K_UP] = bool(bits & cls.UP)
+        keys[pygame.K_LCTRL] = keys[pygame.K_r] = bool(bits & cls.RESTART)
+        keys[pygame.K_COMMA] = bool(bits & cls.REWIND)
+        keys[pygame.K_PERIOD] = bool(bits & cls.FORWARD)
+
+        return keys
+
+
+class Recorder():
+    """Records the input to a game into a replay file as it is played. The
+    frames are buffered by the file and written as they fill it.
+
+    Arguments:
+        path (str): The file to record to.
+        seed (int): The seed of the game being recorded.
+        timestep (float): The fixed time step the game is updated by.
+
+    Attributes:
+        _file (file): The file being recorded to.
+    """
+    def __init__(self, path, seed, timestep):
+        self._file = open(path, 'wb')
+        self._file.write(Replay.header.pack(Replay.magic, Replay.version,
+                                            seed, timestep))
+
+    def record(self, keys, milliseconds):
+        """Record a frame.
+
+        Arguments:
+            keys (dict {int: bool}): The keys which were pressed.
+            milliseconds (int): The length of the frame.
+        """
+        self._file.write(Replay.frame.pack(Replay.pack(keys),
+                                           min(milliseconds, 0xffff)))
+
+    def close(self):
+        """Write any buffered frames and close the file."""
+        self._file.close()
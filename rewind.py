@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import math
+import struct
+from collections import deque
+
+import numpy
+
+from constants import TIMESTEP
+
+
+class Rewind():
+    """Records the state of a world after every tick for the last few
+    seconds, so that it can be rewound to any of them and scrubbed back and
+    forth.
+
+    The states are kept in segments of a keyframe, a whole state as returned
+    by World.save, followed by the ticks after it as deltas against the
+    keyframe. A delta is the state XORed with the keyframe with the runs of
+    unchanged bytes left out, so the timers which tick over are all that is
+    kept of most ticks, and the shields, by far the largest part of a state,
+    cost nothing until they are hit. The segments are held in a ring which
+    drops the oldest once it is full, so the memory used is bounded by the
+    length of the ring however long the game goes on.
+
+    Arguments:
+        seconds (float): How far back the world can be rewound.
+        timestep (float): The fixed time step the world is updated by.
+        keyframe_seconds (float): The time between keyframes.
+
+    Attributes:
+        header (struct.Struct): The layout of the start of each delta, the
+            length of the state and the number of runs of changed bytes.
+        gap (int): The number of unchanged bytes it takes to split a run,
+            below which they are kept to save starting another.
+        _segment_length (int): The number of ticks in each segment.
+        _segments (collections.deque [tuple {int, numpy.ndarray, list}]):
+            The first tick, keyframe and deltas of each segment.
+    """
+    header = struct.Struct('<II')
+    gap = 8
+
+    def __init__(self, seconds=10, timestep=TIMESTEP, keyframe_seconds=1):
+        self._segment_length = max(int(round(keyframe_seconds / timestep)), 1)
+        self._segments = deque(maxlen=math.ceil(
+            seconds / (self._segment_length * timestep)) + 1)
+
+    def __len__(self):
+        if not self._segments:
+            return 0
+
+        return self.last - self.first + 1
+
+    @property
+    def first(self):
+        """Get the earliest tick which can be rewound to, None if nothing
+        has been recorded.
+        """
+        if not self._segments:
+            return None
+
+        return self._segments[0][0]
+
+    @property
+    def last(self):
+        """Get the latest tick which was recorded, None if nothing has."""
+        if not self._segments:
+            return None
+
+        first, _, deltas = self._segments[-1]
+
+        return first + len(deltas)
+
+    @property
+    def stats(self):
+        """Get the number of ticks and keyframes held and the bytes they use.
+
+        Returns:
+            dict {str: int}: The rewind statistics.
+        """
+        return {
+            'ticks': len(self),
+            'keyframes': len(self._segments),
+            'bytes': sum(keyframe.nbytes + sum(len(delta) for delta in deltas)
+                         for _, keyframe, deltas in self._segments)
+        }
+
+    def clear(self):
+        """Forget every tick which was recorded."""
+        self._segments.clear()
+
+    def record(self, world):
+        """Record the state of a world after a tick. Any ticks recorded after
+        it are forgotten, as the world has carried on differently from an
+        earlier one, and if it doesn't follow on from the last one recorded,
+        such as after a restart, everything is.
+
+        Arguments:
+            world (World): The world to record.
+        """
+        tick = world.ticks
+        self._truncate(tick)
+
+        if self._segments and self.last != tick - 1:
+            self.clear()
+
+        state = world.save()
+
+        if not self._segments or \
+                len(self._segments[-1][2]) + 1 >= self._segment_length:
+            self._segments.append(
+                (tick, numpy.frombuffer(state, numpy.uint8), []))
+        else:
+            _, keyframe, deltas = self._segments[-1]
+            deltas.append(self._encode(state, keyframe))
+
+    def state(self, tick):
+        """Get the state of the world after a tick.
+
+        Arguments:
+            tick (int): The tick, between first and last.
+
+        Returns:
+            bytes: The world's state, as returned by World.save.
+
+        Raises:
+            IndexError: If the tick isn't held.
+        """
+        for first, keyframe, deltas in reversed(self._segments):
+            if first <= tick <= first + len(deltas):
+                if tick == first:
+                    return keyframe.tobytes()
+
+                return self._decode(deltas[tick - first - 1], keyframe)
+
+        raise IndexError('Tick {} is not held'.format(tick))
+
+    def seek(self, world, tick):
+        """Put a world back into its state after a tick, keeping the ticks
+        after it so that it can be scrubbed forward again, until the world
+        is updated and recorded from there.
+
+        Arguments:
+            world (World): The world to restore.
+            tick (int): The tick, which is clamped to those held.
+
+        Returns:
+            int: The tick the world was put back to, None if nothing has
+                been recorded.
+        """
+        if not self._segments:
+            return None
+
+        tick = min(max(tick, self.first), self.last)
+
+        if tick != world.ticks:
+            world.restore(self.state(tick))
+
+        return tick
+
+    def _truncate(self, tick):
+        """Forget every tick from one onwards.
+
+        Arguments:
+            tick (int): The first tick to forget.
+        """
+        while self._segments and self._segments[-1][0] >= tick:
+            self._segments.pop()
+
+        if self._segments:
+            first, _, deltas = self._segments[-1]
+            del deltas[max(tick - first - 1, 0):]
+
+    @classmethod
+    def _encode(cls, state, keyframe):
+        """Encode a state as its runs of bytes which differ from a keyframe,
+        XORed with it. Whatever is past the end of the keyframe is XORed with
+        nothing.
+
+        Arguments:
+            state (bytes): The state to encode.
+            keyframe (numpy.ndarray): The bytes of the keyframe.
+
+        Returns:
+            bytes: The delta.
+        """
+        changes = numpy.frombuffer(state, numpy.uint8).copy()
+        overlap = min(len(changes), len(keyframe))
+        changes[:overlap] ^= keyframe[:overlap]
+
+        changed = numpy.flatnonzero(changes)
+
+        if not changed.size:
+            return cls.header.pack(len(changes), 0)
+
+        breaks = numpy.flatnonzero(numpy.diff(changed) > cls.gap) + 1
+        starts = changed[numpy.concatenate(([0], breaks))]
+        ends = changed[numpy.concatenate((breaks - 1, [changed.size - 1]))] + 1
+
+        return b''.join((cls.header.pack(len(changes), len(starts)),
+                         starts.astype('<u4').tobytes(),
+                         ends.astype('<u4').tobytes(),
+                         changes[cls._runs(len(changes), starts, ends)]
+                         .tobytes()))
+
+    @classmethod
+    def _decode(cls, delta, keyframe):
+        """Decode a state encoded by _encode.
+
+        Arguments:
+            delta (bytes): The delta.
+            keyframe (numpy.ndarray): The bytes of the keyframe it was
+                encoded against.
+
+        Returns:
+            bytes: The state.
+        """
+        size, runs = cls.header.unpack_from(delta)
+        state = numpy.zeros(size, dtype=numpy.uint8)
+
+        if runs:
+            cls._apply(delta, runs, state)
+
+        overlap = min(size, len(keyframe))
+        state[:overlap] ^= keyframe[:overlap]
+
+        return state.tobytes()
+
+    @classmethod
+    def _apply(cls, delta, runs, state):
+        """Copy the runs of changed bytes in a delta into a state.
+
+        Arguments:
+            delta (bytes): The delta.
+            runs (int): The number of runs in the delta.
+            state (numpy.ndarray): The bytes of the state.
+        """
+        starts = numpy.frombuffer(delta, '<u4', runs, cls.header.size)
+        ends = numpy.frombuffer(delta, '<u4', runs,
+                                cls.header.size + starts.nbytes)
+        state[cls._runs(len(state), starts, ends)] = numpy.frombuffer(
+            delta, numpy.uint8, -1, cls.header.size + starts.nbytes * 2)
+
+    @classmethod
+    def _runs(cls, size, starts, ends):
+        """Mark the bytes which are in any of the runs, which never touch
+        one another.
+
+        Arguments:
+            size (int): The number of bytes.
+            starts (numpy.ndarray): The first byte of each run.
+            ends (numpy.ndarray): The byte after the last of each run.
+
+        Returns:
+            numpy.ndarray: Whether each byte is in a run.
+        """
+        edges = numpy.zeros(size + 1, dtype=bool)
+        edges[starts] = True
+        edges[ends] = True
+
+        return numpy.logical_xor.accumulate(edges[:size])
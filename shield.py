@@ -18,14 +18,16 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
-from random import randint
+from random import Random
 
+import numpy
 import pygame
 
-from constants import SHIELD
+from constants import SHIELD, CRATER_SIZE, NUM_CRATERS
+from ecs import Registry
 from entity import Entity
 from sprite_sheet import SpriteSheet
+from systems import Systems
 
 
 class Shield(Entity):
@@ -33,56 +35,140 @@ class Shield(Entity):
 
     Arguments:
         position (tuple {int, int}): The position to place the shield.
+        random (random.Random): The random number generator used for damage.
         groups (pygame.sprite.Group): All the groups this entity will be in.
 
     Attributes:
+        owns_image (bool): Shields draw their craters on their own image.
+        craters (list [tuple]): The crater stamps shared by every shield.
         image (pygame.Surface): The current image which represents the sprite.
         rect (pygame.Rect): The rect used for placing the sprite.
         mask (pygame.mask.Mask): The mast for the image.
+        _random (random.Random): The random number generator used for damage.
+        _packed (tuple {int, bytes}): The number of pixels left in the mask
+            when it was last packed, and the packed bits, if it has been.
     """
-    shield = SpriteSheet.sprite(SHIELD)
+    owns_image = True
+    craters = None
 
-    def __init__(self, position, *groups):
+    def __init__(self, position, random, *groups):
         super().__init__(*groups)
-        self.image = copy(self.shield).convert_alpha()
+        self._random = random
+        self.image = SpriteSheet.sprite(SHIELD).copy()
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = SpriteSheet.mask(SHIELD).copy()
+        self._packed = None
 
         self.rect.topleft = position
 
-    def take_damage(self, bullets):
-        """Take damage from the bullets on the display.
+    @classmethod
+    def create_craters(cls):
+        """Build the library of crater stamps the first time it is needed.
+        Each crater is a mask of the pixels to destroy, centered in a square
+        of CRATER_SIZE, and a surface which clears those pixels when blitted
+        with BLEND_RGBA_MULT.
 
-        Arguments:
-            bullets (pygame.sprite.Group): The groups which contains bullets.
+        Returns:
+            list [tuple {pygame.mask.Mask, pygame.Surface}]: The craters.
         """
-        for bullet in bullets:
-            try:
-                pos_x, pos_y = pygame.sprite.collide_mask(self, bullet)
-                bullet.kill()
-                self.dirty = 1
-            except TypeError:
-                continue
+        if cls.craters is not None:
+            return cls.craters
+
+        random = Random(0)
+        center = CRATER_SIZE // 2
+        cls.craters = []
 
-            destroy_rect = pygame.Rect((pos_x - 4, pos_y, 8, 8))
-            self.image.fill((0, 0, 0, 0), destroy_rect)
+        for _ in range(NUM_CRATERS):
+            crater = pygame.Surface((CRATER_SIZE, CRATER_SIZE),
+                                    pygame.SRCALPHA)
+            crater.fill((255, 255, 255, 255), (center - 4, center, 8, 8))
 
             for _ in range(10):
-                destroy_x = randint(pos_x - 4, pos_x + 4)
-                destroy_y = randint(pos_y - 4, pos_y + 4)
-                destroy_rect = (destroy_x - 2, destroy_y, 4, 4)
-                self.image.fill((0, 0, 0, 0), destroy_rect)
+                destroy_x = random.randint(center - 4, center + 4)
+                destroy_y = random.randint(center - 4, center + 4)
+                crater.fill((255, 255, 255, 255),
+                            (destroy_x - 2, destroy_y, 4, 4))
 
             for _ in range(20):
-                destroy_x = randint(pos_x - 8, pos_x + 8)
-                destroy_y = randint(pos_y - 8, pos_y + 8)
-                destroy_rect = (destroy_x - 1, destroy_y, 2, 2)
-                self.image.fill((0, 0, 0, 0), destroy_rect)
+                destroy_x = random.randint(center - 8, center + 8)
+                destroy_y = random.randint(center - 8, center + 8)
+                crater.fill((255, 255, 255, 255),
+                            (destroy_x - 1, destroy_y, 2, 2))
 
             for _ in range(30):
-                destroy_x = randint(pos_x - 12, pos_x + 12)
-                destroy_y = randint(pos_y - 12, pos_y + 12)
-                destroy_rect = pygame.Rect((destroy_x - 0.5, destroy_y, 1, 1))
-                self.image.fill((0, 0, 0, 0), destroy_rect)
+                destroy_x = random.randint(center - 12, center + 12)
+                destroy_y = random.randint(center - 12, center + 12)
+                crater.fill((255, 255, 255, 255), (destroy_x, destroy_y, 1, 1))
+
+            mask = pygame.mask.from_surface(crater)
+            stamp = mask.to_surface(setcolor=(0, 0, 0, 0),
+                                    unsetcolor=(255, 255, 255, 255))
+            cls.craters.append((mask, stamp))
+
+        return cls.craters
+
+    def pack(self):
+        """Pack the parts of the shield which haven't been destroyed into
+        bits, a row at a time. Damage only ever takes pixels away, so the
+        bits are packed again only once the shield has lost some.
+
+        Returns:
+            bytes: The packed bits of the shield's mask.
+        """
+        count = self.mask.count()
+
+        if self._packed is not None and self._packed[0] == count:
+            return self._packed[1]
+
+        surface = self.mask.to_surface(setcolor=(255, 255, 255, 255),
+                                       unsetcolor=(0, 0, 0, 255))
+        pixels = numpy.frombuffer(pygame.image.tobytes(surface, 'RGBA'),
+                                  numpy.uint8)
+
+        self._packed = (count, numpy.packbits(pixels[::4] != 0).tobytes())
+
+        return self._packed[1]
+
+    def unpack(self, bits):
+        """Destroy the parts of the shield which are missing from packed
+        bits, as returned by pack, redrawing its image from an undamaged one.
+
+        Arguments:
+            bits (bytes): The packed bits of the shield's mask.
+        """
+        width, height = self.rect.size
+        pixels = numpy.unpackbits(numpy.frombuffer(bits, numpy.uint8))
+        surface = pygame.image.frombuffer(
+            pixels[:width * height].tobytes(), (width, height), 'P')
+        surface.set_colorkey(0)
+
+        self.mask = pygame.mask.from_surface(surface)
+        self._packed = (self.mask.count(), bytes(bits))
+        destroyed = SpriteSheet.mask(SHIELD).copy()
+        destroyed.erase(self.mask, (0, 0))
+
+        self.image = SpriteSheet.sprite(SHIELD).copy()
+        self.image.blit(destroyed.to_surface(setcolor=(0, 0, 0, 0),
+                                             unsetcolor=(255, 255, 255, 255)),
+                        (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        self.dirty = 1
+
+    def take_damage(self, registry):
+        """Take damage from the bullets on the display. Each hit stamps one of
+        the precomputed craters onto the image and erases it from the mask,
+        so only the area around the hit is touched.
+
+        Arguments:
+            registry (Registry): The entities holding the bullets.
+        """
+        for bullet, (pos_x, pos_y) in Systems.collide(
+                registry, self.rect, self.mask, Registry.BULLETS):
+            registry.despawn(bullet)
+            self.dirty = 1
+
+            mask, stamp = self._random.choice(self.create_craters())
+            position = (pos_x - CRATER_SIZE // 2, pos_y - CRATER_SIZE // 2)
 
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask.erase(mask, position)
+            self.image.blit(stamp, position,
+                            special_flags=pygame.BLEND_RGBA_MULT)
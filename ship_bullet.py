@@ -18,86 +18,31 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
+from ecs import Registry
 
-import pygame
 
-from constants import DISPLAY, SHIP_BULLET_VECOLCITY, SHIP_BULLET_EXPLOSION
-from bullet import Bullet
-from explosion import Explosion
-
-
-class ShipBullet(Bullet):
-    """A bullet which will be fired by any of the ships.
-
-    Arguments:
-        ship (Ship): The ship that fired the bullet.
-        groups (pygame.sprite.Group): The groups the sprite will be in.
-
-    Attributes:
-        _bullet_type (int): The type of bullet this is.
-        _animation (Animation): The bullets animation looping animation.
-        _explosion (Animation): The bullets explosion animation.
-        image (pygame.Surface): The image which represents the sprite.
-        rect (pygame.Rect): The rect used to place the sprite.
-        mask (pygame.mask.Mask): The mask used for collision detection.
-        _velocity (pygame.math.Vector2): The x, y velocities for the sprite.
-        _last_frame (float): The last animation frame which was drawn.
+class ShipBullet():
+    """Bullets which are fired by any of the ships. They are entities in the
+    world's registry, which play the looping animation of the type of ship
+    that fired them and explode once they reach the bottom of the arena.
     """
-    def __init__(self, ship, *groups):
-        super().__init__(*groups)
-        self._bullet_type = ship.type
-
-        if self.type == 1:
-            self._animation = copy(ship.type_one['bullet'])
-            self._explosion = copy(ship.type_one['bullet_explosion'])
-        elif self.type == 2:
-            self._animation = copy(ship.type_two['bullet'])
-            self._explosion = copy(ship.type_two['bullet_explosion'])
-        elif self.type == 3:
-            self._animation = copy(ship.type_three['bullet'])
-            self._explosion = copy(ship.type_three['bullet_explosion'])
-
-        self.image = self._animation.next().convert_alpha()
-        self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
-        self._velocity = SHIP_BULLET_VECOLCITY
-        self._last_frame = 0
-
-        self.rect.x = ship.rect.x + ship.rect.width / 2 - self.rect.width / 2
-        self.rect.y = ship.rect.y + ship.rect.height
-
-    @property
-    def type(self):
-        """Get the type of bullet this is. This directly corrisponds to type
-        of ship which fired the bullet."""
-        return self._bullet_type
-
-    def update(self, seconds_elapsed):
-        """Update the sprites animation depending if the time is correct.
+    @classmethod
+    def fire(cls, registry, ship, config):
+        """Fire a bullet from a ship.
 
         Arguments:
-            seconds_elapsed (float): The time since the last frame was drawn.
-        """
-        super().update(seconds_elapsed)
-
-        if abs(self._last_frame - self._current_time) >= self._animation.delay:
-            self.image = self._animation.next().convert_alpha()
-            self._last_frame = self._current_time
+            registry (Registry): The entities.
+            ship (Ship): The ship that fired the bullet.
+            config (Config): The speed of the bullet.
 
-    def take_damage(self, bullets, *groups):
-        """Take any damage from other bullets and make sure that the bullet is
-        destroyed when it is no longer on the display.
-
-        Arguments:
-            bullets (pygame.sprite.Group): The group of bullets.
-            groups (pygame.sprite.Group): The groups the explosion will be in.
+        Returns:
+            int: The bullet's slot.
         """
-        super().take_damage(bullets, *groups)
-
-        if self.rect.y >= DISPLAY.height:
-            self.kill()
-            Explosion(self._explosion,
-                      (self.rect.x - SHIP_BULLET_EXPLOSION.width / 2,
-                       DISPLAY.height - SHIP_BULLET_EXPLOSION.height),
-                      *groups)
+        animation = ship.animations['bullet']
+
+        return registry.spawn(
+            Registry.SHIP_BULLET, animation,
+            (ship.rect.x + ship.rect.width / 2 - animation.rect.width / 2,
+             ship.rect.y + ship.rect.height),
+            (0, config.ship_bullet_speed),
+            ship.animations['bullet_explosion'])
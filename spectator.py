@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy
+import pygame
+
+from animation import Animation
+from config import Config
+from display_updater import DisplayUpdater
+from sprite_sheet import SpriteSheet
+from world import World
+
+
+class Scene():
+    """What a world looks like, encoded into sections of bytes which can be
+    compared between ticks, so that only the sections which changed have to
+    be sent. The sections are the tank, the horde, the bullets, explosions
+    and mystery ships in the registry, and then each of the shields.
+
+    The tank is its position and whether it is alive. The horde is the alive
+    bits of its grid, the position of every ship as 16 bit integers and the
+    animation frame of every ship as a byte. Each entity in the registry is
+    its kind, frame, the rect of its animation in the sprite sheet, the
+    number of frames and its position. Each shield is the packed bits of its
+    mask.
+
+    Attributes:
+        tank (struct.Struct): The layout of the tank's section.
+        entity (struct.Struct): The layout of each entity in the registry.
+        TANK (int): The index of the tank's section.
+        HORDE (int): The index of the horde's section.
+        ENTITIES (int): The index of the registry's section.
+        SHIELDS (int): The index of the first shield's section.
+        sections (list [bytes]): The sections as they were last captured,
+            None until a world has been captured.
+        _shields (dict {Shield: tuple {int, bytes}}): The number of pixels
+            left in each shield and its section when it was last packed.
+    """
+    tank = struct.Struct('<hhB')
+    entity = struct.Struct('<BBHHBBBhh')
+
+    TANK = 0
+    HORDE = 1
+    ENTITIES = 2
+    SHIELDS = 3
+
+    def __init__(self):
+        self.sections = None
+        self._shields = {}
+
+    def capture(self, world):
+        """Encode what a world looks like now. The shields are only packed
+        again once they have lost pixels.
+
+        Arguments:
+            world (World): The world to capture.
+
+        Returns:
+            list [bytes]: The sections.
+        """
+        tank = world.tank
+        horde = world.alien_horde
+        registry = world.registry
+
+        sections = [self.tank.pack(tank.rect.x, tank.rect.y, tank.alive())]
+
+        sections.append(numpy.packbits(horde.alive).tobytes() +
+                        horde.positions.astype('<i2').tobytes() +
+                        horde.frames.astype(numpy.uint8).tobytes())
+
+        entities = []
+        indices = registry.indices()
+
+        for kind, animation, frame, (x, y) in zip(
+                registry.kind[indices].tolist(),
+                registry.animation[indices].tolist(),
+                registry.frame[indices].tolist(),
+                registry.position[indices].tolist()):
+            animation = registry.animations[animation]
+            entities.append(self.entity.pack(kind, frame, *animation.rect,
+                                             animation.count, x, y))
+
+        sections.append(b''.join(entities))
+
+        shields = {}
+
+        for shield in world.shields:
+            count = shield.mask.count()
+            packed = self._shields.get(shield)
+
+            if packed is None or packed[0] != count:
+                packed = (count, shield.pack())
+
+            shields[shield] = packed
+            sections.append(packed[1])
+
+        self._shields = shields
+        self.sections = sections
+
+        return sections
+
+    @classmethod
+    def apply(cls, world, index, section, animations):
+        """Make a world look like a section of another one, moving, killing
+        and reviving its sprites and spawning the entities in its registry.
+
+        Arguments:
+            world (World): The world to change.
+            index (int): The index of the section.
+            section (bytes): The section.
+            animations (dict {tuple: Animation}): The animations of the
+                entities, by their rect and number of frames, which are added
+                to as new ones are seen.
+        """
+        if index == cls.TANK:
+            x, y, alive = cls.tank.unpack(section)
+            cls._show(world.tank, (x, y), alive, world.entities['all'],
+                      world.entities['tanks'])
+        elif index == cls.HORDE:
+            cls._apply_horde(world, section)
+        elif index == cls.ENTITIES:
+            registry = world.registry
+            registry.clear()
+
+            for kind, frame, *rect, count, x, y in cls.entity.iter_unpack(
+                    section):
+                key = (tuple(rect), count)
+
+                if key not in animations:
+                    animations[key] = Animation(pygame.Rect(rect), count, 0)
+
+                entity = registry.spawn(kind, animations[key], (x, y))
+                registry.frame[entity] = frame
+        else:
+            world.shields[index - cls.SHIELDS].unpack(section)
+
+    @classmethod
+    def _apply_horde(cls, world, section):
+        """Make the horde of a world look like a section of another one.
+
+        Arguments:
+            world (World): The world to change.
+            section (bytes): The horde's section.
+        """
+        horde = world.alien_horde
+        size = horde.size
+        bits = (size + 7) // 8
+        data = numpy.frombuffer(section, numpy.uint8)
+
+        horde.alive[:] = numpy.unpackbits(data[:bits])[:size].reshape(
+            horde.alive.shape)
+        horde.positions[:] = numpy.frombuffer(
+            section, '<i2', size * 2, bits).reshape(horde.positions.shape)
+        horde.frames[:] = data[bits + size * 4:].reshape(horde.frames.shape)
+        ships = [ship for row in horde.ships for ship in row]
+
+        for ship, alive, position, frame in zip(
+                ships, horde.alive.ravel().tolist(),
+                horde.positions.reshape(-1, 2).tolist(),
+                horde.frames.ravel().tolist()):
+            if ship.frame != frame:
+                ship.show(frame)
+
+            cls._show(ship, position, alive, world.entities['all'],
+                      world.entities['ships'])
+
+    @classmethod
+    def _show(cls, sprite, position, alive, *groups):
+        """Move a sprite, and kill or revive it.
+
+        Arguments:
+            sprite (Entity): The sprite.
+            position (tuple {int, int}): Where the sprite should be.
+            alive (bool): Whether the sprite should be alive.
+            groups (pygame.sprite.Group): The groups the sprite belongs in.
+        """
+        if tuple(sprite.rect.topleft) != tuple(position):
+            sprite.rect.topleft = position
+            sprite.dirty = 1
+
+        if alive and not sprite.alive():
+            sprite.add(*groups)
+            sprite.dirty = 1
+        elif not alive and sprite.alive():
+            sprite.kill()
+
+
+class SpectatorServer():
+    """Streams what a game looks like to viewers over TCP or a Unix socket.
+    Every viewer is sent a keyframe of the whole scene when it connects, and
+    then a delta after every tick with only the sections of the scene which
+    changed. Each section in a delta is either sent as it is, or as the XOR
+    with its last value compressed with zlib, whichever is smaller.
+
+    The scene is encoded once a tick, however many viewers there are, and
+    the same bytes are sent to all of them. A viewer which falls behind is
+    skipped until it has caught up, and is then sent a new keyframe.
+
+    A connection starts with the header, the magic bytes and the version of
+    the format. It is followed by messages, each of which is its type, the
+    tick and the length of its payload. A keyframe's payload is the game's
+    config as JSON, then every section, each preceded by its length. A
+    delta's payload is the number of sections which changed, then each of
+    them preceded by its index, how it was encoded and its length.
+
+    Arguments:
+        limit (int): The bytes which can be waiting to be sent to a viewer
+            before it is skipped.
+
+    Attributes:
+        magic (bytes): The bytes every stream starts with.
+        version (int): The version of the format.
+        header (struct.Struct): The layout of the header.
+        message (struct.Struct): The layout of the start of each message.
+        keyframe (struct.Struct): The layout of the start of a keyframe's
+            config and of each of its sections.
+        delta (struct.Struct): The layout of the start of each section in a
+            delta.
+        count (struct.Struct): The layout of the number of sections.
+        KEYFRAME (bytes): The type of a keyframe message.
+        DELTA (bytes): The type of a delta message.
+        RAW (int): A section sent as it is.
+        XOR (int): A section sent as the XOR with its last value, compressed.
+        sent (int): The number of bytes sent to the viewers.
+        _limit (int): The bytes which can be waiting to be sent to a viewer.
+        _scene (Scene): The scene as of the last tick.
+        _viewers (dict {asyncio.StreamWriter: bool}): The connected viewers,
+            and whether each one needs a keyframe.
+        _server (asyncio.AbstractServer): The server viewers connect to.
+    """
+    magic = b'PYIS'
+    version = 2
+    header = struct.Struct('<4sH')
+    message = struct.Struct('<cII')
+    keyframe = struct.Struct('<I')
+    delta = struct.Struct('<HBI')
+    count = struct.Struct('<H')
+
+    KEYFRAME = b'K'
+    DELTA = b'D'
+
+    RAW = 0
+    XOR = 1
+
+    def __init__(self, limit=2 ** 20):
+        self.sent = 0
+        self._limit = limit
+        self._scene = Scene()
+        self._viewers = {}
+        self._server = None
+
+    @property
+    def viewers(self):
+        """Get the number of connected viewers."""
+        return len(self._viewers)
+
+    @classmethod
+    async def listen(cls, address, callback):
+        """Start a server on an address.
+
+        Arguments:
+            address (str): host:port for TCP, otherwise the path of a Unix
+                socket.
+            callback (coroutine function): Called with the reader and writer
+                of each connection.
+
+        Returns:
+            asyncio.AbstractServer: The server.
+        """
+        host, _, port = address.rpartition(':')
+
+        if host and port.isdigit():
+            return await asyncio.start_server(callback, host, int(port))
+
+        if os.path.exists(address):
+            os.unlink(address)
+
+        return await asyncio.start_unix_server(callback, address)
+
+    @classmethod
+    async def connect(cls, address):
+        """Connect to a server on an address.
+
+        Arguments:
+            address (str): host:port for TCP, otherwise the path of a Unix
+                socket.
+
+        Returns:
+            tuple {asyncio.StreamReader, asyncio.StreamWriter}: The
+                connection.
+        """
+        host, _, port = address.rpartition(':')
+
+        if host and port.isdigit():
+            return await asyncio.open_connection(host, int(port))
+
+        return await asyncio.open_unix_connection(address)
+
+    async def start(self, address):
+        """Start accepting viewers.
+
+        Arguments:
+            address (str): host:port for TCP, otherwise the path of a Unix
+                socket.
+        """
+        self._server = await self.listen(address, self._connected)
+
+    def close(self):
+        """Stop accepting viewers and disconnect them."""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+        for writer in self._viewers:
+            writer.close()
+
+        self._viewers.clear()
+
+    async def observe(self, world):
+        """Send the scene to the viewers after a tick, which should be called
+        after every tick the game is updated, e.g. as an observer of
+        SpaceInvaiders.play.
+
+        Arguments:
+            world (World): The world being played.
+        """
+        if not self._viewers:
+            self._scene.sections = None
+            return
+
+        previous = self._scene.sections
+        sections = self._scene.capture(world)
+        keyframe = delta = None
+
+        for writer, needs_keyframe in list(self._viewers.items()):
+            if writer.is_closing():
+                continue
+
+            if writer.transport.get_write_buffer_size() > self._limit:
+                self._viewers[writer] = True
+                continue
+
+            if needs_keyframe or previous is None:
+                if keyframe is None:
+                    keyframe = self._encode_keyframe(world, sections)
+
+                message = keyframe
+            else:
+                if delta is None:
+                    delta = self._encode_delta(world.ticks, previous,
+                                               sections)
+
+                message = delta
+
+            writer.write(message)
+            self.sent += len(message)
+            self._viewers[writer] = False
+
+    async def _connected(self, reader, writer):
+        """Stream to a viewer until it disconnects.
+
+        Arguments:
+            reader (asyncio.StreamReader): The viewer's side of the stream.
+            writer (asyncio.StreamWriter): Where the viewer is sent to.
+        """
+        writer.write(self.header.pack(self.magic, self.version))
+        self._viewers[writer] = True
+
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self._viewers.pop(writer, None)
+            writer.close()
+
+    def _encode_keyframe(self, world, sections):
+        """Encode a keyframe of the whole scene.
+
+        Arguments:
+            world (World): The world being played.
+            sections (list [bytes]): The sections of the scene.
+
+        Returns:
+            bytes: The message.
+        """
+        config = json.dumps(world.config.settings).encode()
+        payload = [self.keyframe.pack(len(config)), config,
+                   self.count.pack(len(sections))]
+
+        for section in sections:
+            payload += [self.keyframe.pack(len(section)), section]
+
+        return self._encode(self.KEYFRAME, world.ticks, b''.join(payload))
+
+    def _encode_delta(self, tick, previous, sections):
+        """Encode the sections of the scene which changed since the last
+        tick.
+
+        Arguments:
+            tick (int): The tick of the world.
+            previous (list [bytes]): The sections as of the last tick.
+            sections (list [bytes]): The sections as of this tick.
+
+        Returns:
+            bytes: The message.
+        """
+        payload = []
+        changed = 0
+
+        for index, (before, after) in enumerate(zip(previous, sections)):
+            if before == after:
+                continue
+
+            mode, data = self.RAW, after
+
+            if len(before) == len(after):
+                xor = zlib.compress(numpy.bitwise_xor(
+                    numpy.frombuffer(before, numpy.uint8),
+                    numpy.frombuffer(after, numpy.uint8)).tobytes())
+
+                if len(xor) < len(after):
+                    mode, data = self.XOR, xor
+
+            payload += [self.delta.pack(index, mode, len(data)), data]
+            changed += 1
+
+        return self._encode(self.DELTA, tick,
+                            self.count.pack(changed) + b''.join(payload))
+
+    def _encode(self, message_type, tick, payload):
+        """Put a payload into a message.
+
+        Arguments:
+            message_type (bytes): The type of the message.
+            tick (int): The tick of the world.
+            payload (bytes): The payload.
+
+        Returns:
+            bytes: The message.
+        """
+        return self.message.pack(message_type, tick, len(payload)) + payload
+
+
+class Viewer():
+    """Rebuilds the scene streamed by a SpectatorServer in a world of its own,
+    which is never updated, only made to look like the one being played, so
+    it is drawn by the game's own sprites.
+
+    Attributes:
+        world (World): The world showing the scene, None until the first
+            keyframe has been received.
+        tick (int): The tick of the last message received.
+        received (int): The number of bytes received.
+        _sections (list [bytes]): The sections of the scene.
+        _animations (dict {tuple: Animation}): The animations of the
+            entities, by their rect and number of frames.
+    """
+    def __init__(self):
+        self.world = None
+        self.tick = None
+        self.received = 0
+        self._sections = None
+        self._animations = {}
+
+    async def watch(self, address, draw=None):
+        """Watch a game until the server disconnects.
+
+        Arguments:
+            address (str): The address of the server, host:port for TCP,
+                otherwise the path of a Unix socket.
+            draw (function): Called with the viewer after every message,
+                returning False to stop watching, if given.
+
+        Raises:
+            ValueError: If the server isn't a spectator server, or its
+                version is unknown.
+        """
+        reader, writer = await SpectatorServer.connect(address)
+
+        try:
+            header = await reader.readexactly(SpectatorServer.header.size)
+            magic, version = SpectatorServer.header.unpack(header)
+
+            if magic != SpectatorServer.magic:
+                raise ValueError('{} is not a spectator server'.format(
+                    address))
+
+            if version != SpectatorServer.version:
+                raise ValueError('{} streams version {} of the format, not {}'
+                                 .format(address, version,
+                                         SpectatorServer.version))
+
+            while True:
+                try:
+                    start = await reader.readexactly(
+                        SpectatorServer.message.size)
+                except asyncio.IncompleteReadError:
+                    return
+
+                message_type, tick, length = \
+                    SpectatorServer.message.unpack(start)
+                self.receive(message_type, tick,
+                             await reader.readexactly(length))
+                self.received += len(start) + length
+
+                if draw is not None and draw(self) is False:
+                    return
+        finally:
+            writer.close()
+
+    def receive(self, message_type, tick, payload):
+        """Apply a message to the scene.
+
+        Arguments:
+            message_type (bytes): The type of the message.
+            tick (int): The tick of the world.
+            payload (bytes): The payload of the message.
+        """
+        self.tick = tick
+
+        if message_type == SpectatorServer.KEYFRAME:
+            self._receive_keyframe(payload)
+        elif message_type == SpectatorServer.DELTA:
+            self._receive_delta(payload)
+
+    def _receive_keyframe(self, payload):
+        """Rebuild the scene from a keyframe, creating the world the first
+        time, or when the config changes.
+
+        Arguments:
+            payload (bytes): The payload of the keyframe.
+        """
+        (length,) = SpectatorServer.keyframe.unpack_from(payload)
+        offset = SpectatorServer.keyframe.size
+        config = Config(**json.loads(payload[offset:offset + length]))
+        offset += length
+
+        if self.world is None or \
+                self.world.config.settings != config.settings:
+            self.world = World(0, config)
+
+        (count,) = SpectatorServer.count.unpack_from(payload, offset)
+        offset += SpectatorServer.count.size
+        self._sections = []
+
+        for index in range(count):
+            (length,) = SpectatorServer.keyframe.unpack_from(payload, offset)
+            offset += SpectatorServer.keyframe.size
+            section = payload[offset:offset + length]
+            offset += length
+
+            self._sections.append(section)
+            Scene.apply(self.world, index, section, self._animations)
+
+    def _receive_delta(self, payload):
+        """Update the scene with the sections which changed.
+
+        Arguments:
+            payload (bytes): The payload of the delta.
+        """
+        if self._sections is None:
+            return
+
+        (count,) = SpectatorServer.count.unpack_from(payload)
+        offset = SpectatorServer.count.size
+
+        for _ in range(count):
+            index, mode, length = SpectatorServer.delta.unpack_from(payload,
+                                                                    offset)
+            offset += SpectatorServer.delta.size
+            section = payload[offset:offset + length]
+            offset += length
+
+            if mode == SpectatorServer.XOR:
+                section = numpy.bitwise_xor(
+                    numpy.frombuffer(self._sections[index], numpy.uint8),
+                    numpy.frombuffer(zlib.decompress(section),
+                                     numpy.uint8)).tobytes()
+
+            self._sections[index] = section
+            Scene.apply(self.world, index, section, self._animations)
+
+
+class Window():
+    """Draws the scene of a viewer in a window, which is opened once the
+    size of the arena is known.
+
+    Attributes:
+        _display (pygame.Surface): The display surface, None until the
+            window has been opened.
+        _background (pygame.Surface): The background of the scene.
+        _updater (DisplayUpdater): Pushes the changed areas to the screen.
+    """
+    def __init__(self):
+        self._display = None
+        self._background = None
+        self._updater = None
+
+    def draw(self, viewer):
+        """Draw the scene, opening the window the first time.
+
+        Arguments:
+            viewer (Viewer): The viewer whose scene to draw.
+
+        Returns:
+            bool: False once the window has been closed.
+        """
+        if self._display is None:
+            size = viewer.world.config.display.size
+            self._display = pygame.display.set_mode(size)
+            self._background = pygame.Surface(size)
+            self._updater = DisplayUpdater(size)
+            SpriteSheet.convert()
+
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            return False
+
+        viewer.world.clear(self._display, self._background)
+        self._updater.update(viewer.world.draw(self._display))
+
+        return True
+
+
+def main():
+    """Watch a game being streamed by a spectator server in a window."""
+    parser = argparse.ArgumentParser(
+        description='Watch a game of pyinvaiders being played.')
+    parser.add_argument('address',
+                        help='the server to watch, host:port for TCP, '
+                             'otherwise the path of a Unix socket')
+    args = parser.parse_args()
+
+    viewer = Viewer()
+
+    try:
+        asyncio.run(viewer.watch(args.address, Window().draw))
+    except (OSError, ValueError) as error:
+        parser.exit(1, 'Error: {}\n'.format(error))
+
+    print('Received {} bytes over {} ticks'.format(viewer.received,
+                                                   viewer.tick),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
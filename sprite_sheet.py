@@ -20,20 +20,49 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pygame
 
-from constants import SPRITE_SHEET
+from assets import Assets
+from constants import SPRITE_ATLAS, SPRITE_SHEET
 
 
 class SpriteSheet():
-    """Allow the fetching of sprites from an external sprite sheet."""
-    try:
-        sheet = pygame.image.load(SPRITE_SHEET)
-    except pygame.error:
-        print('Error: Failed to open sprite sheet')
-        exit()
+    """Allow the fetching of sprites from an external sprite sheet. Every
+    sprite and animation is cached the first time it is asked for, so that
+    every entity shares the same frames. Once the display has been set up
+    convert() replaces the cached frames with detached copies in the
+    display's pixel format.
+
+    The sprite sheet image itself isn't loaded until the first sprite is
+    fetched. Frames are taken from the baked atlas instead when there is an
+    up to date one, so the sprite sheet doesn't need to be decoded.
+
+    Attributes:
+        _sprites (dict {tuple: pygame.Surface}): The cached sprites.
+        _animations (dict {tuple: list}): The cached animation frames.
+        _masks (dict {tuple: pygame.mask.Mask}): The cached collision masks.
+        _converted (bool): Whether the cached frames have been converted.
+    """
+    _sprites = {}
+    _animations = {}
+    _masks = {}
+    _converted = False
+
+    @classmethod
+    def sheet(cls):
+        """Get the sprite sheet image, loading it the first time it is asked
+        for.
+
+        Returns:
+            pygame.Surface: The sprite sheet image.
+
+        Raises:
+            IOError: If the sprite sheet can't be opened.
+        """
+        return Assets.image(SPRITE_SHEET)
 
     @classmethod
     def sprite(cls, rect):
-        """Fetch a single sprite from the sprite sheet.
+        """Fetch a single sprite from the sprite sheet. The returned surface
+        is shared, so it should be copied before being drawn on.
 
         Arguments:
             rect (pygame.Rect): The rect for the sprite you are trying to get.
@@ -41,12 +70,29 @@ class SpriteSheet():
         Returns:
             pygame.Surface: A surface containing the sprite.
         """
-        return cls.sheet.subsurface(rect)
+        key = tuple(rect)
+
+        try:
+            return cls._sprites[key]
+        except KeyError:
+            atlas = Assets.atlas(SPRITE_ATLAS, SPRITE_SHEET)
+
+            with Assets.timed('sprites'):
+                if atlas is not None and rect in atlas:
+                    sprite = atlas.sprite(rect)
+                else:
+                    sprite = cls.sheet().subsurface(rect)
+
+                if cls._converted:
+                    sprite = sprite.convert_alpha()
+
+            cls._sprites[key] = sprite
+            return sprite
 
     @classmethod
     def animation(cls, rect, count):
         """Get a list of surfaces containg sprites which can be used to create
-        animations.
+        animations. The list is shared and is updated in place by convert().
 
         Arguments:
             rect (pygame.Rect): The rect which contains the first frame.
@@ -55,11 +101,82 @@ class SpriteSheet():
         Returns:
             list [pygame.Surface]: A list containing a surface for each frame.
         """
-        animation = []
+        key = tuple(rect) + (count,)
+
+        try:
+            return cls._animations[key]
+        except KeyError:
+            animation = [cls.sprite(frame) for frame in cls._frames(rect,
+                                                                    count)]
+            cls._animations[key] = animation
+            return animation
+
+    @classmethod
+    def mask(cls, rect, index=0):
+        """Get the collision mask for a frame of an animation, building it
+        the first time it is asked for. The mask is shared and must not be
+        changed.
+
+        Arguments:
+            rect (pygame.Rect): The rect which contains the first frame.
+            index (int): The index of the frame in the animation.
+
+        Returns:
+            pygame.mask.Mask: The mask for the frame.
+        """
+        key = tuple(rect) + (index,)
+
+        try:
+            return cls._masks[key]
+        except KeyError:
+            frame = cls._frames(rect, index + 1)[index]
+            atlas = Assets.atlas(SPRITE_ATLAS, SPRITE_SHEET)
+
+            with Assets.timed('masks'):
+                if atlas is not None and frame in atlas:
+                    mask = atlas.mask(frame)
+                else:
+                    mask = pygame.mask.from_surface(cls.sprite(frame))
+            cls._masks[key] = mask
+            return mask
+
+    @classmethod
+    def convert(cls):
+        """Convert every cached sprite to the display's pixel format, this can
+        only be done once the display has been set up. Sprites fetched after
+        this are converted as they are cached.
+        """
+        if cls._converted:
+            return
+
+        with Assets.timed('convert'):
+            for key, sprite in cls._sprites.items():
+                cls._sprites[key] = sprite.convert_alpha()
+
+            for key, animation in cls._animations.items():
+                animation[:] = [cls._sprites[tuple(frame)]
+                                for frame in cls._frames(
+                                    pygame.Rect(key[:4]), key[4])]
+
+        cls._converted = True
+
+    @classmethod
+    def _frames(cls, rect, count):
+        """Get the rects of each frame in an animation. Frames are laid out
+        left to right with a 4 pixel gap between them.
+
+        Arguments:
+            rect (pygame.Rect): The rect which contains the first frame.
+            count (int): The amount of frames in the animation.
+
+        Returns:
+            list [pygame.Rect]: The rect of each frame.
+        """
+        frames = []
         rect = rect.copy()
 
         for _ in range(count):
-            animation.append(cls.sprite(rect))
+            frames.append(rect.copy())
             rect.x += rect.width + 4
 
-        return animation
+        return frames
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import struct
+
+import numpy
+import pygame
+
+from animation import Animation
+
+
+class State():
+    """Saves everything a world needs to carry on exactly where it was into a
+    compact blob of bytes, and restores worlds from them. Restoring is much
+    cheaper than restarting a world and replaying the ticks which led up to
+    the state, so games can be branched from the middle for searches and
+    tests.
+
+    The blob starts with a header of the magic bytes, the format version, the
+    world's counters and seed, and the shape of the horde and the number of
+    shields, which the world being restored must match. It is followed by
+    the state of each random number generator, the tank, the horde and its
+    layers, every ship, the shields, then the registry's animations, free
+    slots and live entities. Each sprite is whether it is alive, its
+    position, its position before the last update and its timers, each ship
+    has the time its animation last changed frame and the frame it shows
+    rather than timers of its own, and each shield is followed by the packed
+    bits of its mask.
+
+    Attributes:
+        magic (bytes): The bytes every state starts with.
+        version (int): The version of the format.
+        header (struct.Struct): The layout of the header.
+        stream (struct.Struct): The layout of each random number generator,
+            followed by its name and its words of state.
+        words (struct.Struct): The layout of the words of state of each
+            random number generator.
+        sprite (struct.Struct): The layout of the tank and the shields.
+        tank (struct.Struct): The layout of the tank's own timers.
+        horde (struct.Struct): The layout of the horde's timers.
+        layer (struct.Struct): The layout of each layer of the horde.
+        registry (struct.Struct): The layout of the registry's counters.
+        animation (struct.Struct): The layout of each of the registry's
+            animations.
+        ships (numpy.dtype): The layout of each ship.
+        entities (numpy.dtype): The layout of each live entity.
+        _animations (dict {tuple: Animation}): The animations created while
+            restoring, for those the world being restored hasn't used.
+    """
+    magic = b'PYIW'
+    version = 2
+    header = struct.Struct('<4sHIIqHHH')
+    stream = struct.Struct('<BB?d')
+    words = struct.Struct('<625I')
+    sprite = struct.Struct('<?iiiidd')
+    tank = struct.Struct('<d')
+    horde = struct.Struct('<ddddddiiI')
+    layer = struct.Struct('<ddddbid')
+    registry = struct.Struct('<IIQQH')
+    animation = struct.Struct('<hhhhHd?')
+
+    ships = numpy.dtype([
+        ('alive', '?'), ('position', '<i4', 2), ('previous', '<i4', 2),
+        ('last_frame', '<f8'), ('frame', 'u1')])
+    entities = numpy.dtype([
+        ('index', '<u4'), ('kind', 'u1'), ('position', '<i4', 2),
+        ('previous', '<i4', 2), ('velocity', '<f8', 2), ('animation', '<u2'),
+        ('frame', '<u2'), ('time', '<f8'), ('last_frame', '<f8'),
+        ('explosion', '<i2')])
+
+    _animations = {}
+
+    @classmethod
+    def save(cls, world):
+        """Save the state of a world.
+
+        Arguments:
+            world (World): The world to save.
+
+        Returns:
+            bytes: The world's state.
+        """
+        horde = world.alien_horde
+        rows, columns = horde.alive.shape
+        streams = world.random.getstate()
+        parts = [cls.header.pack(cls.magic, cls.version, world.ticks,
+                                 world.shots_fired, world.random.seed, rows,
+                                 columns, len(world.shields)),
+                 bytes([len(streams)])]
+
+        for name, (version, words, gauss) in sorted(streams.items()):
+            name = name.encode()
+            parts.append(cls.stream.pack(len(name), version, gauss is None,
+                                         0.0 if gauss is None else gauss))
+            parts.append(name)
+            parts.append(cls.words.pack(*words))
+
+        parts.append(cls._save_sprite(world.tank))
+        parts.append(cls.tank.pack(world.tank._last_shot))
+        parts.append(cls._save_horde(horde))
+
+        for shield in world.shields:
+            parts.append(cls._save_sprite(shield))
+            parts.append(shield.pack())
+
+        parts.append(cls._save_registry(world.registry))
+
+        return b''.join(parts)
+
+    @classmethod
+    def restore(cls, world, state):
+        """Put a world back into a saved state. The world has to have the same
+        size horde and number of shields as the one which was saved, which
+        any world made with the same config has.
+
+        Arguments:
+            world (World): The world to restore.
+            state (bytes): The state, as returned by save.
+
+        Raises:
+            ValueError: If the state isn't one, is from another version of
+                the format, or doesn't fit the world.
+        """
+        state = memoryview(state)
+
+        try:
+            magic, version, ticks, shots_fired, seed, rows, columns, \
+                num_shields = cls.header.unpack_from(state)
+        except struct.error:
+            raise ValueError('This is not a saved state')
+
+        if magic != cls.magic:
+            raise ValueError('This is not a saved state')
+
+        if version != cls.version:
+            raise ValueError('Unsupported state version {}'.format(version))
+
+        horde = world.alien_horde
+
+        if (rows, columns) != horde.alive.shape or \
+                num_shields != len(world.shields):
+            raise ValueError('The state is of a world with a different layout')
+
+        if len(state) != cls._size(world, state):
+            raise ValueError('The state is truncated or has trailing bytes')
+
+        offset = cls.header.size + 1
+        streams = {}
+
+        for _ in range(state[cls.header.size]):
+            length, version, no_gauss, gauss = \
+                cls.stream.unpack_from(state, offset)
+            offset += cls.stream.size
+            name = bytes(state[offset:offset + length]).decode()
+            offset += length
+            streams[name] = (version, cls.words.unpack_from(state, offset),
+                             None if no_gauss else gauss)
+            offset += cls.words.size
+
+        world.random.setstate(seed, streams)
+        world.ticks = ticks
+        world.shots_fired = shots_fired
+
+        offset = cls._restore_sprite(world.tank, state, offset,
+                                     world.entities['all'],
+                                     world.entities['tanks'])
+        world.tank._last_shot, = cls.tank.unpack_from(state, offset)
+        offset = cls._restore_horde(horde, state, offset + cls.tank.size)
+
+        for shield in world.shields:
+            offset = cls._restore_sprite(shield, state, offset,
+                                         world.entities['all'],
+                                         world.entities['shields'])
+            length = (shield.rect.width * shield.rect.height + 7) // 8
+            bits = bytes(state[offset:offset + length])
+            offset += length
+
+            if bits != shield.pack():
+                shield.unpack(bits)
+
+        cls._restore_registry(world.registry, state, offset)
+
+    @classmethod
+    def _size(cls, world, state):
+        """Work out how long a state should be from its header and the world
+        it is restored into, reading only the lengths of its parts which
+        vary, so that a truncated state is caught before the world is
+        changed.
+
+        Arguments:
+            world (World): The world being restored.
+            state (memoryview): The saved state.
+
+        Returns:
+            int: How many bytes the state should be.
+
+        Raises:
+            ValueError: If the state ends before its lengths do.
+        """
+        horde = world.alien_horde
+        offset = cls.header.size + 1
+
+        try:
+            for _ in range(state[cls.header.size]):
+                length = cls.stream.unpack_from(state, offset)[0]
+                offset += cls.stream.size + length + cls.words.size
+
+            offset += cls.sprite.size + cls.tank.size + cls.horde.size + \
+                horde._positions.size * 4 + horde._alive.size + \
+                horde._last_shot.size * 8 + \
+                len(horde._layers) * cls.layer.size + \
+                horde.size * cls.ships.itemsize
+
+            for shield in world.shields:
+                offset += cls.sprite.size + \
+                    (shield.rect.width * shield.rect.height + 7) // 8
+
+            capacity, live, _, _, num_animations = \
+                cls.registry.unpack_from(state, offset)
+        except (IndexError, struct.error):
+            raise ValueError('The state is truncated')
+
+        if live > capacity:
+            raise ValueError('The state has more live entities than slots')
+
+        return offset + cls.registry.size + \
+            num_animations * cls.animation.size + (capacity - live) * 4 + \
+            live * cls.entities.itemsize
+
+    @classmethod
+    def _save_sprite(cls, sprite):
+        """Save whether a sprite is alive, its position and its timers.
+
+        Arguments:
+            sprite (Entity): The sprite to save.
+
+        Returns:
+            bytes: The sprite's state.
+        """
+        previous = sprite._previous_position or sprite.rect.topleft
+
+        return cls.sprite.pack(sprite.alive(), *sprite.rect.topleft,
+                               *previous, sprite._current_time,
+                               sprite._seconds_elapsed)
+
+    @classmethod
+    def _restore_sprite(cls, sprite, state, offset, *groups):
+        """Restore a sprite saved by _save_sprite, killing it or adding it
+        back to its groups if it has to be. The sprite is drawn again
+        wherever it is.
+
+        Arguments:
+            sprite (Entity): The sprite to restore.
+            state (memoryview): The saved state.
+            offset (int): Where the sprite is in the state.
+            groups (pygame.sprite.Group): The groups the sprite is in while
+                it is alive.
+
+        Returns:
+            int: The offset of whatever follows the sprite.
+        """
+        alive, x, y, previous_x, previous_y, current_time, seconds_elapsed = \
+            cls.sprite.unpack_from(state, offset)
+
+        if alive and not sprite.alive():
+            sprite.revive(*groups)
+        elif not alive and sprite.alive():
+            sprite.kill()
+
+        sprite.rect.topleft = (x, y)
+        sprite._previous_position = (previous_x, previous_y)
+        sprite._drawn_position = None
+        sprite._current_time = current_time
+        sprite._seconds_elapsed = seconds_elapsed
+        sprite.dirty = 1
+
+        return offset + cls.sprite.size
+
+    @classmethod
+    def _save_horde(cls, horde):
+        """Save the horde's timers and arrays, the march of each of its
+        layers and every ship.
+
+        Arguments:
+            horde (AlienHorde): The horde to save.
+
+        Returns:
+            bytes: The horde's state.
+        """
+        parts = [cls.horde.pack(horde._current_time, horde._seconds_elapsed,
+                                horde._speed_multiplier, horde._last_shots,
+                                horde._last_move, horde._last_mystery,
+                                horde._mystery_time, horde._current_layer,
+                                horde._ship_count),
+                 horde._positions.astype('<i4').tobytes(),
+                 horde._alive.tobytes(),
+                 horde._last_shot.astype('<f8').tobytes()]
+
+        for layer in horde._layers:
+            if layer._drop_order is None:
+                drop = 0
+            else:
+                drop = 1 if layer._drop_order[0] == 0 else -1
+
+            parts.append(cls.layer.pack(
+                layer._current_time, layer._seconds_elapsed,
+                layer._velocity.x, layer._velocity.y, drop,
+                -1 if layer._dropped is None else layer._dropped,
+                layer._drop_start))
+
+        ships = [(ship.alive(), ship.rect.topleft,
+                  ship._previous_position or ship.rect.topleft, last_frame,
+                  frame)
+                 for ship, last_frame, frame in zip(
+                     [ship for row in horde.ships for ship in row],
+                     horde._last_frame.ravel().tolist(),
+                     horde._frames.ravel().tolist())]
+        parts.append(numpy.array(ships, dtype=cls.ships).tobytes())
+
+        return b''.join(parts)
+
+    @classmethod
+    def _restore_horde(cls, horde, state, offset):
+        """Restore a horde saved by _save_horde. The arrays are written into
+        in place, as the layers hold views of them.
+
+        Arguments:
+            horde (AlienHorde): The horde to restore.
+            state (memoryview): The saved state.
+            offset (int): Where the horde is in the state.
+
+        Returns:
+            int: The offset of whatever follows the horde.
+        """
+        horde._current_time, horde._seconds_elapsed, \
+            horde._speed_multiplier, horde._last_shots, horde._last_move, \
+            horde._last_mystery, horde._mystery_time, horde._current_layer, \
+            horde._ship_count = cls.horde.unpack_from(state, offset)
+        offset += cls.horde.size
+
+        for array, dtype in ((horde._positions, '<i4'), (horde._alive, '?'),
+                             (horde._last_shot, '<f8')):
+            saved = numpy.frombuffer(state, dtype, array.size, offset)
+            array[...] = saved.reshape(array.shape)
+            offset += saved.nbytes
+
+        for layer in horde._layers:
+            layer._current_time, layer._seconds_elapsed, velocity_x, \
+                velocity_y, drop, dropped, layer._drop_start = \
+                cls.layer.unpack_from(state, offset)
+            offset += cls.layer.size
+
+            layer._velocity.update(velocity_x, velocity_y)
+            layer._drop_order = None
+            layer._dropped = None if dropped < 0 else dropped
+
+            if drop:
+                layer._drop_order = numpy.arange(len(layer._ships))[::drop]
+
+            layer._moved.clear()
+
+        ships = numpy.frombuffer(state, cls.ships, horde.size, offset)
+        offset += ships.nbytes
+        horde._last_frame[...] = ships['last_frame'].reshape(
+            horde._last_frame.shape)
+        horde._frames[...] = ships['frame'].reshape(horde._frames.shape)
+
+        for layer, row, saved in zip(
+                horde._layers, horde.ships,
+                ships.reshape(horde._frames.shape).tolist()):
+            for ship, (alive, position, previous, _, frame) in zip(row, saved):
+                if alive and not ship.alive():
+                    ship.revive(*horde._ship_groups)
+                elif not alive and ship.alive():
+                    ship.kill()
+
+                ship.rect.topleft = position
+                ship._previous_position = tuple(previous)
+                ship._drawn_position = None
+                ship.show(frame)
+
+                if tuple(previous) != tuple(position):
+                    layer._moved.add(ship)
+
+        return offset
+
+    @classmethod
+    def _save_registry(cls, registry):
+        """Save the registry's counters, animations, free slots in the order
+        they will be used and every live entity.
+
+        Arguments:
+            registry (Registry): The registry to save.
+
+        Returns:
+            bytes: The registry's state.
+        """
+        live = numpy.flatnonzero(registry.alive)
+        entities = numpy.empty(len(live), dtype=cls.entities)
+
+        for name in cls.entities.names:
+            entities[name] = live if name == 'index' else \
+                getattr(registry, name)[live]
+
+        parts = [cls.registry.pack(len(registry), len(live), registry.tests,
+                                   registry.skipped,
+                                   len(registry.animations))]
+
+        for animation in registry.animations:
+            parts.append(cls.animation.pack(*animation.rect, animation.count,
+                                            animation.delay, animation.loop))
+
+        parts.append(numpy.array(registry._free, dtype='<u4').tobytes())
+        parts.append(entities.tobytes())
+
+        return b''.join(parts)
+
+    @classmethod
+    def _restore_registry(cls, registry, state, offset):
+        """Restore a registry saved by _save_registry. The saved animations
+        keep the indices they were saved with, reusing the registry's own
+        animations where they play the same way. A registry with more slots
+        uses its extra slots once the saved ones run out, as the saved one
+        would have after growing.
+
+        Arguments:
+            registry (Registry): The registry to restore.
+            state (memoryview): The saved state.
+            offset (int): Where the registry is in the state.
+
+        Returns:
+            int: The offset of whatever follows the registry.
+        """
+        capacity, live, tests, skipped, num_animations = \
+            cls.registry.unpack_from(state, offset)
+        offset += cls.registry.size
+
+        known = {animation.key: animation
+                 for animation in registry.animations}
+        animations = []
+
+        for _ in range(num_animations):
+            values = cls.animation.unpack_from(state, offset)
+            offset += cls.animation.size
+            key = (values[:4],) + values[4:]
+            animation = known.get(key) or cls._animations.get(key)
+
+            if animation is None:
+                animation = cls._animations[key] = Animation(
+                    pygame.Rect(key[0]), *key[1:])
+
+            animations.append(animation)
+
+        registry.clear()
+
+        while len(registry) < capacity:
+            registry._grow()
+
+        registry.animations = animations
+        registry._animation_ids = {}
+        registry._animation_keys = {
+            animation.key: index for index, animation in enumerate(animations)}
+        registry.delays = numpy.array([animation.delay
+                                       for animation in animations],
+                                      dtype=numpy.float64)
+        registry.counts = numpy.array([animation.count
+                                       for animation in animations],
+                                      dtype=numpy.int32)
+        registry.loops = numpy.array([animation.loop
+                                      for animation in animations],
+                                     dtype=bool)
+        registry.animation[:] = 0
+        registry.explosion[:] = -1
+        sizes = numpy.array([animation.rect.size for animation in animations],
+                            dtype=numpy.int64).reshape(-1, 2)
+
+        free = numpy.frombuffer(state, '<u4', capacity - live, offset)
+        offset += free.nbytes
+        entities = numpy.frombuffer(state, cls.entities, live, offset)
+        offset += entities.nbytes
+
+        indices = entities['index'].astype(numpy.intp)
+        registry.alive[indices] = True
+        registry._used[indices] = True
+
+        for name in cls.entities.names[1:]:
+            getattr(registry, name)[indices] = entities[name]
+
+        registry.size[indices] = sizes[entities['animation']]
+        registry._free = list(range(len(registry) - 1, capacity - 1, -1)) + \
+            free.tolist()
+
+        for index, kind in zip(indices.tolist(), entities['kind'].tolist()):
+            registry._slots[kind].add(index)
+
+        registry.tests = tests
+        registry.skipped = skipped
+
+        return offset
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy
+
+from ecs import Registry
+
+
+class Systems():
+    """The systems which update the entities in a registry. Each one works on
+    a few of the components of every entity at once.
+
+    Attributes:
+        broadphase (int): The number of candidates from which collide tests
+            their rects all at once with NumPy, below which testing them one
+            at a time is cheaper than setting up the arrays.
+    """
+    broadphase = 32
+
+    @classmethod
+    def move(cls, registry, seconds_elapsed):
+        """Move every entity by its velocity, remembering where it was so it
+        can be drawn interpolated between the two.
+
+        Arguments:
+            registry (Registry): The entities.
+            seconds_elapsed (float): The time step to move them by.
+        """
+        if not registry.count():
+            return
+
+        registry.previous[:] = registry.position
+        registry.position += (seconds_elapsed *
+                              registry.velocity).astype(numpy.int64)
+
+    @classmethod
+    def animate(cls, registry, seconds_elapsed):
+        """Advance the animation of every entity whose frame delay has
+        passed. Looping animations start again once they reach the end, and
+        the entities whose animations don't loop are despawned.
+
+        Arguments:
+            registry (Registry): The entities.
+            seconds_elapsed (float): The time step to advance them by.
+        """
+        if not registry.count():
+            return
+
+        registry.time += seconds_elapsed
+
+        animation = registry.animation
+        due = registry.alive & (numpy.abs(registry.last_frame - registry.time)
+                                >= registry.delays[animation])
+
+        if not due.any():
+            return
+
+        registry.frame[due] += 1
+        registry.last_frame[due] = registry.time[due]
+
+        ended = due & (registry.frame >= registry.counts[animation])
+        looped = ended & registry.loops[animation]
+        registry.frame[looped] = 0
+
+        for index in numpy.flatnonzero(ended & ~looped).tolist():
+            registry.despawn(index)
+
+    @classmethod
+    def despawn(cls, registry):
+        """Despawn the bullets which have reached the edge of the arena,
+        leaving their explosions there, and the mystery ships which have left
+        it.
+
+        Arguments:
+            registry (Registry): The entities.
+        """
+        display = registry.display
+        indices = registry.indices(Registry.BULLETS | Registry.MYSTERY)
+
+        if not indices:
+            return
+
+        for index, kind, (left, top), (width, height) in zip(
+                indices, registry.kind[indices].tolist(),
+                registry.position[indices].tolist(),
+                registry.size[indices].tolist()):
+            if kind == Registry.MYSTERY:
+                if left >= display.right or left + width <= display.left or \
+                        top >= display.bottom or top + height <= display.top:
+                    registry.despawn(index)
+
+                continue
+
+            if kind == Registry.TANK_BULLET and top <= display.top:
+                top = display.top
+            elif kind == Registry.SHIP_BULLET and top >= display.bottom:
+                top = display.bottom
+            else:
+                continue
+
+            explosion = int(registry.explosion[index])
+
+            if explosion >= 0:
+                animation = registry.animations[explosion]
+                registry.spawn(Registry.EXPLOSION, animation, (
+                    left - animation.rect.width / 2,
+                    top if kind == Registry.TANK_BULLET else
+                    top - animation.rect.height))
+
+            registry.despawn(index)
+
+    @classmethod
+    def collide(cls, registry, rect, mask, kinds):
+        """Find the entities of some kinds which a mask overlaps. Only the
+        entities of those kinds are checked against the rect, all at once
+        when there are many of them, and only those it overlaps are mask
+        tested, in slot order. Entities which are
+        despawned while the collisions are being handled are skipped.
+
+        Arguments:
+            registry (Registry): The entities.
+            rect (pygame.Rect): Where the mask is.
+            mask (pygame.mask.Mask): The mask to test.
+            kinds (int): The kinds of entity to test.
+
+        Yields:
+            tuple {int, tuple {int, int}}: The slot of each entity which was
+                hit, and the first point where they overlap, relative to the
+                rect.
+        """
+        candidates = registry.indices(kinds)
+
+        if not candidates:
+            return
+
+        if len(candidates) >= cls.broadphase:
+            candidates = numpy.array(candidates)
+            position = registry.position[candidates]
+            size = registry.size[candidates]
+            indices = candidates[
+                (position[:, 0] < rect.right) &
+                (position[:, 1] < rect.bottom) &
+                (position[:, 0] + size[:, 0] > rect.left) &
+                (position[:, 1] + size[:, 1] > rect.top)].tolist()
+        else:
+            indices = [
+                index for index, (left, top), (width, height) in zip(
+                    candidates, registry.position[candidates].tolist(),
+                    registry.size[candidates].tolist())
+                if left < rect.right and top < rect.bottom and
+                left + width > rect.left and top + height > rect.top]
+
+        registry.tests += len(indices)
+        registry.skipped += len(candidates) - len(indices)
+
+        for index in indices:
+            if not registry.alive[index]:
+                continue
+
+            point = registry.overlap(rect, mask, index)
+
+            if point is not None:
+                yield index, point
+
+    @classmethod
+    def overlapping(cls, registry, indices, others):
+        """Find the pairs of entities whose rects overlap with a sweep and
+        prune. The others are sorted by their left edges, so each entity is
+        only tested against the window of others which start before its
+        right edge and close enough to its left edge for the widest of them
+        to reach it, instead of against every one of them.
+
+        Arguments:
+            registry (Registry): The entities.
+            indices (list [int]): The slots of the first entity of each pair.
+            others (list [int]): The slots of the second entity of each pair.
+
+        Returns:
+            list [tuple {int, int}]: The slots of each pair which overlaps,
+                in the order of indices, then others.
+        """
+        if not indices or not others:
+            return []
+
+        indices = numpy.array(indices)
+        others = numpy.array(others)
+        position = registry.position[indices]
+        size = registry.size[indices]
+        other_position = registry.position[others]
+        other_size = registry.size[others]
+
+        order = numpy.argsort(other_position[:, 0], kind='stable')
+        lefts = other_position[order, 0]
+        starts = numpy.searchsorted(
+            lefts, position[:, 0] - other_size[:, 0].max(), 'right')
+        ends = numpy.searchsorted(lefts, position[:, 0] + size[:, 0], 'left')
+        counts = numpy.maximum(ends - starts, 0)
+
+        first = numpy.repeat(numpy.arange(len(indices)), counts)
+        second = order[numpy.arange(len(first)) - numpy.repeat(
+            numpy.cumsum(counts) - counts - starts, counts)]
+
+        hits = ((position[first] < other_position[second] +
+                 other_size[second]) &
+                (position[first] + size[first] >
+                 other_position[second])).all(axis=1)
+        first, second = first[hits], second[hits]
+        pairs = numpy.lexsort((second, first))
+
+        registry.tests += len(pairs)
+        registry.skipped += len(indices) * len(others) - len(pairs)
+
+        return list(zip(indices[first[pairs]].tolist(),
+                        others[second[pairs]].tolist()))
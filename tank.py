@@ -18,16 +18,15 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
-
 import pygame
 
 from animation import Animation
-from constants import (DISPLAY, TANK, TANK_BULLET, TANK_EXPLOSION,
-                       TANK_BULLET_EXPLOSION)
+from constants import TANK, TANK_EXPLOSION, TANK_BULLET_EXPLOSION
+from ecs import Registry
 from entity import Entity
 from explosion import Explosion
 from sprite_sheet import SpriteSheet
+from systems import Systems
 from tank_bullet import TankBullet
 
 
@@ -35,11 +34,11 @@ class Tank(Entity):
     """The tank which the user controls to destroy the oncoming alien horde.
 
     Arguments:
+        position (tuple {int, int}): The position to place the tank.
+        config (Config): The size of the arena and the tanks speed.
         groups (pygame.sprite.Group): All the groups this entity will be in.
 
     Attributes:
-        tank (pygame.Surface): The default sprite for the tank.
-        bullet (pygame.Surface): The tanks bullet sprite.
         explosion (pygame.Surface): The tanks explosion animation.
         image (pygame.Surface): The current image which represents the sprite.
         rect (pygame.Rect): The rect used for placing the sprite.
@@ -48,25 +47,28 @@ class Tank(Entity):
         _last_shot (float): The last time that the tank fired a shot.
         _reload_speed (float): The amount of time it takes to reload.
         _current_time (float): Time in seconds. (Used for time based actions)
+        _config (Config): The size of the arena and the tanks speed.
     """
-    tank = SpriteSheet.sprite(TANK)
-    bullet = SpriteSheet.sprite(TANK_BULLET)
-    explosion = Animation(SpriteSheet.animation(TANK_EXPLOSION, 1), 0.3)
-    bullet_explosion = Animation(
-        SpriteSheet.animation(TANK_BULLET_EXPLOSION, 1), 0.3)
+    explosion = Animation(TANK_EXPLOSION, 1, 0.3)
+    bullet_explosion = Animation(TANK_BULLET_EXPLOSION, 1, 0.3)
 
-    def __init__(self, position, *groups):
+    def __init__(self, position, config, *groups):
         super().__init__(*groups)
-        self.image = copy(self.tank).convert_alpha()
+        self.image = SpriteSheet.sprite(TANK)
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
-        self._velocity = pygame.math.Vector2(250, 0)
+        self._velocity = pygame.math.Vector2(config.tank_speed, 0)
         self._last_shot = 0
-        self._reload_speed = 0.5
+        self._reload_speed = config.tank_reload
+        self._config = config
         self._current_time = self._reload_speed
 
         self.rect.topleft = position
 
+    @property
+    def mask(self):
+        """Get the shared collision mask for the sprite."""
+        return SpriteSheet.mask(TANK)
+
     def move(self, direction):
         """Move the tank according the users input.
 
@@ -79,31 +81,36 @@ class Tank(Entity):
             self.dirty = 1
         if direction < 0 and self.rect.left > velocity:
             self.rect.x -= velocity
-        elif direction > 0 and self.rect.right < DISPLAY.height - velocity:
+        elif direction > 0 and \
+                self.rect.right < self._config.width - velocity:
             self.rect.x += velocity
 
-    def shoot(self, *groups):
+    def shoot(self, registry):
         """If the tank isn't reloading then fire a shot.
 
         Arguments:
-            groups (pygame.sprite.Group): The groups the bullet will be in.
+            registry (Registry): The entities the bullet will be in.
+
+        Returns:
+            bool: Whether a shot was fired.
         """
         if abs(self._last_shot - self._current_time) >= self._reload_speed:
-            TankBullet(self, *groups)
+            TankBullet.fire(registry, self, self._config)
             self._last_shot = self._current_time
+            return True
 
-    def take_damage(self, bullets, *groups):
-        """Tank damage from any of the bullets on the display.
+        return False
+
+    def take_damage(self, registry):
+        """Tank damage from any of the ships' bullets on the display.
 
         Arguments:
-            bullets (pygame.sprite.Group): The bullet group.
-            groups (pygame.sprite.Group): The groups the explosion will be in.
+            registry (Registry): The entities holding the bullets.
         """
-        for bullet in bullets:
-            if pygame.sprite.collide_mask(self, bullet):
-                Explosion(copy(self.explosion),
-                          (self.rect.x - 4, self.rect.y),
-                          *groups)
-
-                bullet.kill()
-                self.kill()
+        for bullet, _ in Systems.collide(registry, self.rect, self.mask,
+                                         Registry.SHIP_BULLET):
+            Explosion.spawn(registry, self.explosion,
+                            (self.rect.x - 4, self.rect.y))
+
+            registry.despawn(bullet)
+            self.kill()
@@ -18,52 +18,35 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from copy import copy
+from animation import Animation
+from constants import TANK_BULLET
+from ecs import Registry
 
-import pygame
 
-from bullet import Bullet
-from constants import TANK_BULLET, TANK_BULLET_EXPLOSION, TANK_BULLET_VECOLCITY
-from explosion import Explosion
-
-
-class TankBullet(Bullet):
-    """Bullets which are fired by the user controlled tank.
-
-    Arguments:
-        tank (Tank): The tank which fired the bullet.
-        groups (pygame.sprite.Group): All the groups this entity will be in.
+class TankBullet():
+    """Bullets which are fired by the user controlled tank. They are entities
+    in the world's registry, which explode once they reach the top of the
+    arena.
 
     Attributes:
-        image (pygame.Surface): The current image which represents the sprite.
-        rect (pygame.Rect): The rect used for placing the sprite.
-        mask (pygame.mask.Mask): The mast for the image.
-        _explosion (Animation): The explosion animation.
-        _velocity (pygame.math.Vector2): The x, y velocities for the sprite.
+        animation (Animation): The bullet's image, which never changes.
     """
-    def __init__(self, tank, *groups):
-        super().__init__(*groups)
-        self.image = copy(tank.bullet).convert_alpha()
-        self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
-        self._explosion = copy(tank.bullet_explosion)
-        self._velocity = TANK_BULLET_VECOLCITY
+    animation = Animation(TANK_BULLET, 1, float('inf'), loop=True)
 
-        self.rect.x = tank.rect.x + tank.rect.width / 2 - TANK_BULLET.width / 2
-        self.rect.y = tank.rect.y - TANK_BULLET.height
-
-    def take_damage(self, bullets, *groups):
-        """Take any damage from other bullets and make sure that the bullet is
-        destroyed when it is no longer on the display.
+    @classmethod
+    def fire(cls, registry, tank, config):
+        """Fire a bullet from the tank.
 
         Arguments:
-            bullets (pygame.sprite.Group): The group of bullets.
-            groups (pygame.sprite.Group): The groups the explosion will be in.
-        """
-        super().take_damage(bullets, *groups)
+            registry (Registry): The entities.
+            tank (Tank): The tank which fired the bullet.
+            config (Config): The speed of the bullet.
 
-        if self.rect.y <= 0:
-            self.kill()
-            Explosion(self._explosion,
-                      (self.rect.x - TANK_BULLET_EXPLOSION.width / 2, 0),
-                      *groups)
+        Returns:
+            int: The bullet's slot.
+        """
+        return registry.spawn(
+            Registry.TANK_BULLET, cls.animation,
+            (tank.rect.x + tank.rect.width / 2 - TANK_BULLET.width / 2,
+             tank.rect.y - TANK_BULLET.height),
+            (0, -config.tank_bullet_speed), tank.bullet_explosion)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from atlas import Atlas
+from constants import SPRITE_SHEET
+
+
+class TestAtlas(unittest.TestCase):
+    """The frames baked into an atlas read back with the same pixels and
+    masks as the sprite sheet they were baked from.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'sprite-sheet.atlas')
+
+    def test_frames_match_the_sprite_sheet(self):
+        count = Atlas.bake(SPRITE_SHEET, self.path)
+        atlas = Atlas.load(self.path, SPRITE_SHEET)
+        sheet = pygame.image.load(SPRITE_SHEET)
+
+        self.assertEqual(len(atlas), count)
+
+        for rect, frames in Atlas.animations:
+            for index in range(frames):
+                frame = pygame.Rect(rect.x + (rect.width + 4) * index, rect.y,
+                                    rect.width, rect.height)
+                expected = sheet.subsurface(frame)
+
+                self.assertIn(frame, atlas)
+                self.assertEqual(
+                    pygame.image.tobytes(atlas.sprite(frame), 'RGBA'),
+                    pygame.image.tobytes(expected, 'RGBA'))
+
+                mask = atlas.mask(frame)
+                expected = pygame.mask.from_surface(expected)
+
+                self.assertEqual(mask.get_size(), expected.get_size())
+                self.assertEqual(mask.overlap_area(expected, (0, 0)),
+                                 expected.count())
+                self.assertEqual(mask.count(), expected.count())
+
+    def test_load_rejects_a_different_sprite_sheet(self):
+        sheet_path = os.path.join(self.directory, 'sprite-sheet.png')
+        shutil.copyfile(SPRITE_SHEET, sheet_path)
+        Atlas.bake(sheet_path, self.path)
+
+        with open(sheet_path, 'ab') as sheet_file:
+            sheet_file.write(b'\0')
+
+        with self.assertRaises(ValueError):
+            Atlas.load(self.path, sheet_path)
+
+    def test_load_rejects_other_files(self):
+        with open(self.path, 'wb') as atlas_file:
+            atlas_file.write(b'not an atlas')
+
+        with self.assertRaises(ValueError):
+            Atlas.load(self.path, SPRITE_SHEET)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+
+from main import SpaceInvaiders
+from replay import Replay
+
+
+class TestReplay(unittest.TestCase):
+    """Games recorded to a replay file play back to exactly the same state.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'game.pyir')
+
+    def test_pack_unpack(self):
+        for bits in range(64):
+            self.assertEqual(Replay.pack(Replay.unpack(bits)), bits)
+
+    def test_load_rejects_other_files(self):
+        with open(self.path, 'wb') as replay_file:
+            replay_file.write(b'not a replay')
+
+        with self.assertRaises(ValueError):
+            Replay.load(self.path)
+
+    def test_replay_reaches_the_same_state(self):
+        choices = (0, Replay.LEFT, Replay.RIGHT, Replay.UP,
+                   Replay.LEFT | Replay.UP, Replay.RIGHT | Replay.UP)
+        keys_random = random.Random(0)
+
+        async def keys():
+            return Replay.unpack(keys_random.choice(choices))
+
+        game = SpaceInvaiders(headless=True, seed=5, record=self.path)
+        frames = asyncio.run(game.play(keys, frames=120))
+        game.close()
+
+        replay = Replay.load(self.path)
+        self.assertEqual(len(replay), frames)
+        self.assertEqual(replay.seed, 5)
+
+        replayed = SpaceInvaiders(headless=True, seed=replay.seed)
+        results = replayed.replay(replay)
+
+        self.assertGreater(game.world.ticks, 0)
+        self.assertEqual(results['ticks'], game.world.ticks)
+        self.assertEqual(replayed.snapshot(), game.snapshot())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import unittest
+
+import numpy
+
+from constants import TIMESTEP
+from rewind import Rewind
+from world import World
+
+
+class TestRewind(unittest.TestCase):
+    """The states a rewind decodes are the same as those the world saved,
+    and seeking to a tick puts the world back into its state after it.
+    """
+    def test_encode_decode(self):
+        states = random.Random(0)
+        keyframe = numpy.frombuffer(bytes(states.getrandbits(8)
+                                          for _ in range(512)), numpy.uint8)
+
+        for size in (0, 100, 512, 600):
+            state = bytearray(keyframe.tobytes()[:size].ljust(size, b'\1'))
+
+            for index in states.sample(range(size), min(size, 20)):
+                state[index] ^= 0xff
+
+            state = bytes(state)
+            delta = Rewind._encode(state, keyframe)
+
+            self.assertEqual(Rewind._decode(delta, keyframe), state)
+
+    def test_seek(self):
+        world = World(7)
+        rewind = Rewind(seconds=2, keyframe_seconds=0.5)
+        actions = random.Random(0)
+        states = {}
+
+        for _ in range(600):
+            world.update(TIMESTEP, actions.choice((-1, 0, 1)),
+                         actions.random() < 0.5)
+            rewind.record(world)
+            states[world.ticks] = world.save()
+
+        self.assertEqual(rewind.last, 600)
+        self.assertLessEqual(len(rewind), 2.5 / TIMESTEP)
+
+        for tick in (rewind.last, rewind.first, rewind.first + 1, 500, 541):
+            self.assertEqual(rewind.state(tick), states[tick])
+            self.assertEqual(rewind.seek(world, tick), tick)
+            self.assertEqual(world.ticks, tick)
+            self.assertEqual(world.save(), states[tick])
+
+        self.assertEqual(rewind.seek(world, 0), rewind.first)
+
+        with self.assertRaises(IndexError):
+            rewind.state(rewind.first - 1)
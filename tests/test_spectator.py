@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import unittest
+
+from constants import TIMESTEP
+from spectator import Scene, SpectatorServer, Viewer
+from world import World
+
+
+class TestSpectator(unittest.TestCase):
+    """A viewer sent a keyframe and then the deltas of every tick shows the
+    same scene as the world being played, whether the sections changed are
+    sent as they are or as XORs.
+    """
+    def receive(self, viewer, message):
+        message_type, tick, length = SpectatorServer.message.unpack_from(
+            message)
+        payload = message[SpectatorServer.message.size:]
+
+        self.assertEqual(len(payload), length)
+        viewer.receive(message_type, tick, payload)
+
+    def modes(self, message):
+        offset = SpectatorServer.message.size
+        count, = SpectatorServer.count.unpack_from(message, offset)
+        offset += SpectatorServer.count.size
+        modes = set()
+
+        for _ in range(count):
+            _, mode, length = SpectatorServer.delta.unpack_from(message,
+                                                                offset)
+            offset += SpectatorServer.delta.size + length
+            modes.add(mode)
+
+        return modes
+
+    def test_keyframe_and_deltas(self):
+        world = World(3)
+        server = SpectatorServer()
+        scene = Scene()
+        viewer = Viewer()
+        actions = random.Random(0)
+        modes = set()
+
+        sections = list(scene.capture(world))
+        self.receive(viewer, server._encode_keyframe(world, sections))
+        self.assertEqual(Scene().capture(viewer.world), sections)
+
+        for _ in range(1200):
+            world.update(TIMESTEP, actions.choice((-1, 0, 1)),
+                         actions.random() < 0.5)
+            previous, sections = sections, list(scene.capture(world))
+            delta = server._encode_delta(world.ticks, previous, sections)
+            modes |= self.modes(delta)
+            self.receive(viewer, delta)
+
+            self.assertEqual(viewer.tick, world.ticks)
+            self.assertEqual(Scene().capture(viewer.world), sections)
+
+        self.assertGreater(world.ships_killed, 0)
+        self.assertEqual(modes, {SpectatorServer.RAW, SpectatorServer.XOR})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import random
+import unittest
+
+from config import Config
+from constants import TIMESTEP
+from state import State
+from world import World
+
+
+class TestState(unittest.TestCase):
+    """A world restored from a saved state carries on exactly as the world
+    which was saved does.
+    """
+    def setUp(self):
+        actions = random.Random(0)
+        self.actions = [(actions.choice((-1, 0, 1)), actions.random() < 0.5)
+                        for _ in range(1500)]
+        self.config = Config(ship_reload=1, horde_shooting_delay=0.1)
+
+    def play(self, world, start, stop):
+        for action in self.actions[start:stop]:
+            world.update(TIMESTEP, *action)
+
+    def test_save_restore_step(self):
+        world = World(7, self.config)
+        self.play(world, 0, 600)
+        state = world.save()
+
+        other = World(99, self.config)
+        self.play(other, 0, 50)
+        other.restore(state)
+
+        self.assertEqual(other.save(), state)
+
+        self.play(world, 600, 1500)
+        self.play(other, 600, 1500)
+
+        self.assertEqual(other.save(), world.save())
+        self.assertEqual(other.ticks, 1500)
+
+    def test_restore_rejects_other_states(self):
+        world = World(7, self.config)
+        state = world.save()
+
+        with self.assertRaises(ValueError):
+            world.restore(b'not a state')
+
+        with self.assertRaises(ValueError):
+            world.restore(state[:4] + b'\xff\xff' + state[6:])
+
+        with self.assertRaises(ValueError):
+            World(7, Config(horde_columns=10)).restore(state)
+
+        self.assertEqual(State.save(world), state)
+
+    def test_restore_rejects_truncated_states(self):
+        world = World(7, self.config)
+        self.play(world, 0, 300)
+        state = world.save()
+
+        other = World(99, self.config)
+        before = other.save()
+
+        for length in (State.header.size, State.header.size + 1,
+                       len(state) // 2, len(state) - 1):
+            with self.assertRaises(ValueError):
+                other.restore(state[:length])
+
+        with self.assertRaises(ValueError):
+            other.restore(state + b'\0')
+
+        self.assertEqual(other.save(), before)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+This file is part of pyinvaiders.
+
+Copyright (C) 2019, James Lee <jamesl33info@gmail.com>.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pygame
+
+from bullet import Bullet
+from config import Config
+from ecs import Registry
+from factory import Factory
+from mystery import Mystery
+from random_streams import RandomStreams
+from renderer import Snapshot
+from state import State
+from systems import Systems
+
+
+class World():
+    """Everything which changes while a game of space invaiders is played.
+    Worlds don't touch the display, so many of them can be stepped side by
+    side in one process. They only share the read only assets, such as the
+    sprite sheet frames and masks.
+
+    The tank, the shields and the horde are sprites, while the bullets, the
+    explosions and the mystery ship are entities in the registry, which are
+    only given sprites when the world is drawn.
+
+    Arguments:
+        seed (int): The seed for the worlds random number generators.
+        config (Config): The size and layout of the world, the original
+            game's if it isn't given.
+
+    Attributes:
+        config (Config): The size and layout of the world.
+        random (RandomStreams): The worlds random number generators.
+        entities (dict {pygame.sprite.Group}): The groups of entities.
+        tank (Tank): The tank the user controls.
+        shields (list [Shield]): The shields which defend the user.
+        alien_horde (AlienHorde): The alien horde which the user fights.
+        registry (Registry): The bullets, explosions and mystery ships.
+        ticks (int): The number of updates since the world was restarted.
+        shots_fired (int): The number of shots the tank has fired.
+        profiler (Profiler): Times each phase of the update, if it is set.
+        sprite_groups (tuple [str]): The groups of entities which are sprites
+            rather than entities in the registry.
+        updated_groups (tuple [str]): The groups of sprites which are updated
+            a sprite at a time, the horde animates and moves its own ships.
+        _snapshot (Snapshot): The last snapshot taken of the world, if any.
+        _images (dict {Entity: pygame.Surface}): The copies of the images the
+            entities draw on themselves, as of the last snapshot.
+    """
+    sprite_groups = ('shields', 'ships', 'tanks')
+    updated_groups = ('shields', 'tanks')
+
+    def __init__(self, seed=None, config=None):
+        self.config = Config() if config is None else config
+        self.random = RandomStreams(seed)
+        self.entities = {
+            'all': pygame.sprite.LayeredDirty(),
+            'bullets': pygame.sprite.LayeredDirty(),
+            'explosions': pygame.sprite.LayeredDirty(),
+            'mystery': pygame.sprite.LayeredDirty(),
+            'shields': pygame.sprite.LayeredDirty(),
+            'ship_bullets': pygame.sprite.LayeredDirty(),
+            'ships': pygame.sprite.LayeredDirty(),
+            'tank_bullets': pygame.sprite.LayeredDirty(),
+            'tanks': pygame.sprite.LayeredDirty()
+        }
+        self.tank = None
+        self.shields = None
+        self.alien_horde = None
+        self.registry = Registry(self.config, self.entities)
+        self.ticks = 0
+        self.shots_fired = 0
+        self.profiler = None
+        self._snapshot = None
+        self._images = {}
+
+        self.restart()
+
+    def restart(self, seed=None):
+        """Reset all the worlds variables causing a restart. Every sprite is
+        killed and every entity is despawned.
+
+        Arguments:
+            seed (int): Reseed the random number generators first, if given.
+        """
+        if seed is not None:
+            self.random = RandomStreams(seed)
+
+        for sprite in self.entities['all'].sprites():
+            sprite.kill()
+
+        for _, sprite_group in self.entities.items():
+            sprite_group.empty()
+
+        self.registry.clear()
+        self._images.clear()
+        self.ticks = 0
+        self.shots_fired = 0
+
+        self.tank = Factory.create_tank(self.config,
+                                        self.entities['all'],
+                                        self.entities['tanks'])
+        self.shields = Factory.create_shields(self.config, self.random,
+                                              self.entities['all'],
+                                              self.entities['shields'])
+        self.alien_horde = Factory.create_horde(self.config, self.random,
+                                                self.entities['all'],
+                                                self.entities['ships'])
+
+    def save(self):
+        """Save everything needed to carry on from where the world is now.
+
+        Returns:
+            bytes: The world's state, which restore puts it back into.
+        """
+        return State.save(self)
+
+    def restore(self, state):
+        """Put the world back into a state returned by save, from this world
+        or any other made with the same config. The world carries on exactly
+        as the saved one would have.
+
+        Arguments:
+            state (bytes): The state to restore.
+        """
+        State.restore(self, state)
+
+    def entity_counts(self):
+        """Count the entities in each of the sprite groups, including the
+        entities in the registry whether or not they have been drawn.
+
+        Returns:
+            dict {str: int}: The number of entities in each group.
+        """
+        counts = {name: len(group) for name, group in self.entities.items()}
+        counts['all'] = self.registry.count()
+
+        for name in self.sprite_groups:
+            counts['all'] += counts[name]
+
+        for name, kinds in Registry.groups.items():
+            counts[name] = self.registry.count(kinds)
+
+        return counts
+
+    @property
+    def ships_killed(self):
+        """Get the number of ships in the horde which have been shot down."""
+        return self.alien_horde.size - self.alien_horde.ship_count
+
+    @property
+    def game_over(self):
+        """Check if the game is over, either the tank has been destroyed or
+        the whole horde has been shot down.
+        """
+        return not self.tank.alive() or self.alien_horde.ship_count == 0
+
+    def update(self, seconds_elapsed, direction=0, shoot=False):
+        """Update the world by one time step, then move the tank and shoot as
+        the user asked.
+
+        Arguments:
+            seconds_elapsed (float): The time step to update the world by.
+            direction (int): The direction to move the tank. left < 0 > right.
+            shoot (bool): Whether the tank should fire a shot.
+        """
+        self._update_entities(seconds_elapsed)
+        self.ticks += 1
+
+        self.tank.move(direction)
+
+        if shoot and self.tank.shoot(self.registry):
+            self.shots_fired += 1
+
+    def repaint(self, rect):
+        """Clear and redraw an area of the surface on the next draw, such as
+        one which was drawn over by something other than the world.
+
+        Arguments:
+            rect (pygame.Rect): The area to repaint.
+        """
+        self.entities['all'].repaint_rect(rect)
+
+    def clear(self, surface, background):
+        """Clear all of the sprites which were drawn on a surface.
+
+        Arguments:
+            surface (pygame.Surface): The surface the sprites were drawn on.
+            background (pygame.Surface): The background to clear them with.
+        """
+        self.entities['all'].clear(surface, background)
+
+    def draw(self, surface, alpha=1):
+        """Draw the entities interpolated between the last two updates.
+
+        Arguments:
+            surface (pygame.Surface): The surface to draw on.
+            alpha (float): How far between the two updates to draw, 0 - 1.
+
+        Returns:
+            list [pygame.Rect]: The areas of the surface which changed.
+        """
+        self.registry.sync()
+
+        if alpha >= 1:
+            return self.entities['all'].draw(surface)
+
+        sprites = self.entities['all'].sprites()
+        positions = [sprite.interpolate(alpha) for sprite in sprites]
+
+        dirty_rects = self.entities['all'].draw(surface)
+
+        for sprite, position in zip(sprites, positions):
+            sprite.rect.topleft = position
+
+        return dirty_rects
+
+    def snapshot(self, alpha=1, hud=None):
+        """Take a snapshot of the entities interpolated between the last two
+        updates, which can be drawn while the world carries on updating, in
+        place of drawing the world. The images which entities draw on
+        themselves are copied whenever they change.
+
+        Arguments:
+            alpha (float): How far between the two updates to draw, 0 - 1.
+            hud (pygame.Surface): An overlay to draw in the top left, if any.
+
+        Returns:
+            Snapshot: The snapshot.
+        """
+        self.registry.sync()
+
+        sprites = []
+
+        for sprite in self.entities['all'].sprites():
+            if not sprite.visible:
+                continue
+
+            position = sprite.interpolate(alpha) if alpha < 1 else None
+            rect = sprite.rect.copy()
+            image = sprite.image
+
+            if position is not None:
+                sprite.rect.topleft = position
+
+            if sprite.owns_image:
+                if sprite.dirty or sprite not in self._images:
+                    self._images[sprite] = image.copy()
+
+                image = self._images[sprite]
+
+            if sprite.dirty == 1:
+                sprite.dirty = 0
+
+            sprites.append((id(sprite), image, rect))
+
+        self._snapshot = Snapshot(self.ticks, sprites, self._snapshot, hud)
+
+        return self._snapshot
+
+    def _update_entities(self, seconds_elapsed):
+        """Do any operations which will update the games state. The sprites
+        are updated one at a time, while the systems update every entity in
+        the registry at once. Entities are only mask tested against the
+        bullets whose rects they overlap.
+
+        When there is a profiler each phase is timed, and the sprites are
+        updated one at a time so that each type of sprite is timed too.
+
+        Arguments:
+            seconds_elapsed (float): The time in seconds since the last frame.
+        """
+        profiler = self.profiler
+        registry = self.registry
+
+        for name in self.updated_groups:
+            if profiler:
+                profiler.update_sprites(self.entities[name], seconds_elapsed)
+            else:
+                self.entities[name].update(seconds_elapsed)
+
+        if profiler:
+            start = profiler.clock()
+
+        Systems.move(registry, seconds_elapsed)
+        Systems.animate(registry, seconds_elapsed)
+        Systems.despawn(registry)
+
+        if profiler:
+            start = profiler.lap('Systems.update', start)
+
+        self.alien_horde.update(seconds_elapsed, registry)
+
+        if profiler:
+            start = profiler.lap('AlienHorde.update', start)
+
+        self.tank.take_damage(registry)
+
+        if profiler:
+            start = profiler.lap('Tank.take_damage', start)
+
+        self.alien_horde.move()
+
+        if profiler:
+            start = profiler.lap('AlienHorde.move', start)
+
+        self.alien_horde.shoot(self.tank, registry)
+
+        if profiler:
+            start = profiler.lap('AlienHorde.shoot', start)
+
+        for sheild in self.entities['shields']:
+            sheild.take_damage(registry)
+
+        if profiler:
+            start = profiler.lap('Shield.take_damage', start)
+
+        self.alien_horde.take_damage(registry)
+
+        if profiler:
+            start = profiler.lap('Ship.take_damage', start)
+
+        Mystery.take_damage(registry)
+
+        if profiler:
+            start = profiler.lap('Mystery.take_damage', start)
+
+        Bullet.explode(registry, Bullet.collisions(registry))
+
+        if profiler:
+            profiler.lap('Bullet.collisions', start)